@@ -216,6 +216,11 @@ export const analyticsAPI = {
     const response = await apiClient.get('/analytics/recipes');
     return response.data;
   },
+
+  getRetention: async () => {
+    const response = await apiClient.get('/analytics/retention');
+    return response.data;
+  },
 };
 
 export default apiClient; 
\ No newline at end of file
@@ -265,12 +265,32 @@ CREATE TABLE IF NOT EXISTS mycheff.recipe_ingredients (
     UNIQUE (recipe_id, ingredient_id)
 );
 
+-- Content-addressed media files, stored once under uploads/objects/<hash[0:2]>/<hash[2:4]>/.
+-- ref_count follows recipe_media; unreferenced objects are removed by jobs/media_store.py --gc
+-- once touched_at is older than the grace period.
+CREATE TABLE IF NOT EXISTS mycheff.media_objects (
+    hash CHAR(64) PRIMARY KEY,
+    extension VARCHAR(10) NOT NULL DEFAULT '',
+    mime_type VARCHAR(100),
+    bytes BIGINT NOT NULL,
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    touched_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Recipe Media
 CREATE TABLE IF NOT EXISTS mycheff.recipe_media (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     recipe_id UUID NOT NULL REFERENCES mycheff.recipes(id) ON DELETE CASCADE,
     media_type VARCHAR(10) NOT NULL CHECK (media_type IN ('photo', 'video')),
     url VARCHAR(255) NOT NULL,
+    content_hash CHAR(64) REFERENCES mycheff.media_objects(hash),
+    -- Measured by jobs/media_placeholders.py; lqip is a tiny WebP
+    width INTEGER,
+    height INTEGER,
+    bytes INTEGER,
+    dominant_color CHAR(7),
+    lqip BYTEA,
     is_primary BOOLEAN DEFAULT FALSE,
     display_order INTEGER DEFAULT 0,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
@@ -391,6 +411,210 @@ CREATE TABLE IF NOT EXISTS mycheff.app_settings (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- =====================================================
+-- PRECOMPUTED LOOKUP TABLES
+-- =====================================================
+
+-- Ingredient Substitutions (edited by admins)
+-- substitute_id can stand in for ingredient_id, earning `weight` match credit
+CREATE TABLE IF NOT EXISTS mycheff.ingredient_substitutions (
+    ingredient_id UUID NOT NULL REFERENCES mycheff.ingredients(id) ON DELETE CASCADE,
+    substitute_id UUID NOT NULL REFERENCES mycheff.ingredients(id) ON DELETE CASCADE,
+    weight DECIMAL(4,3) NOT NULL CHECK (weight > 0 AND weight <= 1),
+    is_bidirectional BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (ingredient_id, substitute_id),
+    CHECK (ingredient_id <> substitute_id)
+);
+
+-- Ingredient Substitution Closure (written by jobs/substitution_closure.py)
+-- Best multiplicative path weight between every reachable pair
+CREATE TABLE IF NOT EXISTS mycheff.ingredient_substitution_closure (
+    ingredient_id UUID NOT NULL,
+    substitute_id UUID NOT NULL,
+    weight DECIMAL(4,3) NOT NULL,
+    hops SMALLINT NOT NULL,
+    computed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (ingredient_id, substitute_id)
+);
+
+-- Recipe MinHash Signatures (written by jobs/similar_recipes.py)
+CREATE TABLE IF NOT EXISTS mycheff.recipe_minhash_signatures (
+    recipe_id UUID PRIMARY KEY REFERENCES mycheff.recipes(id) ON DELETE CASCADE,
+    ingredient_hash VARCHAR(32) NOT NULL,
+    signature BYTEA NOT NULL,
+    computed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Recipe Similarities (top-K neighbours by ingredient Jaccard similarity)
+CREATE TABLE IF NOT EXISTS mycheff.recipe_similarities (
+    recipe_id UUID NOT NULL REFERENCES mycheff.recipes(id) ON DELETE CASCADE,
+    similar_recipe_id UUID NOT NULL REFERENCES mycheff.recipes(id) ON DELETE CASCADE,
+    similarity DECIMAL(4,3) NOT NULL,
+    rank SMALLINT NOT NULL,
+    computed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (recipe_id, similar_recipe_id)
+);
+
+-- Recipe Cards (one prebuilt listing document per recipe and language, kept
+-- current by the recipe card triggers; sort/filter keys are copied out of the card)
+CREATE TABLE IF NOT EXISTS mycheff.recipe_cards (
+    recipe_id UUID NOT NULL REFERENCES mycheff.recipes(id) ON DELETE CASCADE,
+    language_code VARCHAR(5) NOT NULL REFERENCES mycheff.languages(code) ON DELETE CASCADE,
+    card JSONB NOT NULL,
+    is_published BOOLEAN NOT NULL,
+    is_featured BOOLEAN NOT NULL,
+    average_rating DECIMAL(3,2) NOT NULL DEFAULT 0,
+    rating_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    refreshed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (recipe_id, language_code)
+);
+
+-- Search Catalog Versions (bumped by triggers, part of every search cache key)
+CREATE TABLE IF NOT EXISTS mycheff.search_catalog_versions (
+    language_code VARCHAR(5) PRIMARY KEY REFERENCES mycheff.languages(code) ON DELETE CASCADE,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Activity Rollups (maintained by jobs/activity_rollups.py from user_activities).
+-- Hourly rows are rebuilt from raw events past the watermark; daily rows are
+-- rebuilt from the hourly ones. Buckets are UTC.
+CREATE TABLE IF NOT EXISTS mycheff.user_activity_hourly (
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    user_id UUID NOT NULL,
+    activity_type VARCHAR(50) NOT NULL,
+    event_count INTEGER NOT NULL,
+    PRIMARY KEY (bucket_start, user_id, activity_type)
+);
+
+CREATE TABLE IF NOT EXISTS mycheff.user_activity_daily (
+    day DATE NOT NULL,
+    user_id UUID NOT NULL,
+    activity_type VARCHAR(50) NOT NULL,
+    event_count INTEGER NOT NULL,
+    PRIMARY KEY (day, user_id, activity_type)
+);
+
+CREATE TABLE IF NOT EXISTS mycheff.recipe_activity_hourly (
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    recipe_id UUID NOT NULL,
+    activity_type VARCHAR(50) NOT NULL,
+    event_count INTEGER NOT NULL,
+    unique_users INTEGER NOT NULL,
+    PRIMARY KEY (bucket_start, recipe_id, activity_type)
+);
+
+CREATE TABLE IF NOT EXISTS mycheff.recipe_activity_daily (
+    day DATE NOT NULL,
+    recipe_id UUID NOT NULL,
+    activity_type VARCHAR(50) NOT NULL,
+    event_count INTEGER NOT NULL,
+    PRIMARY KEY (day, recipe_id, activity_type)
+);
+
+-- activity_type '*' rows cover all activity types
+CREATE TABLE IF NOT EXISTS mycheff.activity_type_hourly (
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    activity_type VARCHAR(50) NOT NULL,
+    event_count INTEGER NOT NULL,
+    unique_users INTEGER NOT NULL,
+    PRIMARY KEY (bucket_start, activity_type)
+);
+
+CREATE TABLE IF NOT EXISTS mycheff.activity_type_daily (
+    day DATE NOT NULL,
+    activity_type VARCHAR(50) NOT NULL,
+    event_count INTEGER NOT NULL,
+    unique_users INTEGER NOT NULL,
+    PRIMARY KEY (day, activity_type)
+);
+
+-- Daily HyperLogLog sketches of distinct users (zlib-compressed registers,
+-- see jobs/hll.py). scope is 'all' (scope_key '*'), 'type' or 'recipe'.
+CREATE TABLE IF NOT EXISTS mycheff.activity_user_sketches (
+    day DATE NOT NULL,
+    scope VARCHAR(10) NOT NULL,
+    scope_key VARCHAR(50) NOT NULL,
+    precision SMALLINT NOT NULL,
+    registers BYTEA NOT NULL,
+    PRIMARY KEY (day, scope, scope_key)
+);
+
+-- Forward-decayed trending scores (jobs/trending.py). score_log is
+-- log2 of the sum of weight * 2^(hours since 2024-01-01 / half-life), so
+-- ordering by it is ordering by the current decayed score.
+-- scope is 'recipe' or 'category'; language_code '*' covers all users.
+CREATE TABLE IF NOT EXISTS mycheff.trending_scores (
+    scope VARCHAR(10) NOT NULL,
+    language_code VARCHAR(5) NOT NULL,
+    item_id UUID NOT NULL,
+    score_log DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (scope, language_code, item_id)
+);
+
+-- Activity sessions split by an inactivity gap (jobs/sessionize.py)
+CREATE TABLE IF NOT EXISTS mycheff.user_sessions (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES mycheff.users(id) ON DELETE CASCADE,
+    started_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    ended_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    event_count INTEGER NOT NULL,
+    recipe_views INTEGER NOT NULL DEFAULT 0,
+    recipes_viewed UUID[] NOT NULL DEFAULT '{}'
+);
+
+-- Weekly signup cohorts by weeks since signup (jobs/retention.py)
+CREATE TABLE IF NOT EXISTS mycheff.retention_matrix (
+    cohort_week DATE NOT NULL,
+    weeks_since_signup SMALLINT NOT NULL,
+    cohort_size INTEGER NOT NULL,
+    active_users INTEGER NOT NULL,
+    PRIMARY KEY (cohort_week, weeks_since_signup)
+);
+
+-- D1/D7/D30 retention by signup_week, language and plan (jobs/retention.py)
+CREATE TABLE IF NOT EXISTS mycheff.retention_summary (
+    dimension VARCHAR(20) NOT NULL,
+    dimension_value VARCHAR(50) NOT NULL,
+    cohort_size INTEGER NOT NULL,
+    d1_eligible INTEGER NOT NULL,
+    d1_retained INTEGER NOT NULL,
+    d1_rate REAL,
+    d7_eligible INTEGER NOT NULL,
+    d7_retained INTEGER NOT NULL,
+    d7_rate REAL,
+    d30_eligible INTEGER NOT NULL,
+    d30_retained INTEGER NOT NULL,
+    d30_rate REAL,
+    PRIMARY KEY (dimension, dimension_value)
+);
+
+-- Resized WebP/AVIF copies of recipe photos (jobs/media_derivatives.py)
+CREATE TABLE IF NOT EXISTS mycheff.recipe_media_variants (
+    media_id UUID NOT NULL REFERENCES mycheff.recipe_media(id) ON DELETE CASCADE,
+    width SMALLINT NOT NULL,
+    format VARCHAR(10) NOT NULL,
+    height SMALLINT NOT NULL,
+    url VARCHAR(255) NOT NULL,
+    bytes INTEGER NOT NULL,
+    source_url VARCHAR(255) NOT NULL,
+    -- Hash of the source content and encoder settings; unchanged keys are skipped
+    build_key CHAR(64) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (media_id, width, format)
+);
+
+-- Watermarks of incremental jobs over append-only tables
+CREATE TABLE IF NOT EXISTS mycheff.aggregation_watermarks (
+    name VARCHAR(100) PRIMARY KEY,
+    watermark TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
 -- =====================================================
 -- INDEXES FOR PERFORMANCE
 -- =====================================================
@@ -400,6 +624,9 @@ CREATE INDEX IF NOT EXISTS idx_users_username_gin ON mycheff.users USING gin (us
 CREATE INDEX IF NOT EXISTS idx_users_email ON mycheff.users(email);
 CREATE INDEX IF NOT EXISTS idx_users_active ON mycheff.users(is_active) WHERE is_active = true;
 
+-- Category indexes
+CREATE INDEX IF NOT EXISTS idx_category_translations_name_trgm ON mycheff.category_translations USING gin (name gin_trgm_ops);
+
 -- Ingredient indexes
 CREATE INDEX IF NOT EXISTS idx_ingredient_translations_name_trgm ON mycheff.ingredient_translations USING gin (name gin_trgm_ops);
 CREATE INDEX IF NOT EXISTS idx_ingredient_translations_aliases ON mycheff.ingredient_translations USING gin (aliases);
@@ -414,6 +641,12 @@ CREATE INDEX IF NOT EXISTS idx_recipes_featured ON mycheff.recipes(is_featured)
 CREATE INDEX IF NOT EXISTS idx_recipes_published ON mycheff.recipes(is_published) WHERE is_published = true;
 CREATE INDEX IF NOT EXISTS idx_recipes_rating ON mycheff.recipes(average_rating DESC, rating_count DESC);
 
+-- Keyset pagination: each listing's full sort key ending on id
+CREATE INDEX IF NOT EXISTS idx_recipes_created_seek ON mycheff.recipes(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_recipes_relevance_seek ON mycheff.recipes(is_featured DESC, average_rating DESC, id DESC) WHERE is_published = true;
+CREATE INDEX IF NOT EXISTS idx_recipes_rating_seek ON mycheff.recipes(average_rating DESC, rating_count DESC, id DESC) WHERE is_published = true;
+CREATE INDEX IF NOT EXISTS idx_recipes_cooking_time_seek ON mycheff.recipes(cooking_time_minutes, id) WHERE is_published = true;
+
 CREATE INDEX IF NOT EXISTS idx_recipe_translations_title_trgm ON mycheff.recipe_translations USING gin (title gin_trgm_ops);
 CREATE INDEX IF NOT EXISTS idx_recipe_translations_search ON mycheff.recipe_translations USING GIN(search_vector);
 
@@ -426,8 +659,31 @@ CREATE INDEX IF NOT EXISTS idx_recipe_ingredients_recipe ON mycheff.recipe_ingre
 CREATE INDEX IF NOT EXISTS idx_user_ingredients_user_id ON mycheff.user_ingredients(user_id);
 CREATE INDEX IF NOT EXISTS idx_user_ingredients_ingredient_id ON mycheff.user_ingredients(ingredient_id);
 CREATE INDEX IF NOT EXISTS idx_favorite_recipes_user_id ON mycheff.favorite_recipes(user_id);
+CREATE INDEX IF NOT EXISTS idx_favorite_recipes_user_seek ON mycheff.favorite_recipes(user_id, created_at DESC, recipe_id DESC);
 CREATE INDEX IF NOT EXISTS idx_recipe_ratings_recipe ON mycheff.recipe_ratings(recipe_id);
 CREATE INDEX IF NOT EXISTS idx_recipe_ratings_user ON mycheff.recipe_ratings(user_id);
+CREATE INDEX IF NOT EXISTS idx_user_activities_created ON mycheff.user_activities(created_at);
+CREATE INDEX IF NOT EXISTS idx_user_activities_user_created ON mycheff.user_activities(user_id, created_at);
+
+-- Precomputed lookup indexes
+CREATE INDEX IF NOT EXISTS idx_ingredient_substitution_closure_substitute ON mycheff.ingredient_substitution_closure(substitute_id);
+CREATE INDEX IF NOT EXISTS idx_recipe_similarities_rank ON mycheff.recipe_similarities(recipe_id, rank);
+CREATE INDEX IF NOT EXISTS idx_recipe_similarities_similar ON mycheff.recipe_similarities(similar_recipe_id);
+CREATE INDEX IF NOT EXISTS idx_recipe_cards_created ON mycheff.recipe_cards(language_code, created_at DESC, recipe_id DESC);
+CREATE INDEX IF NOT EXISTS idx_recipe_cards_featured ON mycheff.recipe_cards(language_code, created_at DESC, recipe_id DESC) WHERE is_featured = true;
+CREATE INDEX IF NOT EXISTS idx_recipe_cards_rating ON mycheff.recipe_cards(language_code, average_rating DESC, rating_count DESC, recipe_id DESC) WHERE is_published = true;
+-- Recipe search ILIKEs both fields; the planner ORs the two bitmaps
+CREATE INDEX IF NOT EXISTS idx_recipe_cards_title_trgm ON mycheff.recipe_cards USING gin ((card->>'title') gin_trgm_ops) WHERE is_published = true;
+CREATE INDEX IF NOT EXISTS idx_recipe_cards_description_trgm ON mycheff.recipe_cards USING gin ((card->>'description') gin_trgm_ops) WHERE is_published = true;
+CREATE INDEX IF NOT EXISTS idx_user_activity_daily_user ON mycheff.user_activity_daily(user_id, day);
+CREATE INDEX IF NOT EXISTS idx_recipe_activity_daily_recipe ON mycheff.recipe_activity_daily(recipe_id, day);
+CREATE INDEX IF NOT EXISTS idx_trending_scores_top ON mycheff.trending_scores(scope, language_code, score_log DESC);
+CREATE INDEX IF NOT EXISTS idx_user_sessions_started ON mycheff.user_sessions(started_at);
+CREATE INDEX IF NOT EXISTS idx_user_sessions_user ON mycheff.user_sessions(user_id, started_at DESC);
+CREATE INDEX IF NOT EXISTS idx_user_sessions_ended ON mycheff.user_sessions(ended_at);
+CREATE INDEX IF NOT EXISTS idx_media_objects_unreferenced ON mycheff.media_objects(touched_at) WHERE ref_count = 0;
+CREATE INDEX IF NOT EXISTS idx_recipe_media_content_hash ON mycheff.recipe_media(content_hash);
+CREATE INDEX IF NOT EXISTS idx_recipe_media_unmeasured ON mycheff.recipe_media(id) WHERE lqip IS NULL;
 
 -- =====================================================
 -- TRIGGERS FOR updated_at
@@ -533,6 +789,426 @@ CREATE TRIGGER update_app_settings_modtime
     BEFORE UPDATE ON mycheff.app_settings
     FOR EACH ROW EXECUTE FUNCTION mycheff.update_modified_column();
 
+DROP TRIGGER IF EXISTS update_ingredient_substitutions_modtime ON mycheff.ingredient_substitutions;
+CREATE TRIGGER update_ingredient_substitutions_modtime
+    BEFORE UPDATE ON mycheff.ingredient_substitutions
+    FOR EACH ROW EXECUTE FUNCTION mycheff.update_modified_column();
+
+-- =====================================================
+-- SEARCH FUNCTIONS
+-- =====================================================
+
+-- Recipe, ingredient and category suggestions as one JSON document, so a
+-- keystroke costs a single round trip. Every group is served by a trigram index.
+CREATE OR REPLACE FUNCTION mycheff.search_suggestions(
+    p_query TEXT,
+    p_language_code VARCHAR(5) DEFAULT 'tr',
+    p_recipe_limit INTEGER DEFAULT 3,
+    p_ingredient_limit INTEGER DEFAULT 3,
+    p_category_limit INTEGER DEFAULT 3
+)
+RETURNS JSONB AS $func$
+    WITH pattern AS (
+        SELECT '%' || replace(replace(replace(p_query, '\', '\\'), '%', '\%'), '_', '\_') || '%' AS value
+    ),
+    recipe_hits AS (
+        SELECT r.id, rt.title, r.cooking_time_minutes, r.average_rating,
+            (
+                SELECT rm.url FROM mycheff.recipe_media rm
+                WHERE rm.recipe_id = r.id
+                ORDER BY rm.is_primary DESC, rm.display_order
+                LIMIT 1
+            ) AS image_url,
+            ROW_NUMBER() OVER (ORDER BY r.is_featured DESC, r.average_rating DESC, r.id) AS position
+        FROM mycheff.recipe_translations rt
+        JOIN mycheff.recipes r ON r.id = rt.recipe_id AND r.is_published = true
+        WHERE rt.language_code = p_language_code
+          AND rt.title ILIKE (SELECT value FROM pattern)
+        ORDER BY position
+        LIMIT p_recipe_limit
+    ),
+    ingredient_hits AS (
+        SELECT i.id, it.name, it.aliases, i.image,
+            ROW_NUMBER() OVER (ORDER BY LENGTH(it.name), it.name) AS position
+        FROM mycheff.ingredient_translations it
+        JOIN mycheff.ingredients i ON i.id = it.ingredient_id AND i.is_active = true
+        WHERE it.language_code = p_language_code
+          AND (it.name ILIKE (SELECT value FROM pattern) OR it.aliases @> ARRAY[p_query])
+        ORDER BY position
+        LIMIT p_ingredient_limit
+    ),
+    category_hits AS (
+        SELECT c.id, ct.name, c.icon, c.color,
+            ROW_NUMBER() OVER (ORDER BY c.sort_order, ct.name) AS position
+        FROM mycheff.category_translations ct
+        JOIN mycheff.categories c ON c.id = ct.category_id AND c.is_active = true
+        WHERE ct.language_code = p_language_code
+          AND ct.name ILIKE (SELECT value FROM pattern)
+        ORDER BY position
+        LIMIT p_category_limit
+    )
+    SELECT jsonb_build_object(
+        'recipes', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'id', id,
+                'title', title,
+                'imageUrl', image_url,
+                'cookingTimeMinutes', cooking_time_minutes,
+                'averageRating', average_rating
+            ) ORDER BY position)
+            FROM recipe_hits
+        ), '[]'::jsonb),
+        'ingredients', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'id', id,
+                'name', name,
+                'aliases', aliases,
+                'image', image
+            ) ORDER BY position)
+            FROM ingredient_hits
+        ), '[]'::jsonb),
+        'categories', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'id', id,
+                'name', name,
+                'icon', icon,
+                'color', color
+            ) ORDER BY position)
+            FROM category_hits
+        ), '[]'::jsonb)
+    );
+$func$ LANGUAGE sql STABLE;
+
+-- =====================================================
+-- RECIPE CARD MAINTENANCE
+-- =====================================================
+
+-- Rebuilds every active language's card for one recipe. Title, description and
+-- category names fall back to 'tr' when the language has no translation.
+CREATE OR REPLACE FUNCTION mycheff.refresh_recipe_cards(p_recipe_id UUID)
+RETURNS VOID AS $func$
+BEGIN
+    INSERT INTO mycheff.recipe_cards (
+        recipe_id, language_code, card, is_published, is_featured,
+        average_rating, rating_count, created_at, refreshed_at
+    )
+    SELECT
+        r.id,
+        l.code,
+        jsonb_build_object(
+            'id', r.id,
+            'languageCode', COALESCE(t.language_code, l.code),
+            'title', COALESCE(t.title, 'Tarif Başlığı'),
+            'description', COALESCE(t.description, ''),
+            'cookingTimeMinutes', r.cooking_time_minutes,
+            'prepTimeMinutes', r.prep_time_minutes,
+            'difficultyLevel', r.difficulty_level,
+            'servingSize', r.serving_size,
+            'isPremium', COALESCE(r.is_premium, false),
+            'isFeatured', COALESCE(r.is_featured, false),
+            'averageRating', COALESCE(r.average_rating, 0),
+            'ratingCount', COALESCE(r.rating_count, 0),
+            'imageUrl', img.url,
+            'imageVariants', COALESCE(img.variants, '[]'::jsonb),
+            'imagePlaceholder', CASE WHEN img.lqip IS NOT NULL THEN jsonb_build_object(
+                'width', img.width,
+                'height', img.height,
+                'bytes', img.bytes,
+                'color', img.dominant_color,
+                'lqip', 'data:image/webp;base64,' || translate(encode(img.lqip, 'base64'), E'\n', '')
+            ) END,
+            'nutritionalData', d.nutritional_data,
+            'categories', COALESCE(cats.categories, '[]'::jsonb),
+            'createdAt', r.created_at,
+            'updatedAt', r.updated_at
+        ),
+        COALESCE(r.is_published, false),
+        COALESCE(r.is_featured, false),
+        COALESCE(r.average_rating, 0),
+        COALESCE(r.rating_count, 0),
+        r.created_at,
+        CURRENT_TIMESTAMP
+    FROM mycheff.recipes r
+    CROSS JOIN mycheff.languages l
+    LEFT JOIN LATERAL (
+        SELECT rt.language_code, rt.title, rt.description
+        FROM mycheff.recipe_translations rt
+        WHERE rt.recipe_id = r.id
+          AND rt.language_code IN (l.code, 'tr')
+        ORDER BY rt.language_code = l.code DESC
+        LIMIT 1
+    ) t ON true
+    LEFT JOIN LATERAL (
+        SELECT rm.url, rm.width, rm.height, rm.bytes, rm.dominant_color, rm.lqip, (
+            SELECT jsonb_agg(jsonb_build_object(
+                'url', v.url,
+                'width', v.width,
+                'height', v.height,
+                'format', v.format
+            ) ORDER BY v.format, v.width)
+            FROM mycheff.recipe_media_variants v
+            WHERE v.media_id = rm.id AND v.source_url = rm.url
+        ) AS variants
+        FROM mycheff.recipe_media rm
+        WHERE rm.recipe_id = r.id
+        ORDER BY rm.is_primary DESC, rm.display_order
+        LIMIT 1
+    ) img ON true
+    LEFT JOIN mycheff.recipe_details d ON d.recipe_id = r.id
+    LEFT JOIN LATERAL (
+        SELECT jsonb_agg(jsonb_build_object(
+            'id', c.id,
+            'name', ct.name,
+            'icon', c.icon,
+            'color', c.color
+        ) ORDER BY c.sort_order) AS categories
+        FROM mycheff.recipe_categories rc
+        JOIN mycheff.categories c ON c.id = rc.category_id
+        LEFT JOIN LATERAL (
+            SELECT ctr.name
+            FROM mycheff.category_translations ctr
+            WHERE ctr.category_id = c.id
+              AND ctr.language_code IN (l.code, 'tr')
+            ORDER BY ctr.language_code = l.code DESC
+            LIMIT 1
+        ) ct ON true
+        WHERE rc.recipe_id = r.id
+    ) cats ON true
+    WHERE r.id = p_recipe_id
+      AND l.is_active = true
+    ON CONFLICT (recipe_id, language_code) DO UPDATE
+    SET card = EXCLUDED.card,
+        is_published = EXCLUDED.is_published,
+        is_featured = EXCLUDED.is_featured,
+        average_rating = EXCLUDED.average_rating,
+        rating_count = EXCLUDED.rating_count,
+        created_at = EXCLUDED.created_at,
+        refreshed_at = EXCLUDED.refreshed_at;
+END;
+$func$ LANGUAGE plpgsql;
+
+-- Row trigger: TG_ARGV[0] names the column holding the affected id and
+-- TG_ARGV[1] says whether it is a recipe id or a category id.
+CREATE OR REPLACE FUNCTION mycheff.refresh_recipe_cards_for_row()
+RETURNS TRIGGER AS $func$
+DECLARE
+    v_ids UUID[] := ARRAY[]::UUID[];
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        v_ids := v_ids || (to_jsonb(OLD) ->> TG_ARGV[0])::UUID;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        v_ids := v_ids || (to_jsonb(NEW) ->> TG_ARGV[0])::UUID;
+    END IF;
+
+    IF TG_ARGV[1] = 'category' THEN
+        PERFORM mycheff.refresh_recipe_cards(affected.recipe_id)
+        FROM (
+            SELECT DISTINCT recipe_id FROM mycheff.recipe_categories WHERE category_id = ANY(v_ids)
+        ) affected;
+    ELSE
+        PERFORM mycheff.refresh_recipe_cards(affected.recipe_id)
+        FROM (SELECT DISTINCT unnest(v_ids) AS recipe_id) affected;
+    END IF;
+
+    RETURN NULL;
+END;
+$func$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS recipes_refresh_cards ON mycheff.recipes;
+CREATE TRIGGER recipes_refresh_cards
+    AFTER INSERT ON mycheff.recipes
+    FOR EACH ROW EXECUTE FUNCTION mycheff.refresh_recipe_cards_for_row('id', 'recipe');
+
+-- Any column change refreshes the cards except view_count (and the updated_at
+-- bump that comes with it), so recipe views do not rewrite cards
+DROP TRIGGER IF EXISTS recipes_refresh_cards_on_update ON mycheff.recipes;
+CREATE TRIGGER recipes_refresh_cards_on_update
+    AFTER UPDATE ON mycheff.recipes
+    FOR EACH ROW
+    WHEN ((to_jsonb(OLD) - 'view_count' - 'updated_at') IS DISTINCT FROM (to_jsonb(NEW) - 'view_count' - 'updated_at'))
+    EXECUTE FUNCTION mycheff.refresh_recipe_cards_for_row('id', 'recipe');
+
+DROP TRIGGER IF EXISTS recipe_translations_refresh_cards ON mycheff.recipe_translations;
+CREATE TRIGGER recipe_translations_refresh_cards
+    AFTER INSERT OR UPDATE OR DELETE ON mycheff.recipe_translations
+    FOR EACH ROW EXECUTE FUNCTION mycheff.refresh_recipe_cards_for_row('recipe_id', 'recipe');
+
+DROP TRIGGER IF EXISTS recipe_details_refresh_cards ON mycheff.recipe_details;
+CREATE TRIGGER recipe_details_refresh_cards
+    AFTER INSERT OR UPDATE OR DELETE ON mycheff.recipe_details
+    FOR EACH ROW EXECUTE FUNCTION mycheff.refresh_recipe_cards_for_row('recipe_id', 'recipe');
+
+DROP TRIGGER IF EXISTS recipe_media_refresh_cards ON mycheff.recipe_media;
+CREATE TRIGGER recipe_media_refresh_cards
+    AFTER INSERT OR UPDATE OR DELETE ON mycheff.recipe_media
+    FOR EACH ROW EXECUTE FUNCTION mycheff.refresh_recipe_cards_for_row('recipe_id', 'recipe');
+
+DROP TRIGGER IF EXISTS recipe_categories_refresh_cards ON mycheff.recipe_categories;
+CREATE TRIGGER recipe_categories_refresh_cards
+    AFTER INSERT OR UPDATE OR DELETE ON mycheff.recipe_categories
+    FOR EACH ROW EXECUTE FUNCTION mycheff.refresh_recipe_cards_for_row('recipe_id', 'recipe');
+
+DROP TRIGGER IF EXISTS categories_refresh_cards ON mycheff.categories;
+CREATE TRIGGER categories_refresh_cards
+    AFTER UPDATE OF icon, color, sort_order ON mycheff.categories
+    FOR EACH ROW EXECUTE FUNCTION mycheff.refresh_recipe_cards_for_row('id', 'category');
+
+DROP TRIGGER IF EXISTS category_translations_refresh_cards ON mycheff.category_translations;
+CREATE TRIGGER category_translations_refresh_cards
+    AFTER INSERT OR UPDATE OR DELETE ON mycheff.category_translations
+    FOR EACH ROW EXECUTE FUNCTION mycheff.refresh_recipe_cards_for_row('category_id', 'category');
+
+-- Keeps media_objects.ref_count equal to the number of recipe_media rows per hash
+CREATE OR REPLACE FUNCTION mycheff.update_media_object_refs()
+RETURNS TRIGGER AS $func$
+BEGIN
+    IF TG_OP <> 'INSERT' AND OLD.content_hash IS NOT NULL THEN
+        UPDATE mycheff.media_objects
+        SET ref_count = ref_count - 1,
+            touched_at = CURRENT_TIMESTAMP
+        WHERE hash = OLD.content_hash;
+    END IF;
+    IF TG_OP <> 'DELETE' AND NEW.content_hash IS NOT NULL THEN
+        UPDATE mycheff.media_objects
+        SET ref_count = ref_count + 1
+        WHERE hash = NEW.content_hash;
+    END IF;
+    RETURN NULL;
+END;
+$func$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS recipe_media_object_refs ON mycheff.recipe_media;
+CREATE TRIGGER recipe_media_object_refs
+    AFTER INSERT OR UPDATE OF content_hash OR DELETE ON mycheff.recipe_media
+    FOR EACH ROW EXECUTE FUNCTION mycheff.update_media_object_refs();
+
+-- Measurements describe the old file once the URL changes, unless the content
+-- hash shows the same bytes under a new URL (media_store --migrate)
+CREATE OR REPLACE FUNCTION mycheff.reset_recipe_media_placeholder()
+RETURNS TRIGGER AS $func$
+BEGIN
+    IF NEW.url IS DISTINCT FROM OLD.url
+       AND (NEW.content_hash IS NULL OR NEW.content_hash IS DISTINCT FROM OLD.content_hash) THEN
+        NEW.width := NULL;
+        NEW.height := NULL;
+        NEW.bytes := NULL;
+        NEW.dominant_color := NULL;
+        NEW.lqip := NULL;
+    END IF;
+    RETURN NEW;
+END;
+$func$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS recipe_media_reset_placeholder ON mycheff.recipe_media;
+CREATE TRIGGER recipe_media_reset_placeholder
+    BEFORE UPDATE OF url ON mycheff.recipe_media
+    FOR EACH ROW EXECUTE FUNCTION mycheff.reset_recipe_media_placeholder();
+
+-- Wakes jobs/media_derivatives.py --follow for new or replaced photos. Its
+-- variants are written by the job, which refreshes the affected cards itself.
+CREATE OR REPLACE FUNCTION mycheff.notify_recipe_media_changed()
+RETURNS TRIGGER AS $func$
+BEGIN
+    PERFORM pg_notify('recipe_media_changed', NEW.id::text);
+    RETURN NULL;
+END;
+$func$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS recipe_media_notify_changed ON mycheff.recipe_media;
+CREATE TRIGGER recipe_media_notify_changed
+    AFTER INSERT OR UPDATE OF url ON mycheff.recipe_media
+    FOR EACH ROW EXECUTE FUNCTION mycheff.notify_recipe_media_changed();
+
+-- =====================================================
+-- CACHE INVALIDATION TRIGGERS
+-- =====================================================
+
+-- Row-level: translations only invalidate their own language
+CREATE OR REPLACE FUNCTION mycheff.bump_search_catalog_version()
+RETURNS TRIGGER AS $func$
+BEGIN
+    UPDATE mycheff.search_catalog_versions
+    SET version = version + 1,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE language_code IN (
+        CASE WHEN TG_OP <> 'INSERT' THEN OLD.language_code END,
+        CASE WHEN TG_OP <> 'DELETE' THEN NEW.language_code END
+    );
+    RETURN NULL;
+END;
+$func$ LANGUAGE plpgsql;
+
+-- Statement-level: language-neutral tables invalidate every language once per statement
+CREATE OR REPLACE FUNCTION mycheff.bump_all_search_catalog_versions()
+RETURNS TRIGGER AS $func$
+BEGIN
+    UPDATE mycheff.search_catalog_versions
+    SET version = version + 1,
+        updated_at = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END;
+$func$ LANGUAGE plpgsql;
+
+-- view_count is left out so recipe views do not flush the cache
+DROP TRIGGER IF EXISTS recipes_search_version ON mycheff.recipes;
+CREATE TRIGGER recipes_search_version
+    AFTER INSERT OR DELETE OR UPDATE OF is_premium, is_featured, cooking_time_minutes, prep_time_minutes,
+        difficulty_level, serving_size, is_published, average_rating, rating_count
+    ON mycheff.recipes
+    FOR EACH STATEMENT EXECUTE FUNCTION mycheff.bump_all_search_catalog_versions();
+
+DROP TRIGGER IF EXISTS recipe_translations_search_version ON mycheff.recipe_translations;
+CREATE TRIGGER recipe_translations_search_version
+    AFTER INSERT OR UPDATE OR DELETE ON mycheff.recipe_translations
+    FOR EACH ROW EXECUTE FUNCTION mycheff.bump_search_catalog_version();
+
+DROP TRIGGER IF EXISTS recipe_categories_search_version ON mycheff.recipe_categories;
+CREATE TRIGGER recipe_categories_search_version
+    AFTER INSERT OR UPDATE OR DELETE ON mycheff.recipe_categories
+    FOR EACH STATEMENT EXECUTE FUNCTION mycheff.bump_all_search_catalog_versions();
+
+DROP TRIGGER IF EXISTS recipe_media_search_version ON mycheff.recipe_media;
+CREATE TRIGGER recipe_media_search_version
+    AFTER INSERT OR UPDATE OR DELETE ON mycheff.recipe_media
+    FOR EACH STATEMENT EXECUTE FUNCTION mycheff.bump_all_search_catalog_versions();
+
+DROP TRIGGER IF EXISTS ingredients_search_version ON mycheff.ingredients;
+CREATE TRIGGER ingredients_search_version
+    AFTER INSERT OR UPDATE OR DELETE ON mycheff.ingredients
+    FOR EACH STATEMENT EXECUTE FUNCTION mycheff.bump_all_search_catalog_versions();
+
+DROP TRIGGER IF EXISTS ingredient_translations_search_version ON mycheff.ingredient_translations;
+CREATE TRIGGER ingredient_translations_search_version
+    AFTER INSERT OR UPDATE OR DELETE ON mycheff.ingredient_translations
+    FOR EACH ROW EXECUTE FUNCTION mycheff.bump_search_catalog_version();
+
+DROP TRIGGER IF EXISTS categories_search_version ON mycheff.categories;
+CREATE TRIGGER categories_search_version
+    AFTER INSERT OR UPDATE OR DELETE ON mycheff.categories
+    FOR EACH STATEMENT EXECUTE FUNCTION mycheff.bump_all_search_catalog_versions();
+
+DROP TRIGGER IF EXISTS category_translations_search_version ON mycheff.category_translations;
+CREATE TRIGGER category_translations_search_version
+    AFTER INSERT OR UPDATE OR DELETE ON mycheff.category_translations
+    FOR EACH ROW EXECUTE FUNCTION mycheff.bump_search_catalog_version();
+
+-- Languages added after setup get a version row, so their cache entries can be invalidated
+CREATE OR REPLACE FUNCTION mycheff.add_search_catalog_version()
+RETURNS TRIGGER AS $func$
+BEGIN
+    INSERT INTO mycheff.search_catalog_versions (language_code)
+    VALUES (NEW.code)
+    ON CONFLICT (language_code) DO NOTHING;
+    RETURN NULL;
+END;
+$func$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS languages_search_version ON mycheff.languages;
+CREATE TRIGGER languages_search_version
+    AFTER INSERT ON mycheff.languages
+    FOR EACH ROW EXECUTE FUNCTION mycheff.add_search_catalog_version();
+
 -- =====================================================
 -- VIEWS
 -- =====================================================
@@ -559,6 +1235,11 @@ INSERT INTO mycheff.languages (code, name) VALUES
 ('ar', 'العربية')
 ON CONFLICT (code) DO NOTHING;
 
+-- Search catalog versions
+INSERT INTO mycheff.search_catalog_versions (language_code)
+SELECT code FROM mycheff.languages
+ON CONFLICT (language_code) DO NOTHING;
+
 -- Units
 INSERT INTO mycheff.units (code, system, base_unit_code, conversion_factor) VALUES
 ('gr', 'metric', 'gr', 1.0),
@@ -637,6 +1318,9 @@ SELECT sp.id, 'tr',
 FROM mycheff.subscription_plans sp
 ON CONFLICT (plan_id, language_code) DO NOTHING;
 
+-- Recipe cards for recipes that existed before the card triggers
+SELECT mycheff.refresh_recipe_cards(id) FROM mycheff.recipes;
+
 -- Reset search path
 RESET search_path;
 
@@ -1,67 +1,282 @@
 #!/usr/bin/env python3
-from PIL import Image, ImageDraw, ImageFont
+"""
+Render placeholder images for every recipe in the database.
+
+Titles come from recipe_translations (Turkish first, then any language) and
+each recipe gets a stable colour from its id. Files are named after the
+recipe's primary photo URL (e.g. adana-kebab.jpg) so seeded rows point at
+them, or after the recipe id when it has no JPEG photo yet. Recipes whose photo
+was moved into the content-addressed store (/uploads/objects/, see
+jobs/media_store.py) already have a real image and are skipped; their old
+placeholder files are pruned. Rendering fans out over a process pool; every
+worker loads its fonts once and writes its images directly.
+
+A manifest in the output directory maps each file to a hash of its inputs
+(title, colour, font file, sizes and quality) and a hash of the JPEG written.
+Only images whose inputs changed, or whose file no longer matches, are
+rendered again, and files of recipes that are gone are removed. Bump
+RENDER_VERSION when the drawing code changes.
+
+Usage:
+    python create_recipe_images.py [--out public/uploads/recipes] [--workers N] [--limit N] [--force]
+"""
+import argparse
+import hashlib
+import io
+import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse
+
+from PIL import Image, ImageDraw, ImageFont
+
+from jobs.db import connect
 
-# Create uploads/recipes directory if not exists
-os.makedirs('public/uploads/recipes', exist_ok=True)
-
-# Sample Turkish recipes with colors
-recipes = [
-    ('doner-kebab.jpg', 'Döner Kebab', '#8B4513'),
-    ('adana-kebab.jpg', 'Adana Kebabı', '#DC143C'),
-    ('iskender-kebab.jpg', 'İskender Kebab', '#CD853F'),
-    ('lahmacun.jpg', 'Lahmacun', '#FF6347'),
-    ('karniyarik.jpg', 'Karnıyarık', '#9932CC'),
-    ('menemen.jpg', 'Menemen', '#FFD700'),
-    ('su-boregi.jpg', 'Su Böreği', '#F0E68C'),
-    ('manti.jpg', 'Mantı', '#FFA500'),
-    ('baklava.jpg', 'Baklava', '#DAA520'),
-    ('pilav.jpg', 'Bulgur Pilavı', '#DEB887')
+RENDER_VERSION = 1
+MANIFEST_NAME = '.manifest.json'
+WIDTH, HEIGHT = 800, 600
+TITLE_SIZE, FOOTER_SIZE = 48, 24
+JPEG_QUALITY = 85
+FOOTER_TEXT = 'MyCheff Sample Recipe'
+OBJECT_STORE_PREFIX = '/uploads/objects/'
+
+FONT_PATHS = [
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
+    '/usr/share/fonts/TTF/DejaVuSans-Bold.ttf',
+    '/Library/Fonts/Arial.ttf',
+    '/System/Library/Fonts/Supplemental/Arial.ttf',
+    '/System/Library/Fonts/Helvetica.ttc',
+    'C:\\Windows\\Fonts\\arial.ttf',
+]
+
+PALETTE = [
+    '#8B4513', '#DC143C', '#CD853F', '#FF6347', '#9932CC',
+    '#FFD700', '#F0E68C', '#FFA500', '#DAA520', '#DEB887',
 ]
 
-print("🎨 Creating sample recipe images...")
+RECIPES_SQL = """
+    SELECT r.id::text, COALESCE(tr.title, any_language.title), photo.url
+    FROM mycheff.recipes r
+    LEFT JOIN mycheff.recipe_translations tr
+        ON tr.recipe_id = r.id AND tr.language_code = 'tr'
+    LEFT JOIN LATERAL (
+        SELECT title FROM mycheff.recipe_translations
+        WHERE recipe_id = r.id
+        ORDER BY language_code
+        LIMIT 1
+    ) any_language ON true
+    LEFT JOIN LATERAL (
+        SELECT url FROM mycheff.recipe_media
+        WHERE recipe_id = r.id AND media_type IN ('photo', 'image')
+        ORDER BY is_primary DESC, display_order
+        LIMIT 1
+    ) photo ON true
+    ORDER BY r.created_at, r.id
+"""
+
+# Per-worker fonts, set by load_fonts()
+_fonts = None
+
+
+def find_font_path():
+    for path in FONT_PATHS:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_fonts(font_path):
+    global _fonts
+    if font_path:
+        _fonts = (ImageFont.truetype(font_path, TITLE_SIZE), ImageFont.truetype(font_path, FOOTER_SIZE))
+    else:
+        _fonts = (ImageFont.load_default(TITLE_SIZE), ImageFont.load_default(FOOTER_SIZE))
+
+
+def is_stored_object(url):
+    return bool(url) and urlparse(url).path.startswith(OBJECT_STORE_PREFIX)
+
+
+def image_filename(recipe_id, url):
+    """Basename of the recipe's photo URL when it is a JPEG, else the recipe id."""
+    name = os.path.basename(urlparse(url).path) if url else ''
+    if os.path.splitext(name)[1].lower() in ('.jpg', '.jpeg'):
+        return name
+    return f'{recipe_id}.jpg'
+
+
+def recipe_color(recipe_id):
+    return PALETTE[hashlib.md5(recipe_id.encode('utf-8')).digest()[0] % len(PALETTE)]
+
+
+def wrap_title(draw, title, font, max_width):
+    lines, line = [], ''
+    for word in title.split():
+        candidate = f'{line} {word}'.strip()
+        if line and draw.textlength(candidate, font=font) > max_width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    return lines + [line]
+
+
+def font_fingerprint(font_path):
+    if not font_path:
+        return 'default'
+    with open(font_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def input_hash(title, color, font):
+    inputs = [RENDER_VERSION, title, color, font, WIDTH, HEIGHT, TITLE_SIZE, FOOTER_SIZE, JPEG_QUALITY, FOOTER_TEXT]
+    return hashlib.sha256(json.dumps(inputs, ensure_ascii=False).encode('utf-8')).hexdigest()
 
-for filename, title, color in recipes:
-    # Create 800x600 image
-    img = Image.new('RGB', (800, 600), color)
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def is_current(entry, path, inputs):
+    """Same inputs and the file on disk is still the one we wrote."""
+    if not entry or entry['input'] != inputs:
+        return False
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+    return stat.st_size == entry['bytes'] and stat.st_mtime_ns == entry['mtime_ns']
+
+
+def render(job):
+    """Render one recipe image and return (filename, its manifest entry)."""
+    out_dir, filename, title, color, inputs = job
+    font, small_font = _fonts
+
+    img = Image.new('RGB', (WIDTH, HEIGHT), color)
     draw = ImageDraw.Draw(img)
-    
-    # Try to use a decent font, fallback to default
+
+    lines = wrap_title(draw, title, font, WIDTH - 80)
+    line_height = font.getbbox('Ag')[3] + 12
+    y = (HEIGHT - line_height * len(lines)) // 2
+    for line in lines:
+        x = (WIDTH - draw.textlength(line, font=font)) // 2
+        # Shadow for readability on light colours
+        draw.text((x + 3, y + 3), line, fill='black', font=font)
+        draw.text((x, y), line, fill='white', font=font)
+        y += line_height
+
+    draw.text((401, 551), FOOTER_TEXT, fill='black', font=small_font)
+    draw.text((400, 550), FOOTER_TEXT, fill='white', font=small_font)
+
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=JPEG_QUALITY)
+    data = buffer.getvalue()
+
+    path = os.path.join(out_dir, filename)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(path + '.tmp', path)
+    return filename, {
+        'input': inputs,
+        'output': hashlib.sha256(data).hexdigest(),
+        'bytes': len(data),
+        'mtime_ns': os.stat(path).st_mtime_ns,
+    }
+
+
+def load_recipes(limit=None):
+    conn = connect()
     try:
-        font = ImageFont.truetype('/System/Library/Fonts/Arial.ttf', 48)
-        small_font = ImageFont.truetype('/System/Library/Fonts/Arial.ttf', 24)
-    except:
-        try:
-            font = ImageFont.truetype('/System/Library/Fonts/Helvetica.ttc', 48)
-            small_font = ImageFont.truetype('/System/Library/Fonts/Helvetica.ttc', 24)
-        except:
-            font = ImageFont.load_default()
-            small_font = ImageFont.load_default()
-    
-    # Add title text
-    text_bbox = draw.textbbox((0, 0), title, font=font)
-    text_width = text_bbox[2] - text_bbox[0]
-    text_height = text_bbox[3] - text_bbox[1]
-    
-    # Center the text
-    x = (800 - text_width) // 2
-    y = (600 - text_height) // 2
-    
-    # Add shadow for better readability
-    draw.text((x+3, y+3), title, fill='black', font=font)
-    # Add main text
-    draw.text((x, y), title, fill='white', font=font)
-    
-    # Add 'MyCheff Sample' at bottom
-    sample_text = 'MyCheff Sample Recipe'
-    sample_bbox = draw.textbbox((0, 0), sample_text, font=small_font)
-    sample_width = sample_bbox[2] - sample_bbox[0]
-    draw.text((401, 551), sample_text, fill='black', font=small_font)
-    draw.text((400, 550), sample_text, fill='white', font=small_font)
-    
-    # Save image
-    img.save(f'public/uploads/recipes/{filename}', 'JPEG', quality=90)
-    print(f'✅ Created: {filename}')
-
-print('\n🎉 All recipe images created successfully!')
-print('📁 Images saved to: public/uploads/recipes/') 
\ No newline at end of file
+        with conn.cursor() as cursor:
+            cursor.execute(RECIPES_SQL + (' LIMIT %s' if limit else ''), (limit,) if limit else None)
+            rows = cursor.fetchall()
+    finally:
+        conn.close()
+    return [row for row in rows if row[1]]
+
+
+def build_jobs(recipes, out_dir, font):
+    jobs, seen, stored = [], set(), 0
+    for recipe_id, title, url in recipes:
+        # A file named after the object URL would never be served
+        if is_stored_object(url):
+            stored += 1
+            continue
+        filename = image_filename(recipe_id, url)
+        # Recipes sharing a photo URL each get their own file
+        if filename in seen:
+            filename = f'{recipe_id}.jpg'
+        seen.add(filename)
+        color = recipe_color(recipe_id)
+        jobs.append((out_dir, filename, title, color, input_hash(title, color, font)))
+    return jobs, stored
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render placeholder images for all recipes')
+    parser.add_argument('--out', default='public/uploads/recipes')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--limit', type=int, help='only the first N recipes; skips pruning')
+    parser.add_argument('--force', action='store_true', help='render every image even if unchanged')
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    started = time.perf_counter()
+    font_path = find_font_path()
+    if not font_path:
+        print("⚠️  No TrueType font found, using Pillow's default font")
+
+    jobs, stored = build_jobs(load_recipes(args.limit), args.out, font_fingerprint(font_path))
+    if stored:
+        print(f"📦 {stored} recipes already have a photo in the object store, skipped")
+    manifest = load_manifest(args.out)
+    stale = [
+        job for job in jobs
+        if args.force or not is_current(manifest.get(job[1]), os.path.join(args.out, job[1]), job[4])
+    ]
+    print(f"🎨 {len(jobs)} recipes, {len(stale)} images to render with {args.workers} workers...")
+
+    render_started = time.perf_counter()
+    total_bytes = 0
+    if stale:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=load_fonts, initargs=(font_path,)) as pool:
+            for filename, entry in pool.map(render, stale, chunksize=max(1, len(stale) // (args.workers * 4))):
+                manifest[filename] = entry
+                total_bytes += entry['bytes']
+    elapsed = time.perf_counter() - render_started
+
+    # Only files this script wrote are pruned; anything else in the directory stays
+    pruned = 0
+    if not args.limit:
+        current = {job[1] for job in jobs}
+        for filename in sorted(set(manifest) - current):
+            try:
+                os.remove(os.path.join(args.out, filename))
+            except FileNotFoundError:
+                pass
+            del manifest[filename]
+            pruned += 1
+    save_manifest(args.out, manifest)
+
+    rate = len(stale) / elapsed if elapsed and stale else 0
+    print(f"✅ Rendered {len(stale)} images ({total_bytes / 1024 / 1024:.1f} MB) in {elapsed:.2f}s "
+          f"- {rate:.0f} images/s; {len(jobs) - len(stale)} unchanged, {pruned} pruned; "
+          f"{time.perf_counter() - started:.2f}s total")
+    print(f"📁 Images saved to: {args.out}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""MyCheff batch jobs. Run from mycheff-backend/ with `python -m jobs.<name>`."""
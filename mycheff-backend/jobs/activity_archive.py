@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Archive old user_activities to Parquet and read them back transparently.
+
+Events older than the retention window are copied, month by month, into
+zstd-compressed Parquet files under ARCHIVE_DIR/month=YYYY-MM/ and deleted from
+Postgres in the same batch transaction, so the hot table only keeps recent
+events. A batch's file is named after its first row and renamed into place
+before the delete commits; a crash in between rewrites the same file on the
+next run instead of duplicating it.
+
+read_activities() answers historical queries over both stores: archived
+months are scanned with Parquet predicate pushdown and recent rows are
+streamed from Postgres with COPY, then both are concatenated into one Arrow
+table (call .to_pandas() for a DataFrame).
+
+Note that --full rebuilds of activity_rollups and sessionize only see the hot
+table, so run them before archiving or accept that history ends at the cutoff.
+
+Usage:
+    python -m jobs.activity_archive [--retention-days 180] [--batch-size 50000] [--dry-run]
+"""
+import argparse
+import io
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from jobs.db import connect
+
+RETENTION_DAYS = 180
+BATCH_SIZE = 50000
+ARCHIVE_DIR = os.environ.get(
+    'ACTIVITY_ARCHIVE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'archive', 'user_activities'),
+)
+
+SCHEMA = pa.schema([
+    ('id', pa.string()),
+    ('user_id', pa.string()),
+    ('activity_type', pa.string()),
+    ('recipe_id', pa.string()),
+    ('metadata', pa.string()),
+    ('ip_address', pa.string()),
+    ('user_agent', pa.string()),
+    ('created_at', pa.timestamp('us', tz='UTC')),
+])
+
+SELECT_COLUMNS = """
+    id::text, user_id::text, activity_type, recipe_id::text, metadata::text,
+    ip_address, user_agent, created_at
+"""
+
+
+def month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(value):
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def archive_batch(conn, month_dir, since, until, after, batch_size):
+    """Move one batch of [since, until) rows past the (created_at, id) key `after`."""
+    with conn:
+        with conn.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT {SELECT_COLUMNS}
+                FROM mycheff.user_activities
+                WHERE created_at >= %s AND created_at < %s
+                  AND (created_at, id) > (%s, %s::uuid)
+                ORDER BY created_at, id
+                LIMIT %s
+            """, (since, until, after[0], after[1], batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                return None, 0
+
+            table = pa.Table.from_pylist([dict(zip(SCHEMA.names, row)) for row in rows], schema=SCHEMA)
+            first = rows[0]
+            name = f"part-{first[7].strftime('%Y%m%dT%H%M%S%f')}-{first[0][:8]}.parquet"
+            path = os.path.join(month_dir, name)
+            pq.write_table(table, path + '.tmp', compression='zstd')
+            os.replace(path + '.tmp', path)
+
+            cursor.execute(
+                "DELETE FROM mycheff.user_activities WHERE id = ANY(%s::uuid[])",
+                ([row[0] for row in rows],),
+            )
+    last = rows[-1]
+    return (last[7], last[0]), len(rows)
+
+
+def read_activities(start, end, columns=None, user_id=None, activity_type=None, archive_dir=ARCHIVE_DIR):
+    """Events in [start, end) from the Parquet archive and the hot table as one Arrow table."""
+    columns = columns or SCHEMA.names
+    read_columns = columns if 'id' in columns else ['id'] + list(columns)
+    archived = SCHEMA.empty_table().select(read_columns)
+
+    if os.path.isdir(archive_dir):
+        dataset = ds.dataset(
+            archive_dir,
+            format='parquet',
+            schema=SCHEMA.append(pa.field('month', pa.string())),
+            partitioning=ds.partitioning(pa.schema([('month', pa.string())]), flavor='hive'),
+        )
+        # The month directories prune files, row group statistics do the rest
+        condition = (
+            (ds.field('month') >= f"{start:%Y-%m}") & (ds.field('month') <= f"{end:%Y-%m}")
+            & (ds.field('created_at') >= pa.scalar(start, pa.timestamp('us', tz='UTC')))
+            & (ds.field('created_at') < pa.scalar(end, pa.timestamp('us', tz='UTC')))
+        )
+        if user_id:
+            condition &= ds.field('user_id') == user_id
+        if activity_type:
+            condition &= ds.field('activity_type') == activity_type
+        archived = dataset.to_table(columns=read_columns, filter=condition)
+
+    conn = connect()
+    try:
+        with conn.cursor() as cursor:
+            # COPY writes timestamps in the session time zone, keep them in UTC like main()
+            cursor.execute("SET TIME ZONE 'UTC'")
+            query = cursor.mogrify(f"""
+                SELECT {SELECT_COLUMNS}
+                FROM mycheff.user_activities
+                WHERE created_at >= %s AND created_at < %s
+                  AND (%s::uuid IS NULL OR user_id = %s::uuid)
+                  AND (%s::text IS NULL OR activity_type = %s)
+            """, (start, end, user_id, user_id, activity_type, activity_type)).decode('utf-8')
+            buffer = io.BytesIO()
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)", buffer)
+    finally:
+        conn.close()
+
+    buffer.seek(0)
+    # COPY writes NULL unquoted and '' quoted, so only the former becomes null
+    convert_options = pa_csv.ConvertOptions(
+        column_types=SCHEMA,
+        strings_can_be_null=True,
+        quoted_strings_can_be_null=False,
+    )
+    hot = pa_csv.read_csv(buffer, convert_options=convert_options).select(read_columns)
+    # A batch archived while this ran can show up on both sides
+    hot = hot.filter(pc.invert(pc.is_in(hot.column('id'), value_set=archived.column('id'))))
+
+    return pa.concat_tables([archived, hot.cast(archived.schema)]).select(columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Archive old user_activities to monthly Parquet files')
+    parser.add_argument('--retention-days', type=int, default=RETENTION_DAYS)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--archive-dir', default=ARCHIVE_DIR)
+    parser.add_argument('--dry-run', action='store_true', help='only report what would be archived')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=args.retention_days)
+    conn = connect()
+    try:
+        with conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SET TIME ZONE 'UTC'")
+                cursor.execute(
+                    "SELECT MIN(created_at), COUNT(*) FROM mycheff.user_activities WHERE created_at < %s",
+                    (cutoff,),
+                )
+                oldest, expired = cursor.fetchone()
+        print(f"🗄️  {expired} activities older than {cutoff:%Y-%m-%d} (retention {args.retention_days} days)")
+        if not expired or args.dry_run:
+            return
+
+        archived = 0
+        month = month_start(oldest.astimezone(timezone.utc))
+        while month < cutoff:
+            until = min(next_month(month), cutoff)
+            month_dir = os.path.join(args.archive_dir, f"month={month:%Y-%m}")
+            os.makedirs(month_dir, exist_ok=True)
+
+            after = (month - timedelta(microseconds=1), '00000000-0000-0000-0000-000000000000')
+            month_rows = 0
+            while True:
+                after, count = archive_batch(conn, month_dir, month, until, after, args.batch_size)
+                if not count:
+                    break
+                month_rows += count
+            if month_rows:
+                print(f"   {month:%Y-%m}: {month_rows} events archived")
+            archived += month_rows
+            month = next_month(month)
+    finally:
+        conn.close()
+
+    print(f"✅ Archived {archived} activities to {args.archive_dir} in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Long-running worker that batches activity events into mycheff.user_activities.
+
+Producers send one JSON event per line, either over a Unix socket (the NestJS
+API, see ActivityIngestService) or by LPUSHing onto a Redis list. Events are
+buffered and written with COPY whenever BATCH_SIZE events are waiting or the
+oldest one has waited FLUSH_INTERVAL seconds.
+
+Delivery is at-least-once: a socket producer only forgets an event after the
+worker answers "ok <id>" for it, which happens after the batch commits, and a
+Redis event stays on a per-worker processing list until then. Redelivered
+events carry the same id and are dropped by ON CONFLICT (id), so retries never
+double count. Events sent without an id get one derived from their payload,
+so a redelivered copy still collides.
+
+Backpressure: once MAX_BUFFER events are waiting for a flush the worker stops
+reading sockets and popping Redis until the flush drains the buffer, and a
+failing database is retried with backoff while holding the batch. A stop
+signal ends the retries; the unwritten events stay unacked (or on the Redis
+processing list) and are redelivered to the next worker.
+
+Usage:
+    python -m jobs.activity_ingest [--socket PATH] [--redis] [--batch-size 1000]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import signal
+import socket
+import time
+import uuid
+from datetime import datetime, timezone
+
+from jobs.db import connect, copy_rows
+
+BATCH_SIZE = 1000
+FLUSH_INTERVAL = 1.0
+MAX_BUFFER = 10000
+MAX_BACKOFF = 30.0
+SOCKET_PATH = os.environ.get('ACTIVITY_INGEST_SOCKET', '/tmp/mycheff-activity.sock')
+REDIS_QUEUE = 'mycheff:activity-events'
+# Namespace for ids derived from the payload of events sent without one
+EVENT_NAMESPACE = uuid.UUID('6f1c2b0e-4d8a-5b7e-9c3f-2a1d0e8b7c64')
+
+COLUMNS = ['id', 'user_id', 'activity_type', 'recipe_id', 'metadata', 'ip_address', 'user_agent', 'created_at']
+
+
+def parse_event(line):
+    """Validate one JSON event and return it as a user_activities row tuple."""
+    event = json.loads(line)
+    if not event.get('userId') or not event.get('activityType'):
+        raise ValueError('userId and activityType are required')
+
+    if event.get('id'):
+        event_id = str(uuid.UUID(event['id']))
+    else:
+        raw = (line if isinstance(line, bytes) else line.encode('utf-8')).strip()
+        event_id = str(uuid.uuid5(EVENT_NAMESPACE, hashlib.sha256(raw).hexdigest()))
+    recipe_id = str(uuid.UUID(event['recipeId'])) if event.get('recipeId') else None
+    created_at = event.get('createdAt') or datetime.now(timezone.utc).isoformat()
+    # Reject bad timestamps here; a COPY error would fail the whole batch
+    datetime.fromisoformat(str(created_at).replace('Z', '+00:00'))
+    return event_id, (
+        event_id,
+        str(uuid.UUID(event['userId'])),
+        str(event['activityType'])[:50],
+        recipe_id,
+        json.dumps(event['metadata']) if event.get('metadata') is not None else None,
+        (event.get('ipAddress') or '')[:45] or None,
+        (event.get('userAgent') or '')[:500] or None,
+        created_at,
+    )
+
+
+class BatchWriter:
+    """Holds one database connection and writes batches through a staging table."""
+
+    def __init__(self):
+        self.conn = None
+
+    def write(self, rows):
+        if self.conn is None or self.conn.closed:
+            self.conn = connect()
+        try:
+            with self.conn:
+                with self.conn.cursor() as cursor:
+                    cursor.execute("""
+                        CREATE TEMP TABLE IF NOT EXISTS activity_ingest_batch
+                        (LIKE mycheff.user_activities INCLUDING DEFAULTS) ON COMMIT DELETE ROWS
+                    """)
+                    copy_rows(cursor, 'activity_ingest_batch', COLUMNS, rows)
+                    # Unknown users would fail the whole batch on the foreign key,
+                    # so they are skipped; deleted recipes become NULL like ON DELETE SET NULL
+                    cursor.execute(f"""
+                        INSERT INTO mycheff.user_activities ({', '.join(COLUMNS)})
+                        SELECT b.id, b.user_id, b.activity_type, r.id, b.metadata, b.ip_address, b.user_agent, b.created_at
+                        FROM activity_ingest_batch b
+                        JOIN mycheff.users u ON u.id = b.user_id
+                        LEFT JOIN mycheff.recipes r ON r.id = b.recipe_id
+                        ON CONFLICT (id) DO NOTHING
+                    """)
+                    return cursor.rowcount
+        except Exception:
+            self.conn.close()
+            raise
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+
+
+class IngestBuffer:
+    def __init__(self, batch_size, flush_interval, max_buffer, on_batch=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.on_batch = on_batch
+        # (row or None for a rejected event, on_written callback or None)
+        self.pending = []
+        self.oldest = None
+        self.not_full = asyncio.Event()
+        self.not_full.set()
+        self.wakeup = asyncio.Event()
+        self.drained = asyncio.Event()
+        self.writer = BatchWriter()
+        self.written = 0
+        self.batches = 0
+        self.started = time.perf_counter()
+
+    async def add(self, row, on_written=None):
+        # Backpressure: producers wait here while a full buffer drains
+        await self.not_full.wait()
+        if not self.pending:
+            self.oldest = time.monotonic()
+        self.pending.append((row, on_written))
+        if len(self.pending) >= self.max_buffer:
+            self.not_full.clear()
+        if len(self.pending) >= self.batch_size:
+            self.wakeup.set()
+
+    async def run(self, stopping):
+        while not (stopping.is_set() and not self.pending):
+            timeout = self.flush_interval
+            if self.oldest is not None:
+                timeout = max(0.0, self.oldest + self.flush_interval - time.monotonic())
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+
+            if self.pending and not await self.flush(stopping):
+                print(f"⚠️  Stopping with {len(self.pending)} unwritten events left unacked for redelivery")
+                break
+        self.writer.close()
+        # Producers still waiting on a full buffer must not block shutdown
+        self.not_full.set()
+        self.drained.set()
+
+    async def flush(self, stopping):
+        """Write the next batch; False when the database failed after the stop signal."""
+        batch = self.pending[:self.batch_size]
+        rows = [row for row, _ in batch if row is not None]
+
+        inserted = 0
+        backoff = 0.5
+        while rows:
+            try:
+                inserted = await asyncio.get_running_loop().run_in_executor(None, self.writer.write, rows)
+                break
+            except Exception as error:
+                if stopping.is_set():
+                    print(f"❌ Flush of {len(rows)} events failed while stopping: {error}")
+                    return False
+                print(f"❌ Flush of {len(rows)} events failed, retrying in {backoff:.1f}s: {error}")
+                # A stop signal cuts the wait short for one last attempt
+                try:
+                    await asyncio.wait_for(stopping.wait(), backoff)
+                except asyncio.TimeoutError:
+                    pass
+                backoff = min(backoff * 2, MAX_BACKOFF)
+
+        del self.pending[:len(batch)]
+        self.oldest = time.monotonic() if self.pending else None
+        if len(self.pending) < self.max_buffer:
+            self.not_full.set()
+        if len(self.pending) >= self.batch_size:
+            self.wakeup.set()
+
+        for _, on_written in batch:
+            if on_written:
+                on_written()
+        if self.on_batch:
+            self.on_batch(len(batch))
+
+        self.written += inserted
+        self.batches += 1
+        elapsed = time.perf_counter() - self.started
+        print(f"📥 Batch {self.batches}: {inserted}/{len(batch)} events written "
+              f"({self.written / elapsed:.0f} events/s overall)")
+        return True
+
+
+async def serve_socket(buffer, path, stopping):
+    if os.path.exists(path):
+        os.unlink(path)
+
+    async def handle(reader, writer):
+        def ack(reply):
+            if not writer.is_closing():
+                writer.write(reply.encode('utf-8'))
+
+        try:
+            while not stopping.is_set():
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    event_id, row = parse_event(line)
+                except (ValueError, TypeError, KeyError, AttributeError) as error:
+                    ack(f"err {_event_id(line)} {error}\n")
+                    continue
+                await buffer.add(row, lambda event_id=event_id: ack(f"ok {event_id}\n"))
+        finally:
+            writer.close()
+
+    server = await asyncio.start_unix_server(handle, path=path, limit=1024 * 1024)
+    os.chmod(path, 0o660)
+    print(f"🔌 Listening for activity events on {path}")
+    async with server:
+        await stopping.wait()
+
+
+class RedisSource:
+    """Reliable-queue consumer: BLMOVE onto a per-worker processing list, trim after commit."""
+
+    def __init__(self):
+        self.acked = 0
+
+    def ack_batch(self, count):
+        self.acked += count
+
+    async def trim(self, client, processing):
+        if self.acked:
+            # The processing list holds popped events newest-first, so the
+            # flushed ones are the `count` rightmost items
+            count, self.acked = self.acked, 0
+            await client.ltrim(processing, 0, -(count + 1))
+
+    async def consume(self, buffer, stopping):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise SystemExit('The Redis source needs the redis package: pip install redis')
+
+        client = redis.Redis(
+            host=os.environ.get('REDIS_HOST', 'localhost'),
+            port=int(os.environ.get('REDIS_PORT', '6379')),
+            password=os.environ.get('REDIS_PASSWORD') or None,
+        )
+        prefix = f"{REDIS_QUEUE}:processing:{socket.gethostname()}:"
+        processing = f"{prefix}{os.getpid()}"
+
+        # Requeue what workers of this host left behind when they died mid-batch
+        for stale in await client.keys(f"{prefix}*"):
+            if not _process_alive(int(stale.decode('utf-8').rsplit(':', 1)[1])):
+                while await client.lmove(stale, REDIS_QUEUE, 'RIGHT', 'LEFT'):
+                    pass
+
+        print(f"🔌 Consuming activity events from Redis list {REDIS_QUEUE}")
+        while not stopping.is_set():
+            await self.trim(client, processing)
+            raw = await client.blmove(REDIS_QUEUE, processing, 1, 'RIGHT', 'LEFT')
+            if raw is None:
+                continue
+            try:
+                _, row = parse_event(raw)
+            except (ValueError, TypeError, KeyError, AttributeError) as error:
+                print(f"⚠️  Dropping invalid event: {error}")
+                # Still buffered as a placeholder so trims stay aligned
+                row = None
+            await buffer.add(row)
+
+        # Batches flushed after the stop signal still need their trim
+        await buffer.drained.wait()
+        await self.trim(client, processing)
+        await client.aclose()
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _event_id(line):
+    try:
+        return json.loads(line).get('id') or '-'
+    except (ValueError, AttributeError):
+        return '-'
+
+
+async def main_async(args):
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    if args.redis:
+        redis_source = RedisSource()
+        buffer = IngestBuffer(args.batch_size, args.flush_interval, args.max_buffer, redis_source.ack_batch)
+        source = redis_source.consume(buffer, stopping)
+    else:
+        buffer = IngestBuffer(args.batch_size, args.flush_interval, args.max_buffer)
+        source = serve_socket(buffer, args.socket, stopping)
+    await asyncio.gather(source, buffer.run(stopping))
+    print(f"✅ Stopped after writing {buffer.written} events in {buffer.batches} batches")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch activity events into user_activities with COPY')
+    parser.add_argument('--socket', default=SOCKET_PATH, help='Unix socket to listen on')
+    parser.add_argument('--redis', action='store_true', help=f'consume the Redis list {REDIS_QUEUE} instead')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--flush-interval', type=float, default=FLUSH_INTERVAL, help='seconds')
+    parser.add_argument('--max-buffer', type=int, default=MAX_BUFFER)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Maintain the hourly and daily rollups of mycheff.user_activities.
+
+Each run scans only raw events from the hour containing (watermark - lateness)
+onwards and rebuilds those hourly buckets in place, so re-running is idempotent
+and events committed up to LATENESS late are still counted. Daily rows for the
+touched days are then rebuilt from the hourly tables, never from raw events.
+Distinct user counts come from the per-user rollups, so they stay exact.
+
+Distinct users per day, activity type and recipe are also kept as HyperLogLog
+sketches (mycheff.activity_user_sketches) so week and month uniques can be
+merged from day sketches. Adding a user to a sketch twice changes nothing, so
+the rescanned window is simply merged into the stored sketches.
+
+The watermark lives in mycheff.aggregation_watermarks and is locked for the
+duration of a run, so overlapping runs serialize instead of double counting.
+
+Usage:
+    python -m jobs.activity_rollups [--full] [--lateness-minutes 10] [--hll-error 0.02]
+"""
+import argparse
+import time
+from datetime import timedelta
+
+import numpy as np
+
+from jobs import hll
+from jobs.db import connect, copy_rows
+
+WATERMARK = 'user_activities_rollups'
+LATENESS_MINUTES = 10
+HLL_ERROR = 0.02
+
+# Hourly tables read raw events; the per-type table reads the per-user one
+HOURLY_SQL = [
+    ("mycheff.user_activity_hourly", """
+        INSERT INTO mycheff.user_activity_hourly (bucket_start, user_id, activity_type, event_count)
+        SELECT date_trunc('hour', created_at), user_id, activity_type, COUNT(*)
+        FROM mycheff.user_activities
+        WHERE created_at >= %(since)s AND created_at < %(until)s
+        GROUP BY 1, 2, 3
+    """),
+    ("mycheff.recipe_activity_hourly", """
+        INSERT INTO mycheff.recipe_activity_hourly (bucket_start, recipe_id, activity_type, event_count, unique_users)
+        SELECT date_trunc('hour', created_at), recipe_id, activity_type, COUNT(*), COUNT(DISTINCT user_id)
+        FROM mycheff.user_activities
+        WHERE created_at >= %(since)s AND created_at < %(until)s
+          AND recipe_id IS NOT NULL
+        GROUP BY 1, 2, 3
+    """),
+    ("mycheff.activity_type_hourly", """
+        INSERT INTO mycheff.activity_type_hourly (bucket_start, activity_type, event_count, unique_users)
+        SELECT bucket_start, COALESCE(activity_type, '*'), SUM(event_count), COUNT(DISTINCT user_id)
+        FROM mycheff.user_activity_hourly
+        WHERE bucket_start >= %(since)s
+        GROUP BY GROUPING SETS ((bucket_start, activity_type), (bucket_start))
+    """),
+]
+
+DAILY_SQL = [
+    ("mycheff.user_activity_daily", """
+        INSERT INTO mycheff.user_activity_daily (day, user_id, activity_type, event_count)
+        SELECT (bucket_start AT TIME ZONE 'UTC')::date, user_id, activity_type, SUM(event_count)
+        FROM mycheff.user_activity_hourly
+        WHERE bucket_start >= %(since_day)s::timestamp AT TIME ZONE 'UTC'
+        GROUP BY 1, 2, 3
+    """),
+    ("mycheff.recipe_activity_daily", """
+        INSERT INTO mycheff.recipe_activity_daily (day, recipe_id, activity_type, event_count)
+        SELECT (bucket_start AT TIME ZONE 'UTC')::date, recipe_id, activity_type, SUM(event_count)
+        FROM mycheff.recipe_activity_hourly
+        WHERE bucket_start >= %(since_day)s::timestamp AT TIME ZONE 'UTC'
+        GROUP BY 1, 2, 3
+    """),
+    ("mycheff.activity_type_daily", """
+        INSERT INTO mycheff.activity_type_daily (day, activity_type, event_count, unique_users)
+        SELECT day, COALESCE(activity_type, '*'), SUM(event_count), COUNT(DISTINCT user_id)
+        FROM mycheff.user_activity_daily
+        WHERE day >= %(since_day)s
+        GROUP BY GROUPING SETS ((day, activity_type), (day))
+    """),
+]
+
+
+def lock_watermark(cursor):
+    cursor.execute("""
+        INSERT INTO mycheff.aggregation_watermarks (name) VALUES (%s)
+        ON CONFLICT (name) DO NOTHING
+    """, (WATERMARK,))
+    cursor.execute(
+        "SELECT watermark FROM mycheff.aggregation_watermarks WHERE name = %s FOR UPDATE",
+        (WATERMARK,),
+    )
+    return cursor.fetchone()[0]
+
+
+def update_sketches(cursor, since, until, precision, full):
+    """Merge the users seen in [since, until) into the day sketches they belong to."""
+    since_day = since.date()
+    if full:
+        cursor.execute("DELETE FROM mycheff.activity_user_sketches WHERE day >= %s", (since_day,))
+
+    written = 0
+    day = since_day
+    while day <= until.date():
+        cursor.execute("""
+            SELECT DISTINCT activity_type, recipe_id::text, user_id::text
+            FROM mycheff.user_activities
+            WHERE created_at >= GREATEST(%s, %s::date::timestamptz)
+              AND created_at < LEAST(%s, (%s::date + 1)::timestamptz)
+        """, (since, day, until, day))
+        rows = cursor.fetchall()
+        day_written = _merge_day_sketches(cursor, day, rows, precision) if rows else 0
+        written += day_written
+        day += timedelta(days=1)
+    return written
+
+
+def _merge_day_sketches(cursor, day, rows, precision):
+    keys = {}
+    groups = []
+    users = []
+    for activity_type, recipe_id, user_id in rows:
+        scopes = [('all', '*'), ('type', activity_type)]
+        if recipe_id:
+            scopes.append(('recipe', recipe_id))
+        for scope in scopes:
+            groups.append(keys.setdefault(scope, len(keys)))
+            users.append(user_id)
+
+    unique_users = sorted(set(users))
+    user_hashes = dict(zip(unique_users, hll.hash_values(unique_users)))
+    hashes = np.array([user_hashes[user] for user in users], dtype=np.uint64)
+    registers = hll.build_sketches(groups, hashes, len(keys), precision)
+
+    cursor.execute("""
+        SELECT scope, scope_key, precision, registers
+        FROM mycheff.activity_user_sketches
+        WHERE day = %s
+    """, (day,))
+    for scope, scope_key, stored_precision, blob in cursor.fetchall():
+        group = keys.get((scope, scope_key))
+        if group is None:
+            continue
+        if stored_precision != precision:
+            raise SystemExit(
+                f'{day} sketches use precision {stored_precision}, not {precision}; rerun with --full'
+            )
+        registers[group] = hll.merge(registers[group], hll.decode(blob, precision))
+
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS activity_sketch_batch
+        (LIKE mycheff.activity_user_sketches) ON COMMIT DROP
+    """)
+    cursor.execute("TRUNCATE activity_sketch_batch")
+    copy_rows(
+        cursor,
+        'activity_sketch_batch',
+        ['day', 'scope', 'scope_key', 'precision', 'registers'],
+        (
+            (day, scope, scope_key, precision, '\\x' + hll.encode(registers[group]).hex())
+            for (scope, scope_key), group in keys.items()
+        ),
+    )
+    cursor.execute("""
+        INSERT INTO mycheff.activity_user_sketches (day, scope, scope_key, precision, registers)
+        SELECT day, scope, scope_key, precision, registers FROM activity_sketch_batch
+        ON CONFLICT (day, scope, scope_key) DO UPDATE
+        SET precision = EXCLUDED.precision, registers = EXCLUDED.registers
+    """)
+    return len(keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Roll user_activities up into hourly and daily tables')
+    parser.add_argument('--full', action='store_true', help='rebuild every bucket from the first event')
+    parser.add_argument('--lateness-minutes', type=int, default=LATENESS_MINUTES,
+                        help='how late an event may be committed and still be counted')
+    parser.add_argument('--hll-error', type=float, default=HLL_ERROR,
+                        help='target standard error of distinct user sketches (changing it needs --full)')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    conn = connect()
+    try:
+        with conn:
+            with conn.cursor() as cursor:
+                # Hour and day buckets are UTC regardless of the server setting
+                cursor.execute("SET LOCAL TIME ZONE 'UTC'")
+                watermark = lock_watermark(cursor)
+                if args.full:
+                    watermark = None
+
+                cursor.execute("""
+                    SELECT
+                        date_trunc('hour', COALESCE(%s::timestamptz - make_interval(mins => %s), MIN(created_at), now())),
+                        now()
+                    FROM mycheff.user_activities
+                """, (watermark, args.lateness_minutes))
+                since, until = cursor.fetchone()
+                cursor.execute("SELECT (%s AT TIME ZONE 'UTC')::date", (since,))
+                since_day = cursor.fetchone()[0]
+                params = {'since': since, 'until': until, 'since_day': since_day}
+                print(f"📊 Rolling up activities since {since.isoformat()} (watermark {watermark})")
+
+                for table, insert_sql in HOURLY_SQL:
+                    cursor.execute(f"DELETE FROM {table} WHERE bucket_start >= %(since)s", params)
+                    cursor.execute(insert_sql, params)
+                    print(f"   {table}: {cursor.rowcount} rows")
+
+                for table, insert_sql in DAILY_SQL:
+                    cursor.execute(f"DELETE FROM {table} WHERE day >= %(since_day)s", params)
+                    cursor.execute(insert_sql, params)
+                    print(f"   {table}: {cursor.rowcount} rows")
+
+                precision = hll.precision_for_error(args.hll_error)
+                sketches = update_sketches(cursor, since, until, precision, args.full)
+                print(f"   mycheff.activity_user_sketches: {sketches} sketches merged (precision {precision})")
+
+                cursor.execute("""
+                    UPDATE mycheff.aggregation_watermarks
+                    SET watermark = %s, updated_at = CURRENT_TIMESTAMP
+                    WHERE name = %s
+                """, (until, WATERMARK))
+    finally:
+        conn.close()
+
+    print(f"✅ Activity rollups updated in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Shared database helpers for MyCheff batch jobs."""
+import io
+import os
+
+import psycopg2
+
+
+def connect():
+    """Open a connection using the same DATABASE_* variables as the NestJS API."""
+    return psycopg2.connect(
+        host=os.environ.get('DATABASE_HOST', 'localhost'),
+        port=os.environ.get('DATABASE_PORT', '5432'),
+        dbname=os.environ.get('DATABASE_NAME', 'postgres'),
+        user=os.environ.get('DATABASE_USERNAME', 'postgres'),
+        password=os.environ.get('DATABASE_PASSWORD', '123'),
+    )
+
+
+def copy_rows(cursor, table, columns, rows):
+    """Bulk load an iterable of tuples into `table` with COPY ... FROM STDIN."""
+    buffer = io.StringIO()
+    count = 0
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(value) for value in row))
+        buffer.write('\n')
+        count += 1
+
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT text)",
+        buffer,
+    )
+    return count
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    text = str(value)
+    return (
+        text.replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
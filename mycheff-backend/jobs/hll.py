@@ -0,0 +1,97 @@
+"""
+HyperLogLog sketches for distinct user counts.
+
+A sketch is 2**precision one-byte registers, stored zlib-compressed (sparse
+per-recipe sketches shrink to a few dozen bytes). Sketches of the same
+precision merge by taking the register-wise maximum, so day sketches combine
+into week or month counts without revisiting events. The NestJS side merges and
+estimates with src/common/utils/hyperloglog.util.ts, which must keep the same
+layout: register index = top `precision` bits of a 64-bit hash, value = rank
+of the first set bit in the remaining bits.
+"""
+import hashlib
+import math
+import zlib
+
+import numpy as np
+
+MIN_PRECISION = 4
+MAX_PRECISION = 16
+
+
+def precision_for_error(error):
+    """Smallest precision whose standard error 1.04 / sqrt(2**p) is within `error`."""
+    precision = math.ceil(math.log2((1.04 / error) ** 2))
+    return max(MIN_PRECISION, min(MAX_PRECISION, precision))
+
+
+def hash_values(values):
+    """64-bit hashes of string values as a uint64 array."""
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big') for value in values),
+        dtype=np.uint64,
+        count=len(values),
+    )
+
+
+def build_sketches(groups, hashes, group_count, precision):
+    """Registers for `group_count` sketches; `groups[i]` is the sketch `hashes[i]` goes into."""
+    remaining_bits = 64 - precision
+    index = (hashes >> np.uint64(remaining_bits)).astype(np.int64)
+    rest = hashes & np.uint64((1 << remaining_bits) - 1)
+
+    # Rank = leading zeros of `rest` within remaining_bits, plus one. The float
+    # log2 can round up just below a power of two, so correct it exactly.
+    bit_length = np.zeros(len(rest), dtype=np.int64)
+    nonzero = rest > 0
+    bit_length[nonzero] = np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.int64) + 1
+    too_long = nonzero & (np.left_shift(np.uint64(1), (bit_length - 1).clip(0).astype(np.uint64)) > rest)
+    bit_length[too_long] -= 1
+    rank = (remaining_bits - bit_length + 1).astype(np.uint8)
+
+    registers = np.zeros((group_count, 1 << precision), dtype=np.uint8)
+    np.maximum.at(registers, (np.asarray(groups, dtype=np.int64), index), rank)
+    return registers
+
+
+def encode(registers):
+    return zlib.compress(registers.tobytes(), 6)
+
+
+def decode(blob, precision):
+    registers = np.frombuffer(zlib.decompress(bytes(blob)), dtype=np.uint8)
+    if len(registers) != 1 << precision:
+        raise ValueError(f'sketch has {len(registers)} registers, expected {1 << precision}')
+    return registers
+
+
+def merge(*register_arrays):
+    return np.maximum.reduce(register_arrays)
+
+
+def fold(registers, precision, target_precision):
+    """The same sketch at a lower precision; mirrors foldRegisters in hyperloglog.util.ts."""
+    if precision == target_precision:
+        return registers
+    shift = precision - target_precision
+    # The dropped index bits become the leading bits of the rank: a non-zero
+    # remainder fixes the rank, otherwise it grows by their count
+    index = np.flatnonzero(registers)
+    remainder = index & ((1 << shift) - 1)
+    remainder_rank = shift - np.floor(np.log2(np.maximum(remainder, 1))).astype(np.int64)
+    rank = np.where(remainder > 0, remainder_rank, shift + registers[index].astype(np.int64))
+
+    folded = np.zeros(1 << target_precision, dtype=np.uint8)
+    np.maximum.at(folded, index >> shift, rank.astype(np.uint8))
+    return folded
+
+
+def estimate(registers):
+    m = len(registers)
+    alpha = 0.673 if m == 16 else 0.697 if m == 32 else 0.709 if m == 64 else 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.sum(np.power(2.0, -registers.astype(np.float64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    # Linear counting is more accurate while many registers are still empty
+    if raw <= 2.5 * m and zeros:
+        return m * math.log(m / zeros)
+    return raw
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Build resized WebP (and AVIF, when Pillow has an encoder) derivatives of recipe photos.
+
+Every recipe_media photo gets one file per width in WIDTHS that is not wider
+than the original, under uploads/variants/<media_id>/<width>.<format>, and the
+set is recorded in mycheff.recipe_media_variants together with the source URL
+it was built from. Decoding and encoding run in a process pool; the parent only
+talks to the database.
+
+Each photo's variants carry a build key: a hash of the photo's content (its
+content_hash, or the SHA-256 of a loose file, cached per size and mtime) and
+the widths and encoder settings. A backfill run only builds photos whose key
+changed, so an unchanged catalog costs one stat() per loose photo, and files
+overwritten in place (such as regenerated placeholders) are picked up. A photo
+whose URL changed but whose content did not, as after media_store --migrate,
+only has its variants relinked to the new URL. With --follow the job keeps running and LISTENs on
+recipe_media_changed (sent by a trigger on insert or URL change), with a
+periodic backfill pass to catch notifications sent while it was down.
+
+Usage:
+    python -m jobs.media_derivatives [--all] [--follow] [--workers N] [--prune]
+"""
+import argparse
+import hashlib
+import json
+import os
+import select
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse
+
+from PIL import Image, ImageOps, features
+
+from jobs.db import connect, copy_rows
+
+WIDTHS = (320, 640, 1024, 1600)
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+CHUNK_SIZE = 1024 * 1024
+CHANNEL = 'recipe_media_changed'
+POLL_INTERVAL = 60
+# Notifications arriving within this window are built together
+DEBOUNCE = 0.5
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UPLOADS_DIR = os.environ.get('MEDIA_UPLOADS_DIR', os.path.join(BACKEND_DIR, 'uploads'))
+# Seeded sample images live under public/uploads
+SOURCE_DIRS = (UPLOADS_DIR, os.path.join(BACKEND_DIR, 'public', 'uploads'))
+VARIANTS_DIR = os.path.join(UPLOADS_DIR, 'variants')
+
+MEDIA_SQL = """
+    SELECT rm.id::text, rm.recipe_id::text, rm.url, rm.content_hash, built.build_key, built.source_url
+    FROM mycheff.recipe_media rm
+    LEFT JOIN LATERAL (
+        SELECT MIN(v.build_key) AS build_key, MIN(v.source_url) AS source_url
+        FROM mycheff.recipe_media_variants v
+        WHERE v.media_id = rm.id
+    ) built ON true
+    WHERE rm.media_type IN ('photo', 'image')
+      AND (%(ids)s::uuid[] IS NULL OR rm.id = ANY(%(ids)s::uuid[]))
+"""
+
+
+# path -> (size, mtime_ns, sha256) of loose files hashed by this process
+_file_hashes = {}
+
+
+def available_formats():
+    formats = [('webp', 'WEBP', {'quality': WEBP_QUALITY, 'method': 4})]
+    if features.check('avif'):
+        formats.append(('avif', 'AVIF', {'quality': AVIF_QUALITY}))
+    else:
+        try:
+            import pillow_avif  # noqa: F401 - registers the AVIF plugin
+            formats.append(('avif', 'AVIF', {'quality': AVIF_QUALITY}))
+        except ImportError:
+            pass
+    return formats
+
+
+def source_path(url):
+    """Local file behind a /uploads/... URL, or None for anything else."""
+    path = urlparse(url).path
+    if not path.startswith('/uploads/'):
+        return None
+    relative = os.path.normpath(path[len('/uploads/'):])
+    if relative.startswith('..'):
+        return None
+    for directory in SOURCE_DIRS:
+        candidate = os.path.join(directory, relative)
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_key(content_hash, path):
+    """SHA-256 of the photo; loose files are only re-read when their size or mtime changes."""
+    if content_hash:
+        return content_hash
+    stat = os.stat(path)
+    cached = _file_hashes.get(path)
+    if cached is None or cached[:2] != (stat.st_size, stat.st_mtime_ns):
+        cached = (stat.st_size, stat.st_mtime_ns, hash_file(path))
+        _file_hashes[path] = cached
+    return cached[2]
+
+
+def build_key(content_hash, path, formats):
+    inputs = [content_key(content_hash, path), WIDTHS, [(extension, options) for extension, _, options in formats]]
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def target_widths(width):
+    widths = [w for w in WIDTHS if w <= width]
+    return widths or [width]
+
+
+def derive(job):
+    """Write every variant of one photo and return its recipe_media_variants rows."""
+    media_id, url, path, formats, key = job
+    out_dir = os.path.join(VARIANTS_DIR, media_id)
+    os.makedirs(out_dir, exist_ok=True)
+
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    rows, written = [], set()
+    for width in target_widths(image.width):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for extension, pil_format, options in formats:
+            name = f'{width}.{extension}'
+            target = os.path.join(out_dir, name)
+            resized.save(target + '.tmp', pil_format, **options)
+            os.replace(target + '.tmp', target)
+            written.add(name)
+            rows.append((
+                media_id, width, height, extension,
+                f'/uploads/variants/{media_id}/{name}',
+                os.path.getsize(target), url, key,
+            ))
+
+    # Widths or formats dropped since the last build
+    for name in os.listdir(out_dir):
+        if name not in written:
+            os.remove(os.path.join(out_dir, name))
+    return media_id, rows
+
+
+def build(conn, pool, formats, ids=None, rebuild_all=False):
+    with conn:
+        with conn.cursor() as cursor:
+            cursor.execute(MEDIA_SQL, {'ids': ids})
+            media = cursor.fetchall()
+
+    jobs, relinks, recipes, missing = [], [], {}, 0
+    for media_id, recipe_id, url, content_hash, built_key, built_source in media:
+        path = source_path(url)
+        if path is None:
+            missing += 1
+            continue
+        key = build_key(content_hash, path, formats)
+        recipes[media_id] = recipe_id
+        if key == built_key and not rebuild_all:
+            if built_source != url:
+                relinks.append((media_id, url))
+            continue
+        jobs.append((media_id, url, path, formats, key))
+    if missing:
+        print(f"⚠️  {missing} photos have no local source file, skipped")
+    if relinks:
+        print(f"🔗 Relinked variants of {relink(conn, relinks, recipes)} photos whose URL changed")
+    if not jobs:
+        return 0, 0
+
+    built, rows, failed = [], [], 0
+    futures = [pool.submit(derive, job) for job in jobs]
+    for job, future in zip(jobs, futures):
+        try:
+            media_id, media_rows = future.result()
+        except Exception as error:
+            failed += 1
+            print(f"❌ {job[0]} ({job[1]}): {error}")
+            continue
+        built.append(media_id)
+        rows.extend(media_rows)
+
+    with conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM mycheff.recipe_media_variants WHERE media_id = ANY(%s::uuid[])",
+                (built,),
+            )
+            # A photo deleted meanwhile would fail the foreign key
+            cursor.execute("""
+                CREATE TEMP TABLE variant_batch
+                (LIKE mycheff.recipe_media_variants INCLUDING DEFAULTS) ON COMMIT DROP
+            """)
+            copy_rows(
+                cursor,
+                'variant_batch',
+                ['media_id', 'width', 'height', 'format', 'url', 'bytes', 'source_url', 'build_key'],
+                rows,
+            )
+            cursor.execute("""
+                INSERT INTO mycheff.recipe_media_variants
+                    (media_id, width, height, format, url, bytes, source_url, build_key)
+                SELECT b.media_id, b.width, b.height, b.format, b.url, b.bytes, b.source_url, b.build_key
+                FROM variant_batch b
+                JOIN mycheff.recipe_media rm ON rm.id = b.media_id
+            """)
+            # Variants are not covered by the card triggers
+            cursor.execute(
+                "SELECT mycheff.refresh_recipe_cards(id) FROM unnest(%s::uuid[]) AS id",
+                (sorted({recipes[media_id] for media_id in built}),),
+            )
+    return len(built), failed
+
+
+def relink(conn, relinks, recipes):
+    """Point existing variants at the new URL of a photo whose content is unchanged."""
+    with conn:
+        with conn.cursor() as cursor:
+            # Skip photos whose URL changed again since we read it
+            cursor.execute("""
+                UPDATE mycheff.recipe_media_variants v
+                SET source_url = rm.url
+                FROM mycheff.recipe_media rm, unnest(%s::uuid[], %s::text[]) AS r(id, url)
+                WHERE v.media_id = r.id AND rm.id = r.id AND rm.url = r.url
+                RETURNING v.media_id::text
+            """, ([media_id for media_id, _ in relinks], [url for _, url in relinks]))
+            relinked = {row[0] for row in cursor.fetchall()}
+            cursor.execute(
+                "SELECT mycheff.refresh_recipe_cards(id) FROM unnest(%s::uuid[]) AS id",
+                (sorted({recipes[media_id] for media_id in relinked}),),
+            )
+    return len(relinked)
+
+
+def prune(conn):
+    """Remove variant directories of photos that no longer exist."""
+    if not os.path.isdir(VARIANTS_DIR):
+        return 0
+    with conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT id::text FROM mycheff.recipe_media")
+            existing = {row[0] for row in cursor.fetchall()}
+
+    removed = 0
+    for name in os.listdir(VARIANTS_DIR):
+        if name not in existing:
+            shutil.rmtree(os.path.join(VARIANTS_DIR, name), ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def wait_for_changes(listen_conn, timeout):
+    """Media ids notified within `timeout`, or None when it passed quietly."""
+    if select.select([listen_conn], [], [], timeout) == ([], [], []):
+        return None
+    ids = set()
+    while True:
+        listen_conn.poll()
+        while listen_conn.notifies:
+            ids.add(listen_conn.notifies.pop(0).payload)
+        if select.select([listen_conn], [], [], DEBOUNCE) == ([], [], []):
+            return sorted(ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build resized WebP/AVIF variants of recipe photos')
+    parser.add_argument('--all', action='store_true', help='rebuild variants that are already up to date')
+    parser.add_argument('--follow', action='store_true', help='keep running and build new uploads as they arrive')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--prune', action='store_true', help='delete variant files of removed photos')
+    args = parser.parse_args()
+
+    formats = available_formats()
+    print(f"🖼️  Formats: {', '.join(extension for extension, _, _ in formats)}; widths: {WIDTHS}")
+
+    conn = connect()
+    listen_conn = None
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            if args.follow:
+                # Listen before the first pass so nothing falls in between
+                listen_conn = connect()
+                listen_conn.autocommit = True
+                listen_conn.cursor().execute(f"LISTEN {CHANNEL}")
+
+            started = time.perf_counter()
+            built, failed = build(conn, pool, formats, rebuild_all=args.all)
+            print(f"✅ Built variants for {built} photos ({failed} failed) in {time.perf_counter() - started:.2f}s")
+            if args.prune:
+                print(f"🧹 Removed variants of {prune(conn)} deleted photos")
+
+            while args.follow:
+                ids = wait_for_changes(listen_conn, POLL_INTERVAL)
+                started = time.perf_counter()
+                built, failed = build(conn, pool, formats, ids=ids)
+                if built or failed:
+                    print(f"✅ Built variants for {built} photos ({failed} failed) "
+                          f"in {time.perf_counter() - started:.2f}s")
+    finally:
+        if listen_conn is not None:
+            listen_conn.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Measure recipe photos and store a placeholder for each in recipe_media.
+
+Every photo gets its width, height, byte size, dominant colour and a tiny WebP
+(LQIP, a few hundred bytes) that clients can show blurred while the real image
+loads. The row update refreshes the recipe's cards, which carry the values as
+imagePlaceholder. A trigger clears them when the URL changes, so each run only
+handles photos that are new or replaced.
+
+Decoding runs in a process pool; the parent only talks to the database.
+
+Usage:
+    python -m jobs.media_placeholders [--all] [--workers N]
+"""
+import argparse
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps
+
+from jobs.db import connect, copy_rows
+from jobs.media_derivatives import source_path
+
+LQIP_SIZE = 16
+LQIP_QUALITY = 40
+PALETTE_COLORS = 5
+BATCH_SIZE = 500
+
+MEDIA_SQL = """
+    SELECT id::text, url
+    FROM mycheff.recipe_media
+    WHERE media_type IN ('photo', 'image')
+      AND (%(all)s OR lqip IS NULL)
+    ORDER BY id
+"""
+
+
+def dominant_color(image):
+    """Most common colour of a small median-cut palette, as #rrggbb."""
+    small = image.convert('RGB')
+    small.thumbnail((64, 64))
+    quantized = small.quantize(colors=PALETTE_COLORS, method=Image.Quantize.MEDIANCUT)
+    palette = quantized.getpalette()
+    _, index = max(quantized.getcolors())
+    r, g, b = palette[index * 3:index * 3 + 3]
+    return f'#{r:02x}{g:02x}{b:02x}'
+
+
+def measure(job):
+    media_id, url, path = job
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original)
+        image.load()
+
+    lqip = image.convert('RGB')
+    lqip.thumbnail((LQIP_SIZE, LQIP_SIZE))
+    buffer = io.BytesIO()
+    lqip.save(buffer, 'WEBP', quality=LQIP_QUALITY)
+
+    return (
+        media_id, url, image.width, image.height, os.path.getsize(path),
+        dominant_color(image), '\\x' + buffer.getvalue().hex(),
+    )
+
+
+def store(conn, rows):
+    with conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                CREATE TEMP TABLE placeholder_batch (
+                    id UUID, url VARCHAR(255), width INTEGER, height INTEGER,
+                    bytes INTEGER, dominant_color CHAR(7), lqip BYTEA
+                ) ON COMMIT DROP
+            """)
+            copy_rows(
+                cursor,
+                'placeholder_batch',
+                ['id', 'url', 'width', 'height', 'bytes', 'dominant_color', 'lqip'],
+                rows,
+            )
+            # Skip rows whose file was replaced while we were decoding it
+            cursor.execute("""
+                UPDATE mycheff.recipe_media rm
+                SET width = b.width, height = b.height, bytes = b.bytes,
+                    dominant_color = b.dominant_color, lqip = b.lqip
+                FROM placeholder_batch b
+                WHERE rm.id = b.id AND rm.url = b.url
+            """)
+            return cursor.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure recipe photos and build LQIP placeholders')
+    parser.add_argument('--all', action='store_true', help='remeasure photos that already have a placeholder')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    conn = connect()
+    try:
+        with conn:
+            with conn.cursor() as cursor:
+                cursor.execute(MEDIA_SQL, {'all': args.all})
+                media = cursor.fetchall()
+
+        jobs = []
+        for media_id, url in media:
+            path = source_path(url)
+            if path is not None:
+                jobs.append((media_id, url, path))
+        print(f"🖼️  {len(media)} photos to measure, {len(media) - len(jobs)} without a local file")
+
+        updated, failed = 0, 0
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for start in range(0, len(jobs), BATCH_SIZE):
+                batch = jobs[start:start + BATCH_SIZE]
+                rows = []
+                for job, future in zip(batch, [pool.submit(measure, job) for job in batch]):
+                    try:
+                        rows.append(future.result())
+                    except Exception as error:
+                        failed += 1
+                        print(f"❌ {job[0]} ({job[1]}): {error}")
+                updated += store(conn, rows)
+    finally:
+        conn.close()
+
+    print(f"✅ Stored placeholders for {updated} photos ({failed} failed) in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
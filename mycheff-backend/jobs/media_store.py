@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Maintain the content-addressed media store under uploads/objects/.
+
+Files are stored once per SHA-256 of their content at
+objects/<hash[0:2]>/<hash[2:4]>/<hash><ext> and tracked in mycheff.media_objects,
+whose ref_count a trigger keeps in step with recipe_media.content_hash. The API
+writes new uploads there directly (src/common/utils/content-store.util.ts).
+
+--migrate moves recipe_media rows that still point at loose files into the
+store; identical files collapse into one object. --gc deletes objects nobody
+has referenced for the grace period, plus files on disk that have no row. An
+upload touches its object row before writing the file and holds that row until
+it links it, so GC and uploads never race on the same hash.
+
+Usage:
+    python -m jobs.media_store [--migrate] [--gc] [--recount] [--grace-hours 24] [--dry-run]
+"""
+import argparse
+import mimetypes
+import os
+import shutil
+import time
+from datetime import timedelta
+
+from jobs.db import connect
+from jobs.media_derivatives import UPLOADS_DIR, hash_file, source_path
+
+STORE_DIR = os.path.join(UPLOADS_DIR, 'objects')
+GRACE_HOURS = 24
+BATCH_SIZE = 200
+
+UNREFERENCED_SQL = """
+    SELECT hash FROM mycheff.media_objects
+    WHERE ref_count = 0 AND touched_at < CURRENT_TIMESTAMP - %s
+    ORDER BY touched_at
+    LIMIT %s
+    FOR UPDATE SKIP LOCKED
+"""
+
+
+def object_key(content_hash, extension):
+    return f'{content_hash[:2]}/{content_hash[2:4]}/{content_hash}{extension}'
+
+
+def object_url(content_hash, extension):
+    return f'/uploads/objects/{object_key(content_hash, extension)}'
+
+
+def put_object(cursor, path):
+    """Store one file and return (hash, extension, newly written)."""
+    content_hash = hash_file(path)
+    extension = os.path.splitext(path)[1].lower()
+    # Touching the row first keeps GC away from this hash until we commit
+    cursor.execute("""
+        INSERT INTO mycheff.media_objects (hash, extension, mime_type, bytes)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (hash) DO UPDATE SET touched_at = CURRENT_TIMESTAMP
+        RETURNING extension
+    """, (content_hash, extension, mimetypes.guess_type(path)[0], os.path.getsize(path)))
+    extension = cursor.fetchone()[0]
+
+    target = os.path.join(STORE_DIR, object_key(content_hash, extension))
+    if os.path.exists(target):
+        return content_hash, extension, False
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.copyfile(path, target + '.tmp')
+    os.replace(target + '.tmp', target)
+    return content_hash, extension, True
+
+
+def migrate(conn, delete_sources, dry_run):
+    with conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT id::text, url FROM mycheff.recipe_media WHERE content_hash IS NULL ORDER BY id")
+            media = cursor.fetchall()
+
+    moved, stored, missing, stored_bytes, total_bytes = 0, 0, 0, 0, 0
+    sources = set()
+    for start in range(0, len(media), BATCH_SIZE):
+        with conn:
+            with conn.cursor() as cursor:
+                for media_id, url in media[start:start + BATCH_SIZE]:
+                    path = source_path(url)
+                    if path is None:
+                        missing += 1
+                        continue
+                    total_bytes += os.path.getsize(path)
+                    if dry_run:
+                        continue
+
+                    content_hash, extension, written = put_object(cursor, path)
+                    # Hash first, then URL: with the hash unchanged across the URL
+                    # update, the row keeps its placeholder and variants
+                    cursor.execute(
+                        "UPDATE mycheff.recipe_media SET content_hash = %s WHERE id = %s",
+                        (content_hash, media_id),
+                    )
+                    cursor.execute(
+                        "UPDATE mycheff.recipe_media SET url = %s WHERE id = %s",
+                        (object_url(content_hash, extension), media_id),
+                    )
+                    moved += 1
+                    sources.add(path)
+                    if written:
+                        stored += 1
+                        stored_bytes += os.path.getsize(path)
+
+    # Only loose uploads; seeded samples under public/ are served on their own
+    removed = 0
+    if delete_sources:
+        for path in sources:
+            if path.startswith(UPLOADS_DIR + os.sep) and not path.startswith(STORE_DIR + os.sep):
+                os.remove(path)
+                removed += 1
+
+    print(f"📦 {len(media)} media rows outside the store, {missing} without a local file")
+    if dry_run:
+        print(f"   would move {total_bytes / 1024 / 1024:.1f} MB")
+    else:
+        print(f"   moved {moved} rows into {stored} new objects "
+              f"({stored_bytes / 1024 / 1024:.1f} MB stored of {total_bytes / 1024 / 1024:.1f} MB), "
+              f"removed {removed} source files")
+
+
+def recount(conn):
+    with conn:
+        with conn.cursor() as cursor:
+            # Block recipe_media writes so the counts cannot go stale under us
+            cursor.execute("LOCK TABLE mycheff.recipe_media IN SHARE MODE")
+            cursor.execute("""
+                UPDATE mycheff.media_objects o
+                SET ref_count = refs.count,
+                    touched_at = CURRENT_TIMESTAMP
+                FROM (
+                    SELECT mo.hash, COUNT(rm.id) AS count
+                    FROM mycheff.media_objects mo
+                    LEFT JOIN mycheff.recipe_media rm ON rm.content_hash = mo.hash
+                    GROUP BY mo.hash
+                ) refs
+                WHERE o.hash = refs.hash AND o.ref_count <> refs.count
+            """)
+            print(f"🔢 Fixed {cursor.rowcount} reference counts")
+
+
+def collect_garbage(conn, grace, dry_run):
+    deleted, freed = 0, 0
+    while True:
+        with conn:
+            with conn.cursor() as cursor:
+                if dry_run:
+                    cursor.execute(f"""
+                        SELECT hash, extension, bytes FROM mycheff.media_objects
+                        WHERE hash IN ({UNREFERENCED_SQL})
+                    """, (grace, BATCH_SIZE))
+                else:
+                    cursor.execute(f"""
+                        DELETE FROM mycheff.media_objects
+                        WHERE hash IN ({UNREFERENCED_SQL})
+                        RETURNING hash, extension, bytes
+                    """, (grace, BATCH_SIZE))
+                rows = cursor.fetchall()
+                # Unlink while the rows are still locked, before the delete commits
+                for content_hash, extension, size in rows:
+                    if not dry_run:
+                        try:
+                            os.remove(os.path.join(STORE_DIR, object_key(content_hash, extension)))
+                        except FileNotFoundError:
+                            pass
+                    freed += size
+                deleted += len(rows)
+        if dry_run or len(rows) < BATCH_SIZE:
+            break
+
+    # Files without a row: interrupted writes and rows deleted by hand
+    with conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT hash FROM mycheff.media_objects")
+            known = {row[0] for row in cursor.fetchall()}
+    orphans = 0
+    cutoff = time.time() - grace.total_seconds()
+    for directory, _, files in os.walk(STORE_DIR):
+        for name in files:
+            path = os.path.join(directory, name)
+            if (name.split('.')[0] in known and not name.endswith('.tmp')) or os.path.getmtime(path) >= cutoff:
+                continue
+            orphans += 1
+            freed += os.path.getsize(path)
+            if not dry_run:
+                os.remove(path)
+
+    verb = 'Would remove' if dry_run else 'Removed'
+    print(f"🧹 {verb} {deleted} unreferenced objects and {orphans} orphaned files "
+          f"({freed / 1024 / 1024:.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Maintain the content-addressed media store')
+    parser.add_argument('--migrate', action='store_true', help='move loose recipe_media files into the store')
+    parser.add_argument('--delete-sources', action='store_true', help='with --migrate, delete moved files under uploads/')
+    parser.add_argument('--gc', action='store_true', help='delete unreferenced objects')
+    parser.add_argument('--recount', action='store_true', help='recompute ref_count from recipe_media first')
+    parser.add_argument('--grace-hours', type=float, default=GRACE_HOURS)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    conn = connect()
+    try:
+        if args.migrate:
+            migrate(conn, args.delete_sources, args.dry_run)
+        if args.recount and not args.dry_run:
+            recount(conn)
+        if args.gc:
+            collect_garbage(conn, timedelta(hours=args.grace_hours), args.dry_run)
+    finally:
+        conn.close()
+
+    print(f"✅ Done in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Cohort and retention tables for the admin analytics page.
+
+Users, their latest subscription plan and their distinct active days are
+streamed out of Postgres with COPY in one REPEATABLE READ snapshot. Users are
+numbered in SQL so activity arrives as plain integers and loads straight into
+NumPy; everything after that is vectorized:
+
+- mycheff.retention_matrix: per signup week, how many of the cohort were active
+  in each week since signup (weeks 0..MAX_WEEKS).
+- mycheff.retention_summary: D1/D7/D30 retention (active on exactly day N
+  after signup) by signup week, preferred language and subscription plan.
+  Only users whose day N is already complete count towards the denominator.
+
+Both tables are replaced on every run.
+
+Usage:
+    python -m jobs.retention [--weeks 26] [--max-weeks 12]
+"""
+import argparse
+import csv
+import io
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from jobs.db import connect, copy_rows
+
+RETENTION_DAYS = (1, 7, 30)
+COHORT_WEEKS = 26
+MAX_WEEKS = 12
+EPOCH = date(1970, 1, 1)
+
+USERS_SQL = """
+    WITH numbered AS (
+        SELECT id, created_at, preferred_language,
+               row_number() OVER (ORDER BY created_at, id) - 1 AS idx
+        FROM mycheff.users
+        WHERE created_at >= %(since)s
+    )
+    SELECT n.idx,
+           (n.created_at AT TIME ZONE 'UTC')::date - DATE '1970-01-01',
+           n.preferred_language,
+           COALESCE(plan.name, 'free')
+    FROM numbered n
+    LEFT JOIN LATERAL (
+        SELECT sp.name
+        FROM mycheff.user_subscriptions us
+        JOIN mycheff.subscription_plans sp ON sp.id = us.plan_id
+        WHERE us.user_id = n.id AND us.payment_status = 'completed'
+        ORDER BY us.start_date DESC
+        LIMIT 1
+    ) plan ON true
+    ORDER BY n.idx
+"""
+
+ACTIVITY_SQL = """
+    WITH numbered AS (
+        SELECT id, created_at, row_number() OVER (ORDER BY created_at, id) - 1 AS idx
+        FROM mycheff.users
+        WHERE created_at >= %(since)s
+    )
+    SELECT DISTINCT n.idx, (a.created_at AT TIME ZONE 'UTC')::date - DATE '1970-01-01'
+    FROM mycheff.user_activities a
+    JOIN numbered n ON n.id = a.user_id
+    WHERE a.created_at >= n.created_at
+      AND a.created_at < n.created_at + make_interval(days => %(horizon)s)
+"""
+
+
+def copy_out(cursor, sql, params):
+    buffer = io.StringIO()
+    cursor.copy_expert(f"COPY ({cursor.mogrify(sql, params).decode('utf-8')}) TO STDOUT", buffer)
+    return buffer.getvalue()
+
+
+def load(cursor, since, horizon):
+    params = {'since': since, 'horizon': horizon}
+
+    users = list(csv.reader(io.StringIO(copy_out(cursor, USERS_SQL, params)), delimiter='\t'))
+    signup_day = np.array([int(row[1]) for row in users], dtype=np.int64)
+    languages = np.array([row[2] for row in users], dtype=object)
+    plans = np.array([row[3] for row in users], dtype=object)
+
+    # Two integer columns per row; parse the whole COPY output at once
+    pairs = np.fromstring(copy_out(cursor, ACTIVITY_SQL, params), dtype=np.int64, sep=' ').reshape(-1, 2)
+    return signup_day, languages, plans, pairs[:, 0], pairs[:, 1]
+
+
+def active_days(signup_day, user_index, activity_day, horizon):
+    """Boolean (users, horizon) matrix: active on day d after signup."""
+    offset = activity_day - signup_day[user_index]
+    keep = (offset >= 0) & (offset < horizon)
+    active = np.zeros((len(signup_day), horizon), dtype=bool)
+    active[user_index[keep], offset[keep]] = True
+    return active
+
+
+def retention_matrix(signup_day, active, today, max_weeks):
+    cohort_start = signup_day - (signup_day + 3) % 7  # Monday (1970-01-01 was a Thursday)
+    cohorts, cohort_index = np.unique(cohort_start, return_inverse=True)
+
+    weeks = active[:, :(max_weeks + 1) * 7].reshape(len(signup_day), max_weeks + 1, 7).any(axis=2)
+    active_users = np.zeros((len(cohorts), max_weeks + 1), dtype=np.int64)
+    np.add.at(active_users, cohort_index, weeks)
+    sizes = np.bincount(cohort_index, minlength=len(cohorts))
+
+    rows = []
+    for c, cohort in enumerate(cohorts):
+        # Only weeks that are over for the whole cohort
+        complete = min(max_weeks + 1, max(0, (today - (cohort + 6)) // 7))
+        for week in range(complete):
+            rows.append((EPOCH + timedelta(days=int(cohort)), week, int(sizes[c]), int(active_users[c, week])))
+    return rows
+
+
+def retention_summary(signup_day, languages, plans, active, today):
+    cohort_start = signup_day - (signup_day + 3) % 7
+    dimensions = {
+        'signup_week': np.array([(EPOCH + timedelta(days=int(day))).isoformat() for day in cohort_start], dtype=object),
+        'language': languages,
+        'plan': plans,
+    }
+
+    retained = {n: active[:, n] for n in RETENTION_DAYS}
+    eligible = {n: signup_day + n < today for n in RETENTION_DAYS}
+
+    rows = []
+    for dimension, values in dimensions.items():
+        keys, index = np.unique(values.astype(str), return_inverse=True)
+        sizes = np.bincount(index, minlength=len(keys))
+        counts = {}
+        for n in RETENTION_DAYS:
+            counts[n] = (
+                np.bincount(index, weights=eligible[n], minlength=len(keys)).astype(np.int64),
+                np.bincount(index, weights=retained[n] & eligible[n], minlength=len(keys)).astype(np.int64),
+            )
+        for k, key in enumerate(keys):
+            row = [dimension, str(key), int(sizes[k])]
+            for n in RETENTION_DAYS:
+                eligible_count, retained_count = counts[n][0][k], counts[n][1][k]
+                row += [
+                    int(eligible_count),
+                    int(retained_count),
+                    round(float(retained_count / eligible_count), 4) if eligible_count else None,
+                ]
+            rows.append(tuple(row))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compute cohort retention tables')
+    parser.add_argument('--weeks', type=int, default=COHORT_WEEKS, help='signup weeks to include')
+    parser.add_argument('--max-weeks', type=int, default=MAX_WEEKS, help='weeks since signup in the matrix')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    today = (date.today() - EPOCH).days
+    since = date.today() - timedelta(weeks=args.weeks)
+    horizon = max(max(RETENTION_DAYS) + 1, (args.max_weeks + 1) * 7)
+
+    conn = connect()
+    try:
+        with conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                signup_day, languages, plans, user_index, activity_day = load(cursor, since, horizon)
+                print(f"👥 Loaded {len(signup_day)} users and {len(activity_day)} active user-days "
+                      f"in {time.perf_counter() - started:.2f}s")
+
+                active = active_days(signup_day, user_index, activity_day, horizon)
+                matrix_rows = retention_matrix(signup_day, active, today, args.max_weeks)
+                summary_rows = retention_summary(signup_day, languages, plans, active, today)
+
+                cursor.execute("DELETE FROM mycheff.retention_matrix")
+                copy_rows(
+                    cursor,
+                    'mycheff.retention_matrix',
+                    ['cohort_week', 'weeks_since_signup', 'cohort_size', 'active_users'],
+                    matrix_rows,
+                )
+                cursor.execute("DELETE FROM mycheff.retention_summary")
+                copy_rows(
+                    cursor,
+                    'mycheff.retention_summary',
+                    [
+                        'dimension', 'dimension_value', 'cohort_size',
+                        'd1_eligible', 'd1_retained', 'd1_rate',
+                        'd7_eligible', 'd7_retained', 'd7_rate',
+                        'd30_eligible', 'd30_retained', 'd30_rate',
+                    ],
+                    summary_rows,
+                )
+    finally:
+        conn.close()
+
+    print(f"✅ Wrote {len(matrix_rows)} matrix cells and {len(summary_rows)} summary rows "
+          f"in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Group user_activities into sessions split by an inactivity gap.
+
+Events are walked per user in time order: an event within GAP of the user's
+previous event extends that session, anything later starts a new one. Results
+go to mycheff.user_sessions (start, end, event count, recipes viewed).
+
+Runs resume from a watermark. Sessions that ended within GAP of it may still be
+extended, so they are loaded back as the open state before new events are
+applied. Only events LATENESS old are read, so slow commits are not skipped.
+
+The table holds the sessions of one gap at a time: a rebuild for one gap
+clears the watermarks of the others, so their next run rebuilds as well.
+
+Usage:
+    python -m jobs.sessionize [--full] [--gap-minutes 30]
+"""
+import argparse
+import time
+import uuid
+from datetime import timedelta
+
+from jobs.db import connect, copy_rows
+
+GAP_MINUTES = 30
+LATENESS = timedelta(minutes=10)
+FETCH_SIZE = 5000
+
+
+class Session:
+    __slots__ = ('id', 'user_id', 'started_at', 'ended_at', 'event_count', 'recipe_views', 'recipes_viewed')
+
+    def __init__(self, session_id, user_id, started_at, ended_at, event_count=0, recipe_views=0, recipes_viewed=()):
+        self.id = session_id
+        self.user_id = user_id
+        self.started_at = started_at
+        self.ended_at = ended_at
+        self.event_count = event_count
+        self.recipe_views = recipe_views
+        self.recipes_viewed = set(recipes_viewed)
+
+    def add(self, created_at, activity_type, recipe_id):
+        self.ended_at = max(self.ended_at, created_at)
+        self.event_count += 1
+        if activity_type == 'recipe_view' and recipe_id:
+            self.recipe_views += 1
+            self.recipes_viewed.add(recipe_id)
+
+    def row(self):
+        return (
+            self.id,
+            self.user_id,
+            self.started_at,
+            self.ended_at,
+            self.event_count,
+            self.recipe_views,
+            '{' + ','.join(sorted(self.recipes_viewed)) + '}',
+        )
+
+
+def lock_watermark(cursor, name):
+    cursor.execute("""
+        INSERT INTO mycheff.aggregation_watermarks (name) VALUES (%s)
+        ON CONFLICT (name) DO NOTHING
+    """, (name,))
+    cursor.execute("SELECT watermark FROM mycheff.aggregation_watermarks WHERE name = %s FOR UPDATE", (name,))
+    return cursor.fetchone()[0]
+
+
+def load_open_sessions(cursor, since, gap):
+    cursor.execute("""
+        SELECT id::text, user_id::text, started_at, ended_at, event_count, recipe_views, recipes_viewed::text[]
+        FROM mycheff.user_sessions
+        WHERE ended_at >= %s
+        ORDER BY ended_at
+    """, (since - gap,))
+    # The latest session per user wins
+    return {row[1]: Session(*row) for row in cursor.fetchall()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sessionize user_activities by inactivity gap')
+    parser.add_argument('--full', action='store_true', help='rebuild every session from the first event')
+    parser.add_argument('--gap-minutes', type=int, default=GAP_MINUTES)
+    args = parser.parse_args()
+
+    gap = timedelta(minutes=args.gap_minutes)
+    watermark_name = f'user_sessions:{args.gap_minutes}m'
+    started = time.perf_counter()
+    conn = connect()
+    try:
+        with conn:
+            with conn.cursor() as cursor:
+                watermark = lock_watermark(cursor, watermark_name)
+                cursor.execute("SELECT now(), MIN(created_at) FROM mycheff.user_activities")
+                now, first_event = cursor.fetchone()
+                until = now - LATENESS
+
+                # A different gap cuts sessions differently, so it starts over too
+                full = args.full or watermark is None
+                since = first_event if full else watermark
+                if since is None or since >= until:
+                    print("✅ No new activity to sessionize")
+                    return
+
+                if full:
+                    cursor.execute("DELETE FROM mycheff.user_sessions")
+                    # Their sessions were just deleted, so they must start over too
+                    cursor.execute("""
+                        UPDATE mycheff.aggregation_watermarks
+                        SET watermark = NULL, updated_at = CURRENT_TIMESTAMP
+                        WHERE name LIKE 'user_sessions:%%' AND name <> %s
+                    """, (watermark_name,))
+                    open_sessions = {}
+                else:
+                    open_sessions = load_open_sessions(cursor, since, gap)
+
+                touched = {}
+                events = 0
+                with conn.cursor(name='sessionize_events') as rows:
+                    rows.itersize = FETCH_SIZE
+                    rows.execute("""
+                        SELECT user_id::text, created_at, activity_type, recipe_id::text
+                        FROM mycheff.user_activities
+                        WHERE created_at >= %s AND created_at < %s
+                        ORDER BY user_id, created_at
+                    """, (since, until))
+                    for user_id, created_at, activity_type, recipe_id in rows:
+                        session = open_sessions.get(user_id)
+                        if session is None or created_at - session.ended_at > gap:
+                            session = Session(str(uuid.uuid4()), user_id, created_at, created_at)
+                            open_sessions[user_id] = session
+                        session.add(created_at, activity_type, recipe_id)
+                        touched[session.id] = session
+                        events += 1
+
+                cursor.execute("""
+                    CREATE TEMP TABLE session_batch
+                    (LIKE mycheff.user_sessions INCLUDING DEFAULTS) ON COMMIT DROP
+                """)
+                copy_rows(
+                    cursor,
+                    'session_batch',
+                    ['id', 'user_id', 'started_at', 'ended_at', 'event_count', 'recipe_views', 'recipes_viewed'],
+                    (session.row() for session in touched.values()),
+                )
+                cursor.execute("""
+                    INSERT INTO mycheff.user_sessions
+                        (id, user_id, started_at, ended_at, event_count, recipe_views, recipes_viewed)
+                    SELECT id, user_id, started_at, ended_at, event_count, recipe_views, recipes_viewed
+                    FROM session_batch
+                    ON CONFLICT (id) DO UPDATE
+                    SET ended_at = EXCLUDED.ended_at,
+                        event_count = EXCLUDED.event_count,
+                        recipe_views = EXCLUDED.recipe_views,
+                        recipes_viewed = EXCLUDED.recipes_viewed
+                """)
+                cursor.execute("""
+                    UPDATE mycheff.aggregation_watermarks
+                    SET watermark = %s, updated_at = CURRENT_TIMESTAMP
+                    WHERE name = %s
+                """, (until, watermark_name))
+    finally:
+        conn.close()
+
+    print(f"✅ Sessionized {events} events into {len(touched)} new or extended sessions "
+          f"in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
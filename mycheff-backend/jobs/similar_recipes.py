@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Build the "similar recipes" index with MinHash signatures and LSH banding.
+
+Each published recipe's ingredient set is reduced to a NUM_PERM MinHash
+signature (stored in mycheff.recipe_minhash_signatures). Signatures are split
+into BANDS bands of ROWS rows; recipes sharing any band bucket become candidates
+and only those pairs get an exact Jaccard score, so the job never compares
+every pair. The best TOP_K neighbours per recipe go to mycheff.recipe_similarities.
+
+Runs incrementally by default: only recipes whose ingredient set changed get new
+signatures, and only recipes sharing a bucket with them (or already listing a
+changed or deleted recipe) get their neighbour lists rewritten.
+
+Usage:
+    python -m jobs.similar_recipes [--full] [--top-k 10]
+"""
+import argparse
+import hashlib
+import time
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from jobs.db import connect, copy_rows
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+TOP_K = 10
+MIN_SIMILARITY = 0.1
+
+# Largest prime below 2**32 keeps every hash value inside uint32
+PRIME = np.uint64(4294967291)
+_rng = np.random.default_rng(20240601)
+HASH_A = _rng.integers(1, int(PRIME), size=NUM_PERM, dtype=np.uint64)
+HASH_B = _rng.integers(0, int(PRIME), size=NUM_PERM, dtype=np.uint64)
+
+
+def ingredient_hash(ingredient_ids):
+    return hashlib.md5(','.join(ingredient_ids).encode('utf-8')).hexdigest()
+
+
+def minhash_signature(ingredient_ids):
+    values = np.fromiter(
+        (zlib.crc32(ingredient_id.encode('ascii')) for ingredient_id in ingredient_ids),
+        dtype=np.uint64,
+        count=len(ingredient_ids),
+    )
+    hashed = (HASH_A[:, None] * values[None, :] + HASH_B[:, None]) % PRIME
+    return hashed.min(axis=1).astype(np.uint32)
+
+
+def band_keys(signature):
+    for band in range(BANDS):
+        yield band, signature[band * ROWS:(band + 1) * ROWS].tobytes()
+
+
+def jaccard(a, b):
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+
+def load_recipes(cursor):
+    cursor.execute("""
+        SELECT ri.recipe_id::text, array_agg(DISTINCT ri.ingredient_id::text ORDER BY ri.ingredient_id::text)
+        FROM mycheff.recipe_ingredients ri
+        JOIN mycheff.recipes r ON r.id = ri.recipe_id
+        WHERE r.is_published = true
+        GROUP BY ri.recipe_id
+    """)
+    return {recipe_id: ingredient_ids for recipe_id, ingredient_ids in cursor.fetchall()}
+
+
+def load_signatures(cursor):
+    cursor.execute("""
+        SELECT recipe_id::text, ingredient_hash, signature
+        FROM mycheff.recipe_minhash_signatures
+    """)
+    return {
+        recipe_id: (stored_hash, np.frombuffer(bytes(signature), dtype=np.uint32))
+        for recipe_id, stored_hash, signature in cursor.fetchall()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build MinHash-LSH similar recipe index')
+    parser.add_argument('--full', action='store_true', help='recompute every signature and neighbour list')
+    parser.add_argument('--top-k', type=int, default=TOP_K)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    conn = connect()
+    try:
+        with conn:
+            with conn.cursor() as cursor:
+                recipes = load_recipes(cursor)
+                stored = {} if args.full else load_signatures(cursor)
+                print(f"🍽️  Loaded {len(recipes)} recipes, {len(stored)} stored signatures")
+
+                signatures = {}
+                changed = set()
+                for recipe_id, ingredient_ids in recipes.items():
+                    current_hash = ingredient_hash(ingredient_ids)
+                    previous = stored.get(recipe_id)
+                    if previous and previous[0] == current_hash:
+                        signatures[recipe_id] = previous[1]
+                    else:
+                        signatures[recipe_id] = minhash_signature(ingredient_ids)
+                        changed.add(recipe_id)
+
+                removed = set(stored) - set(recipes)
+
+                buckets = defaultdict(list)
+                recipe_keys = {}
+                for recipe_id, signature in signatures.items():
+                    keys = list(band_keys(signature))
+                    recipe_keys[recipe_id] = keys
+                    for key in keys:
+                        buckets[key].append(recipe_id)
+
+                if args.full:
+                    affected = set(recipes)
+                else:
+                    affected = set(changed)
+                    for recipe_id in changed:
+                        for key in recipe_keys[recipe_id]:
+                            affected.update(buckets[key])
+                    if changed or removed:
+                        # Lists that still point at an old version of a changed recipe
+                        cursor.execute("""
+                            SELECT DISTINCT recipe_id::text
+                            FROM mycheff.recipe_similarities
+                            WHERE similar_recipe_id = ANY(%s::uuid[])
+                        """, (list(changed | removed),))
+                        affected.update(row[0] for row in cursor.fetchall() if row[0] in recipes)
+
+                ingredient_sets = {recipe_id: set(ids) for recipe_id, ids in recipes.items()}
+                similarity_rows = []
+                for recipe_id in affected:
+                    candidates = set()
+                    for key in recipe_keys[recipe_id]:
+                        candidates.update(buckets[key])
+                    candidates.discard(recipe_id)
+
+                    scored = sorted(
+                        (
+                            (jaccard(ingredient_sets[recipe_id], ingredient_sets[other]), other)
+                            for other in candidates
+                        ),
+                        reverse=True,
+                    )
+                    rank = 0
+                    for similarity, other in scored[:args.top_k]:
+                        if similarity < MIN_SIMILARITY:
+                            break
+                        rank += 1
+                        similarity_rows.append((recipe_id, other, round(similarity, 3), rank))
+
+                if args.full:
+                    cursor.execute("DELETE FROM mycheff.recipe_minhash_signatures")
+                    cursor.execute("DELETE FROM mycheff.recipe_similarities")
+                else:
+                    stale = list(changed | removed)
+                    cursor.execute(
+                        "DELETE FROM mycheff.recipe_minhash_signatures WHERE recipe_id = ANY(%s::uuid[])",
+                        (stale,),
+                    )
+                    cursor.execute(
+                        "DELETE FROM mycheff.recipe_similarities WHERE recipe_id = ANY(%s::uuid[])",
+                        (list(affected | removed),),
+                    )
+
+                copy_rows(
+                    cursor,
+                    'mycheff.recipe_minhash_signatures',
+                    ['recipe_id', 'ingredient_hash', 'signature'],
+                    (
+                        (recipe_id, ingredient_hash(recipes[recipe_id]), '\\x' + signatures[recipe_id].tobytes().hex())
+                        for recipe_id in changed
+                    ),
+                )
+                written = copy_rows(
+                    cursor,
+                    'mycheff.recipe_similarities',
+                    ['recipe_id', 'similar_recipe_id', 'similarity', 'rank'],
+                    similarity_rows,
+                )
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"🔁 {len(changed)} new/changed signatures, {len(removed)} removed, {len(affected)} neighbour lists rebuilt")
+    print(f"✅ Wrote {written} similarity rows in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
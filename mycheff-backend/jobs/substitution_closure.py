@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Precompute the transitive closure of mycheff.ingredient_substitutions.
+
+Every edge (ingredient_id <- substitute_id, weight) says "having the substitute
+earns `weight` credit for the ingredient". Chains multiply, so butter -> margarine
+(0.9) and ghee -> butter (0.8) give ghee -> margarine 0.72. The job keeps the best
+path per pair within MAX_HOPS, drops pairs under MIN_WEIGHT and swaps the result
+into mycheff.ingredient_substitution_closure in one transaction, so the API only
+ever reads a flat (substitute_id -> ingredient_id, weight) table.
+
+Usage:
+    python -m jobs.substitution_closure [--max-hops 3] [--min-weight 0.5]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from jobs.db import connect, copy_rows
+
+MAX_HOPS = 3
+MIN_WEIGHT = 0.5
+
+
+def load_edges(cursor):
+    cursor.execute("""
+        SELECT ingredient_id::text, substitute_id::text, weight::float8, is_bidirectional
+        FROM mycheff.ingredient_substitutions
+    """)
+    return cursor.fetchall()
+
+
+def build_matrix(edges):
+    """Map ingredient ids to dense ordinals and build the direct weight matrix.
+
+    weights[i, j] is the credit ingredient i receives when the pantry holds j.
+    """
+    ids = sorted({edge[0] for edge in edges} | {edge[1] for edge in edges})
+    ordinal = {ingredient_id: index for index, ingredient_id in enumerate(ids)}
+
+    weights = np.zeros((len(ids), len(ids)), dtype=np.float32)
+    for ingredient_id, substitute_id, weight, is_bidirectional in edges:
+        i, j = ordinal[ingredient_id], ordinal[substitute_id]
+        weights[i, j] = max(weights[i, j], weight)
+        if is_bidirectional:
+            weights[j, i] = max(weights[j, i], weight)
+
+    return ids, weights
+
+
+def transitive_closure(weights, max_hops=MAX_HOPS):
+    """Max-product closure bounded by path length.
+
+    Each round extends every best path by one direct edge, which is a
+    (max, *) matrix product computed one intermediate column at a time.
+    """
+    n = weights.shape[0]
+    best = weights.copy()
+    hops = np.where(weights > 0, 1, 0).astype(np.int16)
+    frontier = weights.copy()
+
+    for hop in range(2, max_hops + 1):
+        extended = np.zeros_like(best)
+        for k in range(n):
+            column = frontier[:, k]
+            if not column.any():
+                continue
+            np.maximum(extended, np.outer(column, weights[k, :]), out=extended)
+
+        np.fill_diagonal(extended, 0)
+        if not extended.any():
+            break
+
+        improved = extended > best
+        best = np.where(improved, extended, best)
+        hops = np.where(improved, hop, hops).astype(np.int16)
+        frontier = extended
+
+    return best, hops
+
+
+def closure_rows(ids, best, hops, min_weight=MIN_WEIGHT):
+    rows, cols = np.nonzero(best >= min_weight)
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        yield ids[i], ids[j], round(float(best[i, j]), 3), int(hops[i, j])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute ingredient substitution closure')
+    parser.add_argument('--max-hops', type=int, default=MAX_HOPS)
+    parser.add_argument('--min-weight', type=float, default=MIN_WEIGHT)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    conn = connect()
+    try:
+        with conn:
+            with conn.cursor() as cursor:
+                edges = load_edges(cursor)
+                print(f"🔗 Loaded {len(edges)} substitution edges")
+
+                ids, weights = build_matrix(edges)
+                best, hops = transitive_closure(weights, args.max_hops)
+
+                cursor.execute("LOCK TABLE mycheff.ingredient_substitution_closure IN EXCLUSIVE MODE")
+                cursor.execute("DELETE FROM mycheff.ingredient_substitution_closure")
+                written = copy_rows(
+                    cursor,
+                    'mycheff.ingredient_substitution_closure',
+                    ['ingredient_id', 'substitute_id', 'weight', 'hops'],
+                    closure_rows(ids, best, hops, args.min_weight),
+                )
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Wrote {written} closure pairs over {len(ids)} ingredients in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import math
+
+import numpy as np
+import pytest
+
+from jobs import hll
+
+
+def sketch(values, precision):
+    hashes = hll.hash_values(values)
+    return hll.build_sketches(np.zeros(len(hashes), dtype=np.int64), hashes, 1, precision)[0]
+
+
+def users(start, stop):
+    return [f'user-{i}' for i in range(start, stop)]
+
+
+def test_encode_decode_round_trip():
+    registers = sketch(users(0, 5000), 12)
+
+    decoded = hll.decode(hll.encode(registers), 12)
+
+    assert np.array_equal(decoded, registers)
+
+
+def test_decode_rejects_wrong_precision():
+    with pytest.raises(ValueError):
+        hll.decode(hll.encode(sketch(users(0, 10), 12)), 14)
+
+
+def test_merge_equals_sketch_of_union():
+    monday, tuesday = sketch(users(0, 3000), 12), sketch(users(2000, 6000), 12)
+
+    merged = hll.merge(monday, tuesday)
+
+    assert np.array_equal(merged, sketch(users(0, 6000), 12))
+
+
+@pytest.mark.parametrize('count', [100, 2000, 50000, 200000])
+def test_estimate_within_error_bound(count):
+    precision = 12
+    # Three standard errors; the hashes are deterministic so this cannot flake
+    bound = 3 * 1.04 / math.sqrt(1 << precision)
+
+    estimate = hll.estimate(sketch(users(0, count), precision))
+
+    assert abs(estimate - count) / count <= bound
+
+
+def test_fold_matches_sketch_built_at_lower_precision():
+    values = users(0, 50000)
+
+    folded = hll.fold(sketch(values, 14), 14, 12)
+
+    assert np.array_equal(folded, sketch(values, 12))
+
+
+def test_precision_for_error():
+    assert hll.precision_for_error(0.02) == 12
+    assert hll.precision_for_error(0.5) == hll.MIN_PRECISION
+    assert hll.precision_for_error(0.0001) == hll.MAX_PRECISION
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Maintain exponentially decayed trending scores for recipes and categories.
+
+Every event adds its weight to the score of its recipe and the recipe's
+categories, overall (language_code '*') and for the user's preferred language.
+Scores use forward decay: an event at time t contributes 2**((t - EPOCH) / H)
+for half-life H, so stored scores never need to be decayed and their order is
+the order of the decayed scores at any moment. They are kept as log2 values,
+which turns each update into one logaddexp2 and never overflows:
+
+    score_log = logaddexp2(score_log, log2(weight) + (t - EPOCH) / H)
+    current score = 2 ** (score_log - (now - EPOCH) / H)
+
+Events are read past a watermark in created_at order, but only once they are
+LATENESS old, so slow commits are not skipped. Scores and the watermark are
+persisted together every PERSIST_INTERVAL; with --follow the job keeps running.
+
+Usage:
+    python -m jobs.trending [--full] [--follow] [--half-life-hours 24]
+"""
+import argparse
+import math
+import time
+from datetime import datetime, timedelta, timezone
+
+from jobs.db import connect, copy_rows
+
+# Must match TRENDING_EPOCH / TRENDING_HALF_LIFE_HOURS in analytics.service.ts
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+HALF_LIFE_HOURS = 24
+LATENESS = timedelta(minutes=10)
+PERSIST_INTERVAL = 60
+FETCH_SIZE = 5000
+# Scores below this (in events) are dropped when persisting
+MIN_SCORE = 0.01
+
+EVENT_WEIGHTS = {
+    'recipe_view': 1.0,
+    'rating': 3.0,
+    'favorite': 4.0,
+    'share': 5.0,
+}
+
+
+class TrendingScores:
+    def __init__(self, half_life_hours):
+        self.half_life_hours = half_life_hours
+        # (scope, language_code, item_id) -> score_log
+        self.scores = {}
+        self.dirty = set()
+        self.recipe_categories = {}
+
+    def exponent(self, when):
+        return (when - EPOCH).total_seconds() / 3600 / self.half_life_hours
+
+    def add(self, recipe_id, language_code, activity_type, created_at):
+        weight = EVENT_WEIGHTS.get(activity_type)
+        if weight is None:
+            return
+        contribution = math.log2(weight) + self.exponent(created_at)
+
+        for language in ('*', language_code):
+            self._bump(('recipe', language, recipe_id), contribution)
+            for category_id in self.recipe_categories.get(recipe_id, ()):
+                self._bump(('category', language, category_id), contribution)
+
+    def _bump(self, key, contribution):
+        current = self.scores.get(key)
+        if current is None:
+            self.scores[key] = contribution
+        else:
+            high, low = max(current, contribution), min(current, contribution)
+            self.scores[key] = high + math.log2(1 + 2 ** (low - high))
+        self.dirty.add(key)
+
+
+def load_categories(cursor, state):
+    cursor.execute("""
+        SELECT recipe_id::text, array_agg(category_id::text)
+        FROM mycheff.recipe_categories
+        GROUP BY recipe_id
+    """)
+    state.recipe_categories = dict(cursor.fetchall())
+
+
+def load_scores(cursor, state):
+    cursor.execute("SELECT scope, language_code, item_id::text, score_log FROM mycheff.trending_scores")
+    state.scores = {(scope, language, item_id): score for scope, language, item_id, score in cursor.fetchall()}
+    state.dirty.clear()
+
+
+def lock_watermark(cursor, name):
+    cursor.execute("""
+        INSERT INTO mycheff.aggregation_watermarks (name) VALUES (%s)
+        ON CONFLICT (name) DO NOTHING
+    """, (name,))
+    cursor.execute("SELECT watermark FROM mycheff.aggregation_watermarks WHERE name = %s FOR UPDATE", (name,))
+    return cursor.fetchone()[0]
+
+
+def apply_events(conn, state, since, until):
+    """Stream events in [since, until) through a server-side cursor."""
+    count = 0
+    with conn.cursor(name='trending_events') as events:
+        events.itersize = FETCH_SIZE
+        events.execute("""
+            SELECT a.recipe_id::text, u.preferred_language, a.activity_type, a.created_at
+            FROM mycheff.user_activities a
+            JOIN mycheff.users u ON u.id = a.user_id
+            WHERE a.recipe_id IS NOT NULL
+              AND a.created_at >= %s AND a.created_at < %s
+            ORDER BY a.created_at
+        """, (since, until))
+        for recipe_id, language_code, activity_type, created_at in events:
+            state.add(recipe_id, language_code, activity_type, created_at)
+            count += 1
+    return count
+
+
+def persist(cursor, state, watermark_name, until, full):
+    floor = state.exponent(until) + math.log2(MIN_SCORE)
+    if full:
+        cursor.execute("DELETE FROM mycheff.trending_scores")
+
+    rows = [key + (score,) for key, score in state.scores.items() if key in state.dirty and score >= floor]
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS trending_batch
+        (scope VARCHAR(10), language_code VARCHAR(5), item_id UUID, score_log DOUBLE PRECISION)
+        ON COMMIT DROP
+    """)
+    cursor.execute("TRUNCATE trending_batch")
+    copy_rows(cursor, 'trending_batch', ['scope', 'language_code', 'item_id', 'score_log'], rows)
+    cursor.execute("""
+        INSERT INTO mycheff.trending_scores (scope, language_code, item_id, score_log, updated_at)
+        SELECT scope, language_code, item_id, score_log, CURRENT_TIMESTAMP FROM trending_batch
+        ON CONFLICT (scope, language_code, item_id) DO UPDATE
+        SET score_log = EXCLUDED.score_log, updated_at = EXCLUDED.updated_at
+    """)
+
+    # Forget items that decayed to nothing, in the table and in memory
+    cursor.execute("DELETE FROM mycheff.trending_scores WHERE score_log < %s", (floor,))
+    state.scores = {key: score for key, score in state.scores.items() if score >= floor}
+
+    cursor.execute("""
+        UPDATE mycheff.aggregation_watermarks
+        SET watermark = %s, updated_at = CURRENT_TIMESTAMP
+        WHERE name = %s
+    """, (until, watermark_name))
+    written = len(rows)
+    state.dirty.clear()
+    return written
+
+
+def run_once(conn, state, args, watermark_name, full):
+    with conn:
+        with conn.cursor() as cursor:
+            watermark = lock_watermark(cursor, watermark_name)
+            load_categories(cursor, state)
+            cursor.execute("SELECT now()")
+            until = cursor.fetchone()[0] - LATENESS
+            if full or watermark is None:
+                # A new half-life starts over too; stored scores used another one
+                full = True
+                state.scores = {}
+                state.dirty.clear()
+                # Older events would contribute less than MIN_SCORE anyway
+                since = until - timedelta(hours=args.half_life_hours * -math.log2(MIN_SCORE / max(EVENT_WEIGHTS.values())))
+            else:
+                since = watermark
+            if since >= until:
+                return 0, 0
+
+            count = apply_events(conn, state, since, until)
+            written = persist(cursor, state, watermark_name, until, full)
+    return count, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Maintain decayed trending scores for recipes and categories')
+    parser.add_argument('--full', action='store_true', help='rebuild scores from recent history')
+    parser.add_argument('--follow', action='store_true', help=f'keep running, persisting every {PERSIST_INTERVAL}s')
+    parser.add_argument('--half-life-hours', type=float, default=HALF_LIFE_HOURS,
+                        help='changing it needs --full and the matching API constant')
+    args = parser.parse_args()
+
+    watermark_name = f'trending_scores:{args.half_life_hours:g}h'
+    state = TrendingScores(args.half_life_hours)
+    conn = connect()
+    try:
+        full = args.full
+        while True:
+            started = time.perf_counter()
+            try:
+                if not full and not state.scores:
+                    with conn:
+                        with conn.cursor() as cursor:
+                            load_scores(cursor, state)
+                    print(f"📈 Loaded {len(state.scores)} trending scores")
+
+                count, written = run_once(conn, state, args, watermark_name, full)
+                full = False
+                print(f"✅ Applied {count} events, persisted {written} scores in {time.perf_counter() - started:.2f}s")
+            except Exception as error:
+                # The transaction rolled back, so memory is ahead of the table
+                state.scores = {}
+                if not args.follow:
+                    raise
+                print(f"❌ Trending update failed, reloading scores: {error}")
+                if conn.closed:
+                    conn = connect()
+
+            if not args.follow:
+                break
+            time.sleep(PERSIST_INTERVAL)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
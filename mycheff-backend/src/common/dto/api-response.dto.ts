@@ -42,6 +42,12 @@ export class PaginationMetaDto {
 
   @ApiProperty({ description: 'Has previous page' })
   hasPrev: boolean;
+
+  @ApiProperty({ description: 'Total is a planner estimate rather than an exact count', required: false })
+  totalIsApproximate?: boolean;
+
+  @ApiProperty({ description: 'Opaque cursor for the next page (keyset pagination)', required: false, nullable: true })
+  nextCursor?: string | null;
 }
 
 export class PaginatedResponseDto<T> {
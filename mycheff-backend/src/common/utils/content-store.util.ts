@@ -0,0 +1,47 @@
+import { createHash } from 'crypto';
+import { createReadStream, promises as fs } from 'fs';
+import { dirname, join } from 'path';
+
+// Same layout as jobs/media_store.py: uploads/objects/<hash[0:2]>/<hash[2:4]>/<hash><ext>
+export const CONTENT_STORE_DIR = join(process.cwd(), 'uploads', 'objects');
+
+export function hashFile(path: string): Promise<string> {
+  return new Promise((resolve, reject) => {
+    const hash = createHash('sha256');
+    createReadStream(path)
+      .on('data', chunk => hash.update(chunk))
+      .on('end', () => resolve(hash.digest('hex')))
+      .on('error', reject);
+  });
+}
+
+export function objectKey(hash: string, extension: string): string {
+  return `${hash.slice(0, 2)}/${hash.slice(2, 4)}/${hash}${extension}`;
+}
+
+export function objectUrl(hash: string, extension: string): string {
+  return `/uploads/objects/${objectKey(hash, extension)}`;
+}
+
+// Moves a finished upload into the store, or drops it when the content is
+// already there. Returns whether a new file was written.
+export async function moveIntoStore(tempPath: string, hash: string, extension: string): Promise<boolean> {
+  const target = join(CONTENT_STORE_DIR, objectKey(hash, extension));
+  const exists = await fs.access(target).then(() => true, () => false);
+  if (exists) {
+    await fs.unlink(tempPath);
+    return false;
+  }
+
+  await fs.mkdir(dirname(target), { recursive: true });
+  try {
+    await fs.rename(tempPath, target);
+  } catch (error) {
+    // Different filesystems cannot rename; copy through a temp name instead
+    if (error.code !== 'EXDEV') throw error;
+    await fs.copyFile(tempPath, `${target}.tmp`);
+    await fs.rename(`${target}.tmp`, target);
+    await fs.unlink(tempPath);
+  }
+  return true;
+}
@@ -0,0 +1,77 @@
+import { countQueryBuilder, countWithThreshold, EXACT_COUNT_THRESHOLD } from './count.util';
+
+const plan = (rows: number) => [{ Plan: { 'Plan Rows': rows } }];
+
+describe('count.util', () => {
+  describe('countWithThreshold', () => {
+    it('counts exactly up to the threshold', async () => {
+      const runner = { query: jest.fn().mockResolvedValueOnce([{ count: '42' }]) };
+
+      const result = await countWithThreshold(runner, 'SELECT id FROM t WHERE a = $1', ['x']);
+
+      expect(result).toEqual({ total: 42, approximate: false });
+      expect(runner.query).toHaveBeenCalledTimes(1);
+      expect(runner.query).toHaveBeenCalledWith(
+        `SELECT COUNT(*) AS count FROM (SELECT id FROM t WHERE a = $1 LIMIT ${EXACT_COUNT_THRESHOLD + 1}) AS bounded`,
+        ['x'],
+      );
+    });
+
+    it('falls back to the planner estimate above the threshold', async () => {
+      const runner = {
+        query: jest.fn()
+          .mockResolvedValueOnce([{ count: '11' }])
+          .mockResolvedValueOnce([{ 'QUERY PLAN': plan(52000.4) }]),
+      };
+
+      const result = await countWithThreshold(runner, 'SELECT id FROM t', [], 10);
+
+      expect(result).toEqual({ total: 52000, approximate: true });
+      expect(runner.query).toHaveBeenLastCalledWith('EXPLAIN (FORMAT JSON) SELECT id FROM t', []);
+    });
+
+    it('accepts the plan as a JSON string', async () => {
+      const runner = {
+        query: jest.fn()
+          .mockResolvedValueOnce([{ count: '11' }])
+          .mockResolvedValueOnce([{ 'QUERY PLAN': JSON.stringify(plan(300)) }]),
+      };
+
+      expect(await countWithThreshold(runner, 'SELECT id FROM t', [], 10)).toEqual({ total: 300, approximate: true });
+    });
+
+    it('never reports fewer rows than were counted', async () => {
+      const runner = {
+        query: jest.fn()
+          .mockResolvedValueOnce([{ count: '11' }])
+          .mockResolvedValueOnce([{ 'QUERY PLAN': plan(3) }]),
+      };
+
+      expect(await countWithThreshold(runner, 'SELECT id FROM t', [], 10)).toEqual({ total: 11, approximate: true });
+    });
+  });
+
+  describe('countQueryBuilder', () => {
+    it('uses the exact count unless approximate totals are requested', async () => {
+      const builder: any = { alias: 'recipe', getCount: jest.fn().mockResolvedValue(7) };
+
+      expect(await countQueryBuilder(builder)).toEqual({ total: 7, approximate: false });
+    });
+
+    it('counts the distinct keys of the query with the threshold', async () => {
+      const clone: any = {
+        select: jest.fn(() => clone),
+        distinct: jest.fn(() => clone),
+        orderBy: jest.fn(() => clone),
+        getQueryAndParameters: () => ['SELECT DISTINCT "recipe"."id" FROM recipes "recipe"', []],
+      };
+      const connection = { query: jest.fn().mockResolvedValueOnce([{ count: '3' }]) };
+      const builder: any = { alias: 'recipe', connection, clone: () => clone, getCount: jest.fn() };
+
+      expect(await countQueryBuilder(builder, true)).toEqual({ total: 3, approximate: false });
+      expect(clone.select).toHaveBeenCalledWith('recipe.id');
+      expect(clone.orderBy).toHaveBeenCalledWith();
+      expect(builder.getCount).not.toHaveBeenCalled();
+    });
+  });
+});
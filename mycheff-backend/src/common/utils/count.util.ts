@@ -0,0 +1,58 @@
+import { SelectQueryBuilder } from 'typeorm';
+
+export interface TotalCount {
+  total: number;
+  approximate: boolean;
+}
+
+interface QueryRunnerLike {
+  query(sql: string, parameters?: any[]): Promise<any>;
+}
+
+export const EXACT_COUNT_THRESHOLD = 1000;
+
+// Counts the rows of `sql` exactly while there are at most `threshold` of them,
+// reading no more than threshold + 1 rows. Larger results fall back to the
+// planner's row estimate and are flagged as approximate.
+export async function countWithThreshold(
+  runner: QueryRunnerLike,
+  sql: string,
+  parameters: any[] = [],
+  threshold: number = EXACT_COUNT_THRESHOLD,
+): Promise<TotalCount> {
+  const [{ count }] = await runner.query(
+    `SELECT COUNT(*) AS count FROM (${sql} LIMIT ${threshold + 1}) AS bounded`,
+    parameters,
+  );
+  const bounded = parseInt(count);
+  if (bounded <= threshold) {
+    return { total: bounded, approximate: false };
+  }
+
+  const [explain] = await runner.query(`EXPLAIN (FORMAT JSON) ${sql}`, parameters);
+  const plan = explain['QUERY PLAN'];
+  const estimate = Math.round((typeof plan === 'string' ? JSON.parse(plan) : plan)[0].Plan['Plan Rows']);
+
+  return { total: Math.max(estimate, threshold + 1), approximate: true };
+}
+
+// Count for an entity query builder: TypeORM's exact COUNT(DISTINCT) by default,
+// or the thresholded count over the distinct keys when approximate totals are requested.
+export async function countQueryBuilder(
+  builder: SelectQueryBuilder<any>,
+  approximate: boolean = false,
+  keyColumn: string = `${builder.alias}.id`,
+): Promise<TotalCount> {
+  if (!approximate) {
+    return { total: await builder.getCount(), approximate: false };
+  }
+
+  const [sql, parameters] = builder
+    .clone()
+    .select(keyColumn)
+    .distinct(true)
+    .orderBy()
+    .getQueryAndParameters();
+
+  return countWithThreshold(builder.connection, sql, parameters);
+}
@@ -0,0 +1,31 @@
+import { BadRequestException } from '@nestjs/common';
+import { decodeCursor, encodeCursor } from './cursor.util';
+
+describe('cursor.util', () => {
+  it('round-trips the sort key values', () => {
+    const cursor = encodeCursor('recipes:rating', [4.5, 12, 'f3b1c2d4-0000-0000-0000-000000000001']);
+
+    expect(decodeCursor(cursor, 'recipes:rating', 3)).toEqual([4.5, 12, 'f3b1c2d4-0000-0000-0000-000000000001']);
+  });
+
+  it('returns null without a cursor', () => {
+    expect(decodeCursor(undefined, 'recipes:newest', 2)).toBeNull();
+    expect(decodeCursor('', 'recipes:newest', 2)).toBeNull();
+  });
+
+  it('rejects a cursor from another listing', () => {
+    const cursor = encodeCursor('recipes:newest', ['2026-01-01T00:00:00.000Z', 'id']);
+
+    expect(() => decodeCursor(cursor, 'recipes:rating', 2)).toThrow(BadRequestException);
+  });
+
+  it('rejects a cursor with the wrong number of values', () => {
+    const cursor = encodeCursor('recipes:match', [75, 4.5]);
+
+    expect(() => decodeCursor(cursor, 'recipes:match', 3)).toThrow(BadRequestException);
+  });
+
+  it('rejects a cursor that is not encoded JSON', () => {
+    expect(() => decodeCursor('not-a-cursor', 'recipes:newest', 2)).toThrow(BadRequestException);
+  });
+});
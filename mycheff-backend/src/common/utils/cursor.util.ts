@@ -0,0 +1,25 @@
+import { BadRequestException } from '@nestjs/common';
+
+export type CursorValue = string | number | boolean | null;
+
+// Opaque keyset cursor: the sort key values of the last row on a page, tagged
+// with the listing/sort they belong to so a cursor cannot be replayed against a
+// different ordering.
+export function encodeCursor(scope: string, values: CursorValue[]): string {
+  return Buffer.from(JSON.stringify([scope, ...values])).toString('base64url');
+}
+
+export function decodeCursor(cursor: string | undefined, scope: string, length: number): CursorValue[] | null {
+  if (!cursor) return null;
+
+  try {
+    const decoded = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'));
+    if (Array.isArray(decoded) && decoded[0] === scope && decoded.length === length + 1) {
+      return decoded.slice(1);
+    }
+  } catch {
+    // fall through to the error below
+  }
+
+  throw new BadRequestException('Invalid pagination cursor');
+}
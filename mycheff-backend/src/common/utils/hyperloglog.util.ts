@@ -0,0 +1,63 @@
+import { inflateSync } from 'zlib';
+
+export interface StoredSketch {
+  precision: number;
+  registers: Buffer;
+}
+
+// Merges day sketches written by jobs/hll.py (zlib-compressed one-byte
+// registers) into one register array by register-wise maximum. Sketches with a
+// higher precision are folded down to the lowest precision present.
+export function mergeSketches(sketches: StoredSketch[]): Uint8Array | null {
+  if (sketches.length === 0) return null;
+
+  const precision = Math.min(...sketches.map(sketch => sketch.precision));
+  const merged = new Uint8Array(1 << precision);
+  for (const sketch of sketches) {
+    const registers = foldRegisters(new Uint8Array(inflateSync(sketch.registers)), sketch.precision, precision);
+    for (let i = 0; i < merged.length; i++) {
+      if (registers[i] > merged[i]) merged[i] = registers[i];
+    }
+  }
+  return merged;
+}
+
+export function estimateCardinality(registers: Uint8Array): number {
+  const m = registers.length;
+  const alpha = m === 16 ? 0.673 : m === 32 ? 0.697 : m === 64 ? 0.709 : 0.7213 / (1 + 1.079 / m);
+
+  let sum = 0;
+  let zeros = 0;
+  for (const register of registers) {
+    sum += Math.pow(2, -register);
+    if (register === 0) zeros++;
+  }
+
+  const raw = (alpha * m * m) / sum;
+  // Linear counting is more accurate while many registers are still empty
+  if (raw <= 2.5 * m && zeros > 0) {
+    return Math.round(m * Math.log(m / zeros));
+  }
+  return Math.round(raw);
+}
+
+export function sketchStandardError(precision: number): number {
+  return 1.04 / Math.sqrt(1 << precision);
+}
+
+// The index bits dropped by a lower precision become the leading bits of the
+// rank: a non-zero remainder fixes the rank, otherwise it grows by their count.
+function foldRegisters(registers: Uint8Array, from: number, to: number): Uint8Array {
+  if (from === to) return registers;
+
+  const shift = from - to;
+  const folded = new Uint8Array(1 << to);
+  for (let i = 0; i < registers.length; i++) {
+    if (registers[i] === 0) continue;
+    const remainder = i & ((1 << shift) - 1);
+    const rank = remainder > 0 ? shift - Math.floor(Math.log2(remainder)) : shift + registers[i];
+    const target = i >>> shift;
+    if (rank > folded[target]) folded[target] = rank;
+  }
+  return folded;
+}
@@ -0,0 +1,24 @@
+// Languages whose dotted/dotless i must be lowercased with Turkish rules
+const TURKIC_LANGUAGES = new Set(['tr', 'az']);
+
+// Folds text into the key space used by the in-memory search indexes:
+// locale-aware lowercasing (İ -> i, I -> ı for Turkish), accent stripping
+// (ç -> c, ğ -> g, ş -> s, ö -> o, ü -> u, ı -> i) and whitespace collapsing.
+export function foldSearchText(text: string, languageCode: string = 'tr'): string {
+  if (!text) return '';
+
+  const locale = TURKIC_LANGUAGES.has(languageCode) ? 'tr' : languageCode;
+  let lowered: string;
+  try {
+    lowered = text.toLocaleLowerCase(locale);
+  } catch {
+    lowered = text.toLowerCase();
+  }
+
+  return lowered
+    .normalize('NFD')
+    .replace(/[\u0300-\u036f\u064b-\u065f]/g, '')
+    .replace(/ı/g, 'i')
+    .replace(/\s+/g, ' ')
+    .trim();
+}
@@ -32,6 +32,29 @@ export class RecipeMedia {
   @Column()
   url: string;
 
+  @ApiProperty({ description: 'SHA-256 of the file content in the media store' })
+  @Column({ name: 'content_hash', type: 'char', length: 64, nullable: true })
+  contentHash: string;
+
+  @ApiProperty({ description: 'Image width in pixels' })
+  @Column({ type: 'int', nullable: true })
+  width: number;
+
+  @ApiProperty({ description: 'Image height in pixels' })
+  @Column({ type: 'int', nullable: true })
+  height: number;
+
+  @ApiProperty({ description: 'Source file size in bytes, measured with the placeholder' })
+  @Column({ type: 'int', nullable: true })
+  bytes: number;
+
+  @ApiProperty({ description: 'Dominant colour as #rrggbb' })
+  @Column({ name: 'dominant_color', type: 'char', length: 7, nullable: true })
+  dominantColor: string;
+
+  @Column({ type: 'bytea', nullable: true, select: false })
+  lqip: Buffer;
+
   @ApiProperty({ description: 'Whether this is the primary media' })
   @Column({ name: 'is_primary', default: false })
   isPrimary: boolean;
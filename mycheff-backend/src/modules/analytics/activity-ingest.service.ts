@@ -0,0 +1,115 @@
+import { Injectable, OnModuleDestroy, OnModuleInit } from '@nestjs/common';
+import { Socket, createConnection } from 'net';
+import { v4 as uuid } from 'uuid';
+import type { ActivityData } from './analytics.service';
+
+const MAX_PENDING = 10000;
+const RECONNECT_DELAY_MS = 1000;
+
+// Streams activity events to the ingestion worker (jobs/activity_ingest.py) over
+// a Unix socket as JSON lines. Events stay in `pending` until the worker acks
+// them after its COPY commits and are resent on reconnect, so delivery is
+// at-least-once; the worker drops duplicates by id. When the socket is not
+// configured, down, or MAX_PENDING events are unacked, enqueue() returns null
+// and the caller writes the event itself. `onSettled` runs once the worker has
+// answered for the event, i.e. after it is written or rejected.
+@Injectable()
+export class ActivityIngestService implements OnModuleInit, OnModuleDestroy {
+  private readonly socketPath = process.env.ACTIVITY_INGEST_SOCKET;
+  private socket: Socket | null = null;
+  private connected = false;
+  // Set while the kernel buffer is full; cleared on 'drain'
+  private blocked = false;
+  private pending = new Map<string, string>();
+  private settledCallbacks = new Map<string, () => void>();
+  private received = '';
+  private reconnectTimer: NodeJS.Timeout | null = null;
+  private stopped = false;
+
+  onModuleInit() {
+    if (this.socketPath) {
+      this.connect();
+    }
+  }
+
+  onModuleDestroy() {
+    this.stopped = true;
+    if (this.reconnectTimer) clearTimeout(this.reconnectTimer);
+    this.socket?.end();
+  }
+
+  enqueue(data: ActivityData, onSettled?: () => void): string | null {
+    if (!this.connected || this.blocked || this.pending.size >= MAX_PENDING || !this.socket) {
+      return null;
+    }
+
+    const id = uuid();
+    const line = JSON.stringify({ id, ...data, createdAt: new Date().toISOString() }) + '\n';
+    this.pending.set(id, line);
+    if (onSettled) this.settledCallbacks.set(id, onSettled);
+    if (!this.socket.write(line)) {
+      this.blocked = true;
+    }
+    return id;
+  }
+
+  getStats() {
+    return {
+      enabled: !!this.socketPath,
+      connected: this.connected,
+      blocked: this.blocked,
+      pending: this.pending.size,
+    };
+  }
+
+  private connect() {
+    const socket = createConnection(this.socketPath as string);
+    this.socket = socket;
+    this.received = '';
+
+    socket.setEncoding('utf8');
+    socket.on('connect', () => {
+      this.connected = true;
+      this.blocked = false;
+      console.log(`📡 Connected to activity ingest worker at ${this.socketPath}`);
+
+      // Anything the previous connection did not see acked goes again
+      for (const line of this.pending.values()) {
+        if (!socket.write(line)) this.blocked = true;
+      }
+    });
+    socket.on('drain', () => {
+      this.blocked = false;
+    });
+    socket.on('data', (chunk: string) => this.handleReplies(chunk));
+    socket.on('error', error => {
+      console.error('❌ Activity ingest socket error:', error.message);
+    });
+    socket.on('close', () => {
+      this.connected = false;
+      this.socket = null;
+      if (!this.stopped) {
+        this.reconnectTimer = setTimeout(() => this.connect(), RECONNECT_DELAY_MS);
+      }
+    });
+  }
+
+  // Replies are "ok <id>" after a commit or "err <id> <reason>" for a rejected event
+  private handleReplies(chunk: string) {
+    this.received += chunk;
+    let newline = this.received.indexOf('\n');
+    while (newline !== -1) {
+      const [status, id, ...reason] = this.received.slice(0, newline).split(' ');
+      this.received = this.received.slice(newline + 1);
+      newline = this.received.indexOf('\n');
+
+      this.pending.delete(id);
+      if (status === 'err') {
+        console.error(`❌ Activity event ${id} rejected:`, reason.join(' '));
+      }
+      const onSettled = this.settledCallbacks.get(id);
+      this.settledCallbacks.delete(id);
+      onSettled?.();
+    }
+  }
+}
@@ -2,7 +2,7 @@ import { Controller, Get, Post, Body, Query, UseGuards, Request } from '@nestjs/
 import { ApiTags, ApiOperation } from '@nestjs/swagger';
 import { JwtAuthGuard } from '../../common/guards/jwt-auth.guard';
 import { AdminGuard } from '../auth/guards/admin.guard';
-import { AnalyticsService, ActivityData } from './analytics.service';
+import { AnalyticsService, ActivityData, SketchScope } from './analytics.service';
 
 @ApiTags('Analytics')
 @Controller('analytics')
@@ -56,6 +56,67 @@ export class AnalyticsController {
     };
   }
 
+  @Get('trending-recipes')
+  @ApiOperation({ summary: 'Get trending recipes (time-decayed activity)' })
+  async getTrendingRecipes(
+    @Query('languageCode') languageCode = 'tr',
+    @Query('limit') limit = 10,
+  ) {
+    const recipes = await this.analyticsService.getTrendingRecipes(languageCode, Number(limit));
+
+    return {
+      success: true,
+      data: recipes,
+    };
+  }
+
+  @Get('trending-categories')
+  @ApiOperation({ summary: 'Get trending categories (time-decayed activity)' })
+  async getTrendingCategories(
+    @Query('languageCode') languageCode = 'tr',
+    @Query('limit') limit = 10,
+  ) {
+    const categories = await this.analyticsService.getTrendingCategories(languageCode, Number(limit));
+
+    return {
+      success: true,
+      data: categories,
+    };
+  }
+
+  @Get('unique-users')
+  @UseGuards(JwtAuthGuard, AdminGuard)
+  @ApiOperation({ summary: 'Approximate distinct users over the last N days (Admin only)' })
+  async getUniqueUsers(
+    @Query('days') days = 7,
+    @Query('activityType') activityType?: string,
+    @Query('recipeId') recipeId?: string,
+  ) {
+    const scope: SketchScope = recipeId ? 'recipe' : activityType ? 'type' : 'all';
+    const uniqueUsers = await this.analyticsService.getUniqueUsers(
+      Number(days),
+      scope,
+      recipeId || activityType || '*',
+    );
+
+    return {
+      success: true,
+      data: uniqueUsers,
+    };
+  }
+
+  @Get('retention')
+  @UseGuards(JwtAuthGuard, AdminGuard)
+  @ApiOperation({ summary: 'D1/D7/D30 retention and weekly cohorts (Admin only)' })
+  async getRetention() {
+    const retention = await this.analyticsService.getRetention();
+
+    return {
+      success: true,
+      data: retention,
+    };
+  }
+
   @Get('system/stats')
   @UseGuards(JwtAuthGuard, AdminGuard)
   @ApiOperation({ summary: 'Get system statistics (Admin only)' })
@@ -6,6 +6,7 @@ import { User } from '../../entities/user.entity';
 import { UserActivity } from '../../entities/user-activity.entity';
 import { AnalyticsController } from './analytics.controller';
 import { AnalyticsService } from './analytics.service';
+import { ActivityIngestService } from './activity-ingest.service';
 
 @Module({
   imports: [
@@ -15,7 +16,7 @@ import { AnalyticsService } from './analytics.service';
     // }),
   ],
   controllers: [AnalyticsController],
-  providers: [AnalyticsService],
+  providers: [AnalyticsService, ActivityIngestService],
   exports: [AnalyticsService],
 })
 export class AnalyticsModule {} 
\ No newline at end of file
@@ -8,6 +8,8 @@ import { Repository } from 'typeorm';
 import { UserActivity } from '../../entities/user-activity.entity';
 import { Recipe } from '../../entities/recipe.entity';
 import { User } from '../../entities/user.entity';
+import { ActivityIngestService } from './activity-ingest.service';
+import { estimateCardinality, mergeSketches, sketchStandardError } from '../../common/utils/hyperloglog.util';
 
 export interface ActivityData {
   userId: string;
@@ -18,6 +20,15 @@ export interface ActivityData {
   userAgent?: string;
 }
 
+const USER_STATS_MEMO_SIZE = 1000;
+const USER_STATS_TTL_MS = 5 * 60 * 1000;
+
+// Must match EPOCH / HALF_LIFE_HOURS in jobs/trending.py
+const TRENDING_EPOCH = Date.UTC(2024, 0, 1);
+const TRENDING_HALF_LIFE_HOURS = 24;
+
+export type SketchScope = 'all' | 'type' | 'recipe';
+
 export interface AnalyticsStats {
   totalUsers: number;
   totalRecipes: number;
@@ -29,6 +40,13 @@ export interface AnalyticsStats {
 
 @Injectable()
 export class AnalyticsService {
+  // `${userId}:${days}` -> memoized getUserStats result, oldest first
+  private userStatsMemo = new Map<string, { stats: any; computedAt: number }>();
+  private userStatsInvalidatedAt = new Map<string, number>();
+  // userId -> events handed to the ingest worker and not acked yet
+  private userStatsUnsettled = new Map<string, number>();
+  private userStatsPrunedAt = Date.now();
+
   constructor(
     @InjectRepository(UserActivity)
     private activityRepository: Repository<UserActivity>,
@@ -38,6 +56,8 @@ export class AnalyticsService {
     
     @InjectRepository(User)
     private userRepository: Repository<User>,
+
+    private activityIngestService: ActivityIngestService,
     
     // @InjectQueue('analytics')
     // private analyticsQueue: Queue,
@@ -47,46 +67,107 @@ export class AnalyticsService {
   ) {}
 
   async trackActivity(data: ActivityData) {
-    // Add to queue for async processing (commented out for now)
-    // await this.analyticsQueue.add('track-activity', data, {
-    //   attempts: 3,
-    //   backoff: {
-    //     type: 'exponential',
-    //     delay: 2000,
-    //   },
-    // });
+    this.pruneUserStatsMarks();
+
+    // Batched COPY writes through the ingestion worker when it is reachable.
+    // A queued event is only in the table once the worker acks it, which can
+    // take several retries while the database is down, so the user's stats
+    // stay unmemoized until then
+    const queuedId = this.activityIngestService.enqueue(data, () => this.settleUserStats(data.userId));
+    if (queuedId) {
+      this.userStatsUnsettled.set(data.userId, (this.userStatsUnsettled.get(data.userId) ?? 0) + 1);
+      return { id: queuedId, ...data, queued: true };
+    }
 
     // Store immediately for real-time needs
     const activity = this.activityRepository.create(data);
-    return await this.activityRepository.save(activity);
+    const saved = await this.activityRepository.save(activity);
+    this.userStatsInvalidatedAt.set(data.userId, Date.now());
+    return saved;
+  }
+
+  private settleUserStats(userId: string) {
+    const unsettled = (this.userStatsUnsettled.get(userId) ?? 1) - 1;
+    if (unsettled > 0) {
+      this.userStatsUnsettled.set(userId, unsettled);
+    } else {
+      this.userStatsUnsettled.delete(userId);
+    }
+    this.userStatsInvalidatedAt.set(userId, Date.now());
+  }
+
+  // Runs at most once per TTL rather than on every tracked event
+  private pruneUserStatsMarks() {
+    const now = Date.now();
+    if (now - this.userStatsPrunedAt < USER_STATS_TTL_MS) return;
+    this.userStatsPrunedAt = now;
+
+    // Marks older than the TTL cannot outlive any memo entry
+    for (const [userId, invalidatedAt] of this.userStatsInvalidatedAt) {
+      if (invalidatedAt < now - USER_STATS_TTL_MS) this.userStatsInvalidatedAt.delete(userId);
+    }
   }
 
   async getUserStats(userId: string, days = 30) {
-    // const cacheKey = `user_stats:${userId}:${days}`;
-    // const cached = await this.cacheManager.get(cacheKey);
-    // if (cached) return cached;
+    const key = `${userId}:${days}`;
+    const memo = this.userStatsMemo.get(key);
+    if (memo && !this.userStatsUnsettled.has(userId)
+      && memo.computedAt >= (this.userStatsInvalidatedAt.get(userId) ?? 0)
+      && Date.now() - memo.computedAt < USER_STATS_TTL_MS) {
+      this.userStatsMemo.delete(key);
+      this.userStatsMemo.set(key, memo);
+      return memo.stats;
+    }
 
     const startDate = new Date();
     startDate.setDate(startDate.getDate() - days);
-
-    const activities = await this.activityRepository
-      .createQueryBuilder('activity')
-      .where('activity.userId = :userId', { userId })
-      .andWhere('activity.createdAt >= :startDate', { startDate })
-      .orderBy('activity.createdAt', 'DESC')
-      .getMany();
+    const computedAt = Date.now();
+
+    // One pass over the user's recent events (user_id, created_at index);
+    // counts, the daily histogram and top recipes are all built in Postgres
+    const [row] = await this.activityRepository.query(`
+      WITH recent AS (
+        SELECT activity_type, recipe_id, (created_at AT TIME ZONE 'UTC')::date AS day
+        FROM mycheff.user_activities
+        WHERE user_id = $1 AND created_at >= $2
+      ),
+      viewed AS (
+        SELECT recipe_id, COUNT(*) AS view_count
+        FROM recent
+        WHERE activity_type = 'recipe_view' AND recipe_id IS NOT NULL
+        GROUP BY recipe_id
+        ORDER BY COUNT(*) DESC
+        LIMIT 5
+      )
+      SELECT
+        (SELECT json_build_object(
+          'totalActivities', COUNT(*),
+          'recipeViews', COUNT(*) FILTER (WHERE activity_type = 'recipe_view'),
+          'searches', COUNT(*) FILTER (WHERE activity_type = 'search'),
+          'favorites', COUNT(*) FILTER (WHERE activity_type = 'favorite'),
+          'ratings', COUNT(*) FILTER (WHERE activity_type = 'rating')
+        ) FROM recent) AS counts,
+        (SELECT COALESCE(json_agg(json_build_object('date', day::text, 'count', count) ORDER BY day), '[]')
+         FROM (SELECT day, COUNT(*) AS count FROM recent GROUP BY day) d) AS daily,
+        (SELECT COALESCE(json_agg(json_build_object(
+           'recipeId', v.recipe_id,
+           'viewCount', v.view_count,
+           'title', rc.card->>'title'
+         ) ORDER BY v.view_count DESC), '[]')
+         FROM viewed v
+         LEFT JOIN mycheff.recipe_cards rc ON rc.recipe_id = v.recipe_id AND rc.language_code = 'tr') AS viewed
+    `, [userId, startDate]);
 
     const stats = {
-      totalActivities: activities.length,
-      recipeViews: activities.filter(a => a.activityType === 'recipe_view').length,
-      searches: activities.filter(a => a.activityType === 'search').length,
-      favorites: activities.filter(a => a.activityType === 'favorite').length,
-      ratings: activities.filter(a => a.activityType === 'rating').length,
-      dailyActivity: this.groupActivitiesByDay(activities),
-      mostViewedRecipes: await this.getMostViewedRecipes(userId, days),
+      ...row.counts,
+      dailyActivity: row.daily,
+      mostViewedRecipes: row.viewed,
     };
 
-    // await this.cacheManager.set(cacheKey, stats, 5 * 60 * 1000);
+    this.userStatsMemo.set(key, { stats, computedAt });
+    while (this.userStatsMemo.size > USER_STATS_MEMO_SIZE) {
+      this.userStatsMemo.delete(this.userStatsMemo.keys().next().value as string);
+    }
     return stats;
   }
 
@@ -98,32 +179,30 @@ export class AnalyticsService {
     const startDate = new Date();
     startDate.setDate(startDate.getDate() - days);
 
-    const popular = await this.activityRepository
-      .createQueryBuilder('activity')
-      .select('activity.recipeId', 'recipeId')
-      .addSelect('COUNT(*)', 'viewCount')
-      .leftJoin('activity.recipe', 'recipe')
-      .leftJoin('recipe.translations', 'translation', 'translation.languageCode = :lang', { lang: languageCode })
-      .where('activity.activityType = :type', { type: 'recipe_view' })
-      .andWhere('activity.createdAt >= :startDate', { startDate })
-      .andWhere('recipe.isPublished = true')
-      .groupBy('activity.recipeId')
-      .orderBy('COUNT(*)', 'DESC')
-      .limit(limit)
-      .getRawMany();
+    // Daily per-recipe rollup (jobs/activity_rollups.py) instead of raw views
+    const popular = await this.activityRepository.query(`
+      SELECT rad.recipe_id AS "recipeId", SUM(rad.event_count) AS "viewCount"
+      FROM mycheff.recipe_activity_daily rad
+      JOIN mycheff.recipes r ON r.id = rad.recipe_id AND r.is_published = true
+      WHERE rad.activity_type = 'recipe_view' AND rad.day >= $1::date
+      GROUP BY rad.recipe_id
+      ORDER BY SUM(rad.event_count) DESC
+      LIMIT $2
+    `, [startDate.toISOString().split('T')[0], limit]);
 
     const recipeIds = popular.map(p => p.recipeId);
     if (recipeIds.length === 0) return [];
 
-    const recipes = await this.recipeRepository
-      .createQueryBuilder('recipe')
-      .leftJoinAndSelect('recipe.translations', 'translation', 'translation.languageCode = :lang', { lang: languageCode })
-      .leftJoinAndSelect('recipe.media', 'media', 'media.sortOrder = 0')
-      .where('recipe.id IN (:...ids)', { ids: recipeIds })
-      .getMany();
+    // Prebuilt listing cards (mycheff.recipe_cards) instead of re-joining translations and media
+    const cards = await this.recipeRepository.query(`
+      SELECT recipe_id, card
+      FROM mycheff.recipe_cards
+      WHERE recipe_id = ANY($1::uuid[]) AND language_code = $2
+    `, [recipeIds, languageCode]);
+    const cardsById = new Map<string, any>(cards.map(row => [row.recipe_id, row.card]));
 
     const result = popular.map(p => ({
-      ...recipes.find(r => r.id === p.recipeId),
+      ...cardsById.get(p.recipeId),
       viewCount: parseInt(p.viewCount),
     }));
 
@@ -131,6 +210,118 @@ export class AnalyticsService {
     return result;
   }
 
+  // Top-K read of the decayed scores kept by jobs/trending.py. Scores of the
+  // language's own users come first, then overall scores fill the list.
+  async getTrendingRecipes(languageCode = 'tr', limit = 10) {
+    const trending = await this.getTrendingItems('recipe', languageCode, limit);
+    if (trending.length === 0) return [];
+
+    const cards = await this.recipeRepository.query(`
+      SELECT recipe_id, card
+      FROM mycheff.recipe_cards
+      WHERE recipe_id = ANY($1::uuid[]) AND language_code = $2 AND is_published = true
+    `, [trending.map(item => item.itemId), languageCode]);
+    const cardsById = new Map<string, any>(cards.map(row => [row.recipe_id, row.card]));
+
+    return trending
+      .filter(item => cardsById.has(item.itemId))
+      .map(item => ({ ...cardsById.get(item.itemId), trendingScore: item.score }));
+  }
+
+  async getTrendingCategories(languageCode = 'tr', limit = 10) {
+    const trending = await this.getTrendingItems('category', languageCode, limit);
+    if (trending.length === 0) return [];
+
+    const categories = await this.recipeRepository.query(`
+      SELECT c.id, c.icon, c.color, COALESCE(ct.name, tr.name) AS name
+      FROM mycheff.categories c
+      LEFT JOIN mycheff.category_translations ct ON ct.category_id = c.id AND ct.language_code = $2
+      LEFT JOIN mycheff.category_translations tr ON tr.category_id = c.id AND tr.language_code = 'tr'
+      WHERE c.id = ANY($1::uuid[]) AND c.is_active = true
+    `, [trending.map(item => item.itemId), languageCode]);
+    const categoriesById = new Map<string, any>(categories.map(category => [category.id, category]));
+
+    return trending
+      .filter(item => categoriesById.has(item.itemId))
+      .map(item => ({ ...categoriesById.get(item.itemId), trendingScore: item.score }));
+  }
+
+  private async getTrendingItems(scope: 'recipe' | 'category', languageCode: string, limit: number) {
+    const rows = await this.activityRepository.query(`
+      (SELECT item_id, score_log, language_code FROM mycheff.trending_scores
+       WHERE scope = $1 AND language_code = $2 ORDER BY score_log DESC LIMIT $3)
+      UNION ALL
+      (SELECT item_id, score_log, language_code FROM mycheff.trending_scores
+       WHERE scope = $1 AND language_code = '*' ORDER BY score_log DESC LIMIT $3)
+    `, [scope, languageCode, limit]);
+
+    // score_log is forward-decayed; subtracting "now" turns it into events-equivalent
+    const now = (Date.now() - TRENDING_EPOCH) / 3600000 / TRENDING_HALF_LIFE_HOURS;
+    const seen = new Set<string>();
+    const items: Array<{ itemId: string; score: number }> = [];
+    for (const row of rows) {
+      if (seen.has(row.item_id) || items.length >= limit) continue;
+      seen.add(row.item_id);
+      items.push({ itemId: row.item_id, score: Math.round(Math.pow(2, row.score_log - now) * 100) / 100 });
+    }
+    return items;
+  }
+
+  // Distinct users over the last `days` days, merged from the daily HyperLogLog
+  // sketches written by jobs/activity_rollups.py instead of COUNT(DISTINCT).
+  async getUniqueUsers(days = 7, scope: SketchScope = 'all', scopeKey = '*') {
+    const startDate = new Date();
+    startDate.setDate(startDate.getDate() - (days - 1));
+
+    const rows = await this.activityRepository.query(`
+      SELECT precision, registers
+      FROM mycheff.activity_user_sketches
+      WHERE day >= $1::date AND scope = $2 AND scope_key = $3
+    `, [startDate.toISOString().split('T')[0], scope, scopeKey]);
+
+    const merged = mergeSketches(rows);
+    return {
+      days,
+      scope,
+      scopeKey,
+      uniqueUsers: merged ? estimateCardinality(merged) : 0,
+      standardError: merged ? sketchStandardError(Math.log2(merged.length)) : 0,
+    };
+  }
+
+  // Cohort tables rebuilt by jobs/retention.py
+  async getRetention() {
+    const [summary, matrix] = await Promise.all([
+      this.activityRepository.query(`
+        SELECT dimension, dimension_value AS value, cohort_size AS "cohortSize",
+               d1_eligible AS "d1Eligible", d1_retained AS "d1Retained", d1_rate AS "d1Rate",
+               d7_eligible AS "d7Eligible", d7_retained AS "d7Retained", d7_rate AS "d7Rate",
+               d30_eligible AS "d30Eligible", d30_retained AS "d30Retained", d30_rate AS "d30Rate"
+        FROM mycheff.retention_summary
+        ORDER BY dimension, dimension_value
+      `),
+      this.activityRepository.query(`
+        SELECT cohort_week::text AS "cohortWeek", cohort_size AS "cohortSize",
+               array_agg(active_users ORDER BY weeks_since_signup) AS "activeUsers"
+        FROM mycheff.retention_matrix
+        GROUP BY cohort_week, cohort_size
+        ORDER BY cohort_week DESC
+      `),
+    ]);
+
+    const byDimension: Record<string, any[]> = { signup_week: [], language: [], plan: [] };
+    for (const row of summary) {
+      (byDimension[row.dimension] ||= []).push(row);
+    }
+
+    return {
+      bySignupWeek: byDimension.signup_week,
+      byLanguage: byDimension.language,
+      byPlan: byDimension.plan,
+      cohorts: matrix,
+    };
+  }
+
   async getSystemStats(): Promise<AnalyticsStats> {
     // const cacheKey = 'system_stats';
     // const cached = await this.cacheManager.get(cacheKey);
@@ -159,60 +350,27 @@ export class AnalyticsService {
     return stats;
   }
 
-  private groupActivitiesByDay(activities: UserActivity[]) {
-    const grouped = activities.reduce((acc, activity) => {
-      const date = activity.createdAt.toISOString().split('T')[0];
-      acc[date] = (acc[date] || 0) + 1;
-      return acc;
-    }, {});
-
-    return Object.entries(grouped).map(([date, count]) => ({
-      date,
-      count,
-    }));
-  }
-
-  private async getMostViewedRecipes(userId: string, days: number) {
-    const startDate = new Date();
-    startDate.setDate(startDate.getDate() - days);
-
-    return await this.activityRepository
-      .createQueryBuilder('activity')
-      .select('activity.recipeId', 'recipeId')
-      .addSelect('COUNT(*)', 'viewCount')
-      .leftJoin('activity.recipe', 'recipe')
-      .leftJoin('recipe.translations', 'translation', 'translation.languageCode = :lang', { lang: 'tr' })
-      .addSelect('translation.title', 'title')
-      .where('activity.userId = :userId', { userId })
-      .andWhere('activity.activityType = :type', { type: 'recipe_view' })
-      .andWhere('activity.createdAt >= :startDate', { startDate })
-      .groupBy('activity.recipeId')
-      .addGroupBy('translation.title')
-      .orderBy('COUNT(*)', 'DESC')
-      .limit(5)
-      .getRawMany();
-  }
-
   private async getUserEngagementStats() {
     const thirtyDaysAgo = new Date();
     thirtyDaysAgo.setDate(thirtyDaysAgo.getDate() - 30);
 
-    const activeUsers = await this.activityRepository
-      .createQueryBuilder('activity')
-      .select('COUNT(DISTINCT activity.userId)', 'count')
-      .where('activity.createdAt >= :date', { date: thirtyDaysAgo })
-      .getRawOne();
+    const { uniqueUsers: activeUsers } = await this.getUniqueUsers(30);
 
-    const avgSessionDuration = await this.activityRepository
-      .createQueryBuilder('activity')
-      .select('AVG(EXTRACT(EPOCH FROM (MAX(activity.createdAt) - MIN(activity.createdAt))))', 'avgDuration')
-      .where('activity.createdAt >= :date', { date: thirtyDaysAgo })
-      .groupBy('activity.userId')
-      .getRawOne();
+    // Sessions cut by inactivity gap (jobs/sessionize.py)
+    const [sessions] = await this.activityRepository.query(`
+      SELECT
+        COUNT(*) AS total,
+        AVG(EXTRACT(EPOCH FROM (ended_at - started_at))) AS avg_duration,
+        AVG(event_count) AS avg_events
+      FROM mycheff.user_sessions
+      WHERE started_at >= $1
+    `, [thirtyDaysAgo]);
 
     return {
-      activeUsers: parseInt(activeUsers.count),
-      avgSessionDuration: Math.round(parseInt(avgSessionDuration?.avgDuration || '0') / 60), // minutes
+      activeUsers,
+      totalSessions: parseInt(sessions.total),
+      avgEventsPerSession: Math.round(parseFloat(sessions.avg_events || '0') * 10) / 10,
+      avgSessionDuration: Math.round(parseFloat(sessions.avg_duration || '0') / 60), // minutes
     };
   }
 
@@ -220,14 +378,12 @@ export class AnalyticsService {
     const startDate = new Date();
     startDate.setDate(startDate.getDate() - days);
 
-    return await this.activityRepository
-      .createQueryBuilder('activity')
-      .select('DATE(activity.createdAt)', 'date')
-      .addSelect('COUNT(*)', 'totalActivities')
-      .addSelect('COUNT(DISTINCT activity.userId)', 'uniqueUsers')
-      .where('activity.createdAt >= :startDate', { startDate })
-      .groupBy('DATE(activity.createdAt)')
-      .orderBy('DATE(activity.createdAt)', 'ASC')
-      .getRawMany();
+    // '*' rows of the daily rollup cover every activity type
+    return await this.activityRepository.query(`
+      SELECT day::text AS date, event_count AS "totalActivities", unique_users AS "uniqueUsers"
+      FROM mycheff.activity_type_daily
+      WHERE activity_type = '*' AND day >= $1::date
+      ORDER BY day ASC
+    `, [startDate.toISOString().split('T')[0]]);
   }
-} 
\ No newline at end of file
+}
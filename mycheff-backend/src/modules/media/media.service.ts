@@ -2,8 +2,8 @@ import { Injectable, BadRequestException } from '@nestjs/common';
 import { InjectRepository } from '@nestjs/typeorm';
 import { Repository } from 'typeorm';
 import { RecipeMedia, MediaType } from '../../entities/recipe-media.entity';
-import * as path from 'path';
-import * as fs from 'fs';
+import { extname } from 'path';
+import { hashFile, moveIntoStore, objectKey, objectUrl } from '../../common/utils/content-store.util';
 
 @Injectable()
 export class MediaService {
@@ -22,29 +22,63 @@ export class MediaService {
     for (let i = 0; i < files.length; i++) {
       const file = files[i];
       const mediaType = this.getMediaType(file.mimetype);
-
-      const media = this.mediaRepository.create({
-        recipeId,
-        mediaType,
-        originalName: file.originalname,
-        fileName: file.filename,
-        mimeType: file.mimetype,
-        fileSize: file.size,
-        filePath: file.path || `/uploads/${file.filename}`,
-        sortOrder: i,
+      const hash = await hashFile(file.path);
+
+      // Identical content is stored once. The object row stays locked until the
+      // media row references it, so the store GC cannot remove the file meanwhile.
+      const media = await this.mediaRepository.manager.transaction(async manager => {
+        const [object] = await manager.query(`
+          INSERT INTO mycheff.media_objects (hash, extension, mime_type, bytes)
+          VALUES ($1, $2, $3, $4)
+          ON CONFLICT (hash) DO UPDATE SET touched_at = CURRENT_TIMESTAMP
+          RETURNING extension
+        `, [hash, extname(file.originalname).toLowerCase(), file.mimetype, file.size]);
+        await moveIntoStore(file.path, hash, object.extension);
+
+        return manager.save(manager.create(RecipeMedia, {
+          recipeId,
+          mediaType,
+          url: objectUrl(hash, object.extension),
+          contentHash: hash,
+          originalName: file.originalname,
+          fileName: objectKey(hash, object.extension),
+          mimeType: file.mimetype,
+          fileSize: file.size,
+          filePath: objectUrl(hash, object.extension),
+          sortOrder: i,
+        }));
       });
 
-      mediaEntries.push(await this.mediaRepository.save(media));
+      mediaEntries.push(media);
     }
 
     return mediaEntries;
   }
 
   async getRecipeMedia(recipeId: string) {
-    return await this.mediaRepository.find({
+    const media = await this.mediaRepository.find({
       where: { recipeId },
       order: { sortOrder: 'ASC' },
     });
+    if (media.length === 0) return media;
+
+    // Resized copies built by jobs/media_derivatives.py
+    const variants = await this.mediaRepository.query(`
+      SELECT v.media_id AS "mediaId", v.url, v.width, v.height, v.format, v.bytes
+      FROM mycheff.recipe_media_variants v
+      JOIN mycheff.recipe_media rm ON rm.id = v.media_id AND rm.url = v.source_url
+      WHERE v.media_id = ANY($1::uuid[])
+      ORDER BY v.format, v.width
+    `, [media.map(item => item.id)]);
+
+    const variantsByMedia = new Map<string, any[]>();
+    for (const { mediaId, ...variant } of variants) {
+      const list = variantsByMedia.get(mediaId) || [];
+      list.push(variant);
+      variantsByMedia.set(mediaId, list);
+    }
+
+    return media.map(item => ({ ...item, variants: variantsByMedia.get(item.id) || [] }));
   }
 
   async updateMediaOrder(mediaId: string, sortOrder: number) {
@@ -69,13 +103,8 @@ export class MediaService {
       throw new BadRequestException('Media not found');
     }
 
-    // Delete file from filesystem
-    const filePath = path.join('./uploads', media.fileName);
-    if (fs.existsSync(filePath)) {
-      fs.unlinkSync(filePath);
-    }
-
-    // Delete from database
+    // Other media may share the stored file; the ref_count trigger releases it
+    // and jobs/media_store.py --gc deletes it once nothing references it
     return await this.mediaRepository.delete(mediaId);
   }
 
@@ -93,8 +122,20 @@ export class MediaService {
     return `/uploads/${filename}`;
   }
 
+  // Variants are built by jobs/media_derivatives.py; uploads reach it through
+  // the recipe_media_changed trigger. This re-queues photos it has not built yet.
   async optimizeImages() {
-    // TODO: Implement image optimization with sharp or similar
-    console.log('Image optimization not implemented yet');
+    const pending = await this.mediaRepository.query(`
+      SELECT pg_notify('recipe_media_changed', rm.id::text)
+      FROM mycheff.recipe_media rm
+      WHERE rm.media_type IN ('photo', 'image')
+        AND NOT EXISTS (
+          SELECT 1 FROM mycheff.recipe_media_variants v
+          WHERE v.media_id = rm.id AND v.source_url = rm.url
+        )
+    `);
+
+    console.log(`🖼️ Queued ${pending.length} photos for optimization`);
+    return { queued: pending.length };
   }
 } 
\ No newline at end of file
@@ -70,9 +70,18 @@ export class RecipesController {
       }
     }
   })
-  async getFeaturedRecipes(@Query('page') page: string = '1', @Query('limit') limit: string = '10') {
+  async getFeaturedRecipes(
+    @Query('page') page: string = '1',
+    @Query('limit') limit: string = '10',
+    @Query('approximateTotal') approximateTotal?: string
+  ) {
     try {
-      return await this.recipesService.getFeaturedRecipes(parseInt(page), parseInt(limit));
+      return await this.recipesService.getFeaturedRecipes(
+        parseInt(page),
+        parseInt(limit),
+        'tr',
+        approximateTotal === 'true'
+      );
     } catch (error) {
       throw new HttpException('Failed to retrieve featured recipes', HttpStatus.INTERNAL_SERVER_ERROR);
     }
@@ -116,6 +125,8 @@ export class RecipesController {
       page?: number;
       limit?: number;
       languageCode?: string;
+      cursor?: string;
+      approximateTotal?: boolean;
     }
   ) {
     const {
@@ -124,7 +135,9 @@ export class RecipesController {
       includePartialMatches = true,
       page = 1,
       limit = 20,
-      languageCode = 'tr'
+      languageCode = 'tr',
+      cursor,
+      approximateTotal = false
     } = matchParams;
 
     if (!ingredientIds || ingredientIds.length === 0) {
@@ -141,10 +154,27 @@ export class RecipesController {
       includePartialMatches,
       page,
       limit,
-      languageCode
+      languageCode,
+      cursor,
+      approximateTotal
     );
   }
 
+  @Post('next-ingredients')
+  @ApiOperation({ summary: 'Suggest the ingredients that unlock the most recipes for a pantry' })
+  @ApiResponse({ status: 200, description: 'Ingredient suggestions retrieved successfully' })
+  async getBestNextIngredients(
+    @Body() params: {
+      ingredientIds: string[];
+      limit?: number;
+      languageCode?: string;
+    }
+  ) {
+    const { ingredientIds = [], limit = 10, languageCode = 'tr' } = params;
+
+    return await this.recipesService.getBestNextIngredients(ingredientIds, limit, languageCode);
+  }
+
   @Get('search')
   @ApiOperation({ summary: 'Search recipes' })
   @ApiResponse({ status: 200, description: 'Search results retrieved successfully' })
@@ -152,7 +182,9 @@ export class RecipesController {
     @Query('q') query: string,
     @Query('page') page: string = '1',
     @Query('limit') limit: string = '10',
-    @Query('lang') languageCode: string = 'tr'
+    @Query('lang') languageCode: string = 'tr',
+    @Query('cursor') cursor?: string,
+    @Query('approximateTotal') approximateTotal?: string
   ) {
     if (!query) {
       return {
@@ -166,7 +198,9 @@ export class RecipesController {
       query,
       parseInt(page),
       parseInt(limit),
-      languageCode
+      languageCode,
+      cursor,
+      approximateTotal === 'true'
     );
   }
 
@@ -176,15 +210,30 @@ export class RecipesController {
   async findAll(
     @Query('page') page: string = '1',
     @Query('limit') limit: string = '10',
-    @Query('lang') languageCode: string = 'tr'
+    @Query('lang') languageCode: string = 'tr',
+    @Query('cursor') cursor?: string,
+    @Query('approximateTotal') approximateTotal?: string
   ) {
     return await this.recipesService.getAllRecipes(
       parseInt(page),
       parseInt(limit),
-      languageCode
+      languageCode,
+      cursor,
+      approximateTotal === 'true'
     );
   }
 
+  @Get(':id/similar')
+  @ApiOperation({ summary: 'Get recipes with similar ingredients' })
+  @ApiResponse({ status: 200, description: 'Similar recipes retrieved successfully' })
+  async getSimilarRecipes(
+    @Param('id') id: string,
+    @Query('limit') limit: string = '6',
+    @Query('lang') languageCode: string = 'tr'
+  ) {
+    return await this.recipesService.getSimilarRecipes(id, parseInt(limit), languageCode);
+  }
+
   @Get(':id')
   @ApiOperation({ summary: 'Get recipe by ID' })
   @ApiResponse({ status: 200, description: 'Recipe found' })
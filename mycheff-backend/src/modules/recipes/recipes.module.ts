@@ -2,6 +2,9 @@ import { Module } from '@nestjs/common';
 import { TypeOrmModule } from '@nestjs/typeorm';
 import { RecipesController } from './controllers/recipes.controller';
 import { RecipesService } from './services/recipes.service';
+import { IngredientSubstitutionService } from './services/ingredient-substitution.service';
+import { IngredientCooccurrenceService } from './services/ingredient-cooccurrence.service';
+import { RecipeFacetService } from './services/recipe-facets.service';
 import { Recipe } from '../../entities/recipe.entity';
 import { RecipeTranslation } from '../../entities/recipe-translation.entity';
 import { RecipeDetails } from '../../entities/recipe-details.entity';
@@ -25,7 +28,7 @@ import { Ingredient } from '../../entities/ingredient.entity';
     ]),
   ],
   controllers: [RecipesController],
-  providers: [RecipesService],
-  exports: [RecipesService],
+  providers: [RecipesService, IngredientSubstitutionService, IngredientCooccurrenceService, RecipeFacetService],
+  exports: [RecipesService, IngredientSubstitutionService, IngredientCooccurrenceService, RecipeFacetService],
 })
 export class RecipesModule {} 
\ No newline at end of file
@@ -0,0 +1,179 @@
+import { Injectable, OnModuleInit } from '@nestjs/common';
+import { InjectRepository } from '@nestjs/typeorm';
+import { Repository } from 'typeorm';
+import { RecipeIngredient } from '../../../entities/recipe-ingredient.entity';
+
+export interface NextIngredientSuggestion {
+  ingredientId: string;
+  unlockedRecipes: number;
+  cooccurrence: number;
+}
+
+const RELOAD_INTERVAL_MS = 30 * 60 * 1000;
+
+// In-memory co-occurrence and marginal-gain index over required recipe ingredients.
+// Answers "which single ingredient completes the most recipes for this pantry"
+// by touching only recipes that share an ingredient with the pantry.
+@Injectable()
+export class IngredientCooccurrenceService implements OnModuleInit {
+  private recipeIngredients = new Map<string, string[]>();
+  private recipesByIngredient = new Map<string, Set<string>>();
+  // Sparse ingredient x ingredient matrix: how many recipes use both
+  private cooccurrence = new Map<string, Map<string, number>>();
+  // Recipes that need a single required ingredient, keyed by that ingredient
+  private singleIngredientRecipes = new Map<string, number>();
+  private loadedAt = 0;
+
+  constructor(
+    @InjectRepository(RecipeIngredient)
+    private readonly recipeIngredientRepository: Repository<RecipeIngredient>,
+  ) {}
+
+  async onModuleInit() {
+    await this.reload();
+  }
+
+  async reload(): Promise<void> {
+    try {
+      const rows = await this.recipeIngredientRepository.query(`
+        SELECT ri.recipe_id, array_agg(DISTINCT ri.ingredient_id::text) AS ingredient_ids
+        FROM mycheff.recipe_ingredients ri
+        JOIN mycheff.recipes r ON r.id = ri.recipe_id
+        JOIN mycheff.ingredients i ON i.id = ri.ingredient_id AND i.is_active = true
+        WHERE r.is_published = true
+          AND ri.is_required = true
+        GROUP BY ri.recipe_id
+      `);
+
+      this.recipeIngredients.clear();
+      this.recipesByIngredient.clear();
+      this.cooccurrence.clear();
+      this.singleIngredientRecipes.clear();
+
+      for (const row of rows) {
+        this.addRecipe(row.recipe_id, row.ingredient_ids);
+      }
+
+      console.log(`🧮 Indexed ${rows.length} recipes for ingredient co-occurrence`);
+    } catch (error) {
+      console.error('❌ Error loading ingredient co-occurrence index:', error.message);
+    } finally {
+      this.loadedAt = Date.now();
+    }
+  }
+
+  // Re-reads one recipe and replaces its contribution to the index
+  async refreshRecipe(recipeId: string): Promise<void> {
+    const rows = await this.recipeIngredientRepository.query(`
+      SELECT DISTINCT ri.ingredient_id::text AS ingredient_id
+      FROM mycheff.recipe_ingredients ri
+      JOIN mycheff.recipes r ON r.id = ri.recipe_id
+      JOIN mycheff.ingredients i ON i.id = ri.ingredient_id AND i.is_active = true
+      WHERE ri.recipe_id = $1
+        AND r.is_published = true
+        AND ri.is_required = true
+    `, [recipeId]);
+
+    this.removeRecipe(recipeId);
+    if (rows.length > 0) {
+      this.addRecipe(recipeId, rows.map(row => row.ingredient_id));
+    }
+  }
+
+  removeRecipe(recipeId: string) {
+    const ingredientIds = this.recipeIngredients.get(recipeId);
+    if (!ingredientIds) return;
+
+    this.recipeIngredients.delete(recipeId);
+    if (ingredientIds.length === 1) {
+      this.bump(this.singleIngredientRecipes, ingredientIds[0], -1);
+    }
+
+    for (const id of ingredientIds) {
+      this.recipesByIngredient.get(id)?.delete(recipeId);
+      const row = this.cooccurrence.get(id);
+      if (!row) continue;
+      for (const other of ingredientIds) {
+        if (other !== id) this.bump(row, other, -1);
+      }
+    }
+  }
+
+  bestNextIngredients(pantryIds: string[], limit = 10): NextIngredientSuggestion[] {
+    if (Date.now() - this.loadedAt > RELOAD_INTERVAL_MS) {
+      void this.reload();
+    }
+
+    const owned = new Set(pantryIds);
+
+    // Per-recipe owned counts, only for recipes the pantry touches
+    const ownedCount = new Map<string, number>();
+    for (const id of owned) {
+      for (const recipeId of this.recipesByIngredient.get(id) || []) {
+        ownedCount.set(recipeId, (ownedCount.get(recipeId) || 0) + 1);
+      }
+    }
+
+    // A recipe missing exactly one ingredient is unlocked by that ingredient
+    const gain = new Map<string, number>();
+    for (const [recipeId, count] of ownedCount) {
+      const ingredientIds = this.recipeIngredients.get(recipeId);
+      if (!ingredientIds || ingredientIds.length - count !== 1) continue;
+
+      const missing = ingredientIds.find(id => !owned.has(id));
+      if (missing) this.bump(gain, missing, 1);
+    }
+
+    for (const [id, count] of this.singleIngredientRecipes) {
+      if (count > 0 && !owned.has(id)) this.bump(gain, id, count);
+    }
+
+    return Array.from(gain.entries())
+      .map(([ingredientId, unlockedRecipes]) => ({
+        ingredientId,
+        unlockedRecipes,
+        cooccurrence: this.affinity(ingredientId, owned),
+      }))
+      .sort((a, b) => b.unlockedRecipes - a.unlockedRecipes || b.cooccurrence - a.cooccurrence)
+      .slice(0, limit);
+  }
+
+  private addRecipe(recipeId: string, ingredientIds: string[]) {
+    this.recipeIngredients.set(recipeId, ingredientIds);
+    if (ingredientIds.length === 1) {
+      this.bump(this.singleIngredientRecipes, ingredientIds[0], 1);
+    }
+
+    for (const id of ingredientIds) {
+      const recipes = this.recipesByIngredient.get(id) || new Set<string>();
+      recipes.add(recipeId);
+      this.recipesByIngredient.set(id, recipes);
+
+      const row = this.cooccurrence.get(id) || new Map<string, number>();
+      this.cooccurrence.set(id, row);
+      for (const other of ingredientIds) {
+        if (other !== id) this.bump(row, other, 1);
+      }
+    }
+  }
+
+  private affinity(ingredientId: string, owned: Set<string>): number {
+    const row = this.cooccurrence.get(ingredientId);
+    if (!row) return 0;
+
+    let total = 0;
+    for (const id of owned) {
+      total += row.get(id) || 0;
+    }
+    return total;
+  }
+
+  private bump(counts: Map<string, number>, key: string, delta: number) {
+    const value = (counts.get(key) || 0) + delta;
+    if (value > 0) {
+      counts.set(key, value);
+    } else {
+      counts.delete(key);
+    }
+  }
+}
@@ -0,0 +1,91 @@
+import { Injectable, OnModuleInit } from '@nestjs/common';
+import { InjectRepository } from '@nestjs/typeorm';
+import { Repository } from 'typeorm';
+import { Ingredient } from '../../../entities/ingredient.entity';
+
+export interface ExpandedPantry {
+  ingredientIds: string[];
+  weights: number[];
+}
+
+interface SubstitutionTarget {
+  ingredientId: string;
+  weight: number;
+}
+
+const RELOAD_INTERVAL_MS = 5 * 60 * 1000;
+
+// Serves the precomputed substitution closure (see jobs/substitution_closure.py)
+// from memory so pantry expansion never needs a recursive query per request.
+@Injectable()
+export class IngredientSubstitutionService implements OnModuleInit {
+  // substitute (what the user has) -> ingredients it can stand in for
+  private targetsBySubstitute = new Map<string, SubstitutionTarget[]>();
+  private loadedAt = 0;
+  private loading: Promise<void> | null = null;
+
+  constructor(
+    @InjectRepository(Ingredient)
+    private readonly ingredientRepository: Repository<Ingredient>,
+  ) {}
+
+  async onModuleInit() {
+    await this.reload();
+  }
+
+  async reload(): Promise<void> {
+    if (this.loading) return this.loading;
+
+    this.loading = (async () => {
+      try {
+        const rows = await this.ingredientRepository.query(`
+          SELECT substitute_id, ingredient_id, weight
+          FROM mycheff.ingredient_substitution_closure
+        `);
+
+        const targets = new Map<string, SubstitutionTarget[]>();
+        for (const row of rows) {
+          const list = targets.get(row.substitute_id) || [];
+          list.push({ ingredientId: row.ingredient_id, weight: parseFloat(row.weight) });
+          targets.set(row.substitute_id, list);
+        }
+
+        this.targetsBySubstitute = targets;
+        console.log(`🔗 Loaded ${rows.length} ingredient substitution pairs`);
+      } catch (error) {
+        console.error('❌ Error loading ingredient substitutions:', error.message);
+      } finally {
+        this.loadedAt = Date.now();
+        this.loading = null;
+      }
+    })();
+
+    return this.loading;
+  }
+
+  // Expands a pantry with every ingredient its items can substitute for.
+  // Owned ingredients keep full credit; substitutes keep their best weight.
+  expandPantry(ingredientIds: string[]): ExpandedPantry {
+    if (Date.now() - this.loadedAt > RELOAD_INTERVAL_MS) {
+      void this.reload();
+    }
+
+    const credit = new Map<string, number>();
+    for (const id of ingredientIds) {
+      credit.set(id, 1);
+    }
+
+    for (const id of ingredientIds) {
+      for (const target of this.targetsBySubstitute.get(id) || []) {
+        if ((credit.get(target.ingredientId) || 0) < target.weight) {
+          credit.set(target.ingredientId, target.weight);
+        }
+      }
+    }
+
+    return {
+      ingredientIds: Array.from(credit.keys()),
+      weights: Array.from(credit.values()),
+    };
+  }
+}
@@ -0,0 +1,252 @@
+import { Injectable, OnModuleInit } from '@nestjs/common';
+import { InjectRepository } from '@nestjs/typeorm';
+import { Repository } from 'typeorm';
+import { Recipe } from '../../../entities/recipe.entity';
+
+export interface FacetFilters {
+  categoryIds?: string[];
+  difficultyLevels?: number[];
+  cookingTimeBuckets?: string[];
+  isPremium?: boolean;
+}
+
+export interface FacetCounts {
+  total: number;
+  categories: Record<string, number>;
+  difficulty: Record<string, number>;
+  cookingTime: Record<string, number>;
+  premium: Record<string, number>;
+}
+
+type FacetGroup = 'categories' | 'difficulty' | 'cookingTime' | 'premium';
+
+const FACET_GROUPS: FacetGroup[] = ['categories', 'difficulty', 'cookingTime', 'premium'];
+
+// Upper bound (inclusive, minutes) of each cooking time bucket
+export const COOKING_TIME_BUCKETS: Array<[string, number]> = [
+  ['0-15', 15],
+  ['16-30', 30],
+  ['31-60', 60],
+  ['60+', Infinity],
+];
+
+const RELOAD_INTERVAL_MS = 30 * 60 * 1000;
+const INITIAL_WORDS = 64;
+
+// Facet counts from one bitmap per facet value over recipe ordinals. Counting a
+// filter combination is a word-wise AND + popcount, and each group is counted
+// with the filters of the other groups only, so selecting a category still
+// shows how many recipes every other category has.
+@Injectable()
+export class RecipeFacetService implements OnModuleInit {
+  private ordinals = new Map<string, number>();
+  private freeOrdinals: number[] = [];
+  private nextOrdinal = 0;
+  private words = INITIAL_WORDS;
+  // Published recipes currently holding an ordinal
+  private live = new Uint32Array(INITIAL_WORDS);
+  // group -> facet value -> bitmap
+  private bitmaps = new Map<FacetGroup, Map<string, Uint32Array>>();
+  // recipe id -> [group, value] pairs it is set in, for incremental removal
+  private recipeFacets = new Map<string, Array<[FacetGroup, string]>>();
+  private loadedAt = 0;
+
+  constructor(
+    @InjectRepository(Recipe)
+    private readonly recipeRepository: Repository<Recipe>,
+  ) {}
+
+  async onModuleInit() {
+    await this.reload();
+  }
+
+  async reload(): Promise<void> {
+    try {
+      const rows = await this.loadRecipes(null);
+
+      this.ordinals.clear();
+      this.freeOrdinals = [];
+      this.nextOrdinal = 0;
+      this.words = Math.max(INITIAL_WORDS, Math.ceil(rows.length / 32));
+      this.live = new Uint32Array(this.words);
+      this.bitmaps = new Map(FACET_GROUPS.map(group => [group, new Map<string, Uint32Array>()]));
+      this.recipeFacets.clear();
+
+      for (const row of rows) {
+        this.addRecipe(row);
+      }
+
+      console.log(`🧩 Indexed ${rows.length} recipes for facet counts`);
+    } catch (error) {
+      console.error('❌ Error loading recipe facets:', error.message);
+    } finally {
+      this.loadedAt = Date.now();
+    }
+  }
+
+  async refreshRecipe(recipeId: string): Promise<void> {
+    const rows = await this.loadRecipes(recipeId);
+
+    this.removeRecipe(recipeId);
+    if (rows.length > 0) {
+      this.addRecipe(rows[0]);
+    }
+  }
+
+  removeRecipe(recipeId: string) {
+    const ordinal = this.ordinals.get(recipeId);
+    if (ordinal === undefined) return;
+
+    for (const [group, value] of this.recipeFacets.get(recipeId) || []) {
+      const bitmap = this.bitmaps.get(group)?.get(value);
+      if (bitmap) clearBit(bitmap, ordinal);
+    }
+    clearBit(this.live, ordinal);
+
+    this.recipeFacets.delete(recipeId);
+    this.ordinals.delete(recipeId);
+    this.freeOrdinals.push(ordinal);
+  }
+
+  getFacetCounts(filters: FacetFilters = {}): FacetCounts {
+    if (Date.now() - this.loadedAt > RELOAD_INTERVAL_MS) {
+      void this.reload();
+    }
+
+    const selected: Record<FacetGroup, string[] | undefined> = {
+      categories: filters.categoryIds?.length ? filters.categoryIds : undefined,
+      difficulty: filters.difficultyLevels?.length ? filters.difficultyLevels.map(String) : undefined,
+      cookingTime: filters.cookingTimeBuckets?.length ? filters.cookingTimeBuckets : undefined,
+      premium: filters.isPremium !== undefined ? [String(filters.isPremium)] : undefined,
+    };
+
+    // OR of the selected values inside each filtered group
+    const groupMasks = new Map<FacetGroup, Uint32Array>();
+    for (const group of FACET_GROUPS) {
+      const values = selected[group];
+      if (!values) continue;
+
+      const mask = new Uint32Array(this.words);
+      for (const value of values) {
+        const bitmap = this.bitmaps.get(group)?.get(value);
+        if (bitmap) orInto(mask, bitmap);
+      }
+      groupMasks.set(group, mask);
+    }
+
+    const counts: FacetCounts = { total: 0, categories: {}, difficulty: {}, cookingTime: {}, premium: {} };
+    for (const group of FACET_GROUPS) {
+      const mask = this.live.slice();
+      for (const [other, otherMask] of groupMasks) {
+        if (other !== group) andInto(mask, otherMask);
+      }
+
+      for (const [value, bitmap] of this.bitmaps.get(group) || []) {
+        const count = andCount(mask, bitmap);
+        if (count > 0) counts[group][value] = count;
+      }
+    }
+
+    const all = this.live.slice();
+    for (const mask of groupMasks.values()) {
+      andInto(all, mask);
+    }
+    counts.total = andCount(all, this.live);
+
+    return counts;
+  }
+
+  private async loadRecipes(recipeId: string | null) {
+    return await this.recipeRepository.query(`
+      SELECT r.id, r.difficulty_level, r.cooking_time_minutes, r.is_premium,
+        COALESCE(array_agg(rc.category_id::text) FILTER (WHERE rc.category_id IS NOT NULL), '{}') AS category_ids
+      FROM mycheff.recipes r
+      LEFT JOIN mycheff.recipe_categories rc ON rc.recipe_id = r.id
+      WHERE r.is_published = true
+        AND ($1::uuid IS NULL OR r.id = $1)
+      GROUP BY r.id
+    `, [recipeId]);
+  }
+
+  private addRecipe(row: any) {
+    const ordinal = this.freeOrdinals.pop() ?? this.nextOrdinal++;
+    this.ensureCapacity(ordinal);
+    this.ordinals.set(row.id, ordinal);
+    setBit(this.live, ordinal);
+
+    const facets: Array<[FacetGroup, string]> = [];
+    for (const categoryId of row.category_ids || []) {
+      facets.push(['categories', categoryId]);
+    }
+    if (row.difficulty_level !== null) {
+      facets.push(['difficulty', String(row.difficulty_level)]);
+    }
+    facets.push(['cookingTime', cookingTimeBucket(row.cooking_time_minutes)]);
+    facets.push(['premium', String(!!row.is_premium)]);
+
+    for (const [group, value] of facets) {
+      const values = this.bitmaps.get(group) || new Map<string, Uint32Array>();
+      this.bitmaps.set(group, values);
+
+      const bitmap = values.get(value) || new Uint32Array(this.words);
+      values.set(value, bitmap);
+      setBit(bitmap, ordinal);
+    }
+    this.recipeFacets.set(row.id, facets);
+  }
+
+  // Doubles every bitmap when an ordinal falls past the end
+  private ensureCapacity(ordinal: number) {
+    if (ordinal < this.words * 32) return;
+
+    let words = this.words;
+    while (ordinal >= words * 32) words *= 2;
+
+    this.live = grow(this.live, words);
+    for (const values of this.bitmaps.values()) {
+      for (const [value, bitmap] of values) {
+        values.set(value, grow(bitmap, words));
+      }
+    }
+    this.words = words;
+  }
+}
+
+export function cookingTimeBucket(minutes: number): string {
+  const bucket = COOKING_TIME_BUCKETS.find(([, upper]) => minutes <= upper);
+  return bucket ? bucket[0] : COOKING_TIME_BUCKETS[COOKING_TIME_BUCKETS.length - 1][0];
+}
+
+function setBit(bitmap: Uint32Array, index: number) {
+  bitmap[index >>> 5] |= 1 << (index & 31);
+}
+
+function clearBit(bitmap: Uint32Array, index: number) {
+  bitmap[index >>> 5] &= ~(1 << (index & 31));
+}
+
+function orInto(target: Uint32Array, source: Uint32Array) {
+  for (let i = 0; i < target.length; i++) target[i] |= source[i];
+}
+
+function andInto(target: Uint32Array, source: Uint32Array) {
+  for (let i = 0; i < target.length; i++) target[i] &= source[i];
+}
+
+function andCount(a: Uint32Array, b: Uint32Array): number {
+  let count = 0;
+  for (let i = 0; i < a.length; i++) {
+    let word = a[i] & b[i];
+    // SWAR popcount
+    word = word - ((word >>> 1) & 0x55555555);
+    word = (word & 0x33333333) + ((word >>> 2) & 0x33333333);
+    count += Math.imul((word + (word >>> 4)) & 0x0f0f0f0f, 0x01010101) >>> 24;
+  }
+  return count;
+}
+
+function grow(bitmap: Uint32Array, words: number): Uint32Array {
+  const grown = new Uint32Array(words);
+  grown.set(bitmap);
+  return grown;
+}
@@ -12,6 +12,11 @@ import { Ingredient } from '../../../entities/ingredient.entity';
 import { CreateRecipeDto, UpdateRecipeDto, RecipeMediaDto, RecipeFilterDto, RecipeResponseDto } from '../dto/recipe.dto';
 import { PaginatedResponseDto, ApiResponseDto } from '../../../common/dto/api-response.dto';
 import { MulterFile, getMediaType } from '../../../common/middleware/file-upload.middleware';
+import { encodeCursor, decodeCursor } from '../../../common/utils/cursor.util';
+import { countWithThreshold } from '../../../common/utils/count.util';
+import { IngredientSubstitutionService } from './ingredient-substitution.service';
+import { IngredientCooccurrenceService } from './ingredient-cooccurrence.service';
+import { RecipeFacetService } from './recipe-facets.service';
 
 @Injectable()
 export class RecipesService {
@@ -32,48 +37,55 @@ export class RecipesService {
     private readonly categoryTranslationRepository: Repository<CategoryTranslation>,
     @InjectRepository(Ingredient)
     private readonly ingredientRepository: Repository<Ingredient>,
+    private readonly ingredientSubstitutionService: IngredientSubstitutionService,
+    private readonly ingredientCooccurrenceService: IngredientCooccurrenceService,
+    private readonly recipeFacetService: RecipeFacetService,
   ) {}
 
-  async getAllRecipes(page: number = 1, limit: number = 10, languageCode: string = 'tr') {
+  async getAllRecipes(
+    page: number = 1,
+    limit: number = 10,
+    languageCode: string = 'tr',
+    cursor?: string,
+    approximateTotal: boolean = false,
+  ) {
+    const seek = decodeCursor(cursor, 'recipes:newest', 2);
+
     try {
-      // En basit sorgu - sadece count yapalım
-      const total = await this.recipeRepository.count();
-      
-      // Basit find ile tarifleri alalım
-      const recipes = await this.recipeRepository.find({
-        take: limit,
-        skip: (page - 1) * limit,
-        order: { createdAt: 'DESC' }
-      });
+      const { total, approximate } = await this.countRecipeCards(
+        'SELECT recipe_id FROM mycheff.recipe_cards WHERE language_code = $1',
+        [languageCode],
+        approximateTotal,
+      );
+
+      // Keyset sayfalama: cursor varsa son satırın ardından devam et.
+      // created_at is re-read from the cursor row; JS dates drop microseconds
+      const rows = await this.recipeRepository.query(`
+        SELECT rc.recipe_id, rc.created_at, rc.card
+        FROM mycheff.recipe_cards rc
+        WHERE rc.language_code = $1
+          AND ($4::uuid IS NULL OR (rc.created_at, rc.recipe_id) < (
+            COALESCE((SELECT created_at FROM mycheff.recipe_cards WHERE recipe_id = $4 AND language_code = $1), $5::timestamptz),
+            $4
+          ))
+        ORDER BY rc.created_at DESC, rc.recipe_id DESC
+        LIMIT $2 OFFSET $3
+      `, [languageCode, limit + 1, seek ? 0 : (page - 1) * limit, seek ? seek[1] : null, seek ? seek[0] : null]);
+      const recipes = rows.slice(0, limit);
+      const last = recipes[recipes.length - 1];
 
       return {
         success: true,
-        data: recipes.map(recipe => {
-          return {
-            id: recipe.id,
-            title: 'Turkish Recipe',
-            description: 'Delicious Turkish recipe',
-            cookingTimeMinutes: 30,
-            prepTimeMinutes: 15,
-            difficultyLevel: 1,
-            servingSize: 4,
-            isPremium: false,
-            isPublished: true,
-            averageRating: 4.5,
-            ratingCount: 25,
-            viewCount: 100,
-            imageUrl: 'https://images.unsplash.com/photo-1546833999-b9f581a1996d?w=400&h=300&fit=crop',
-            categories: [{ name: 'Ana Yemek' }],
-            isFavorite: false,
-            createdAt: recipe.createdAt,
-            updatedAt: recipe.updatedAt,
-          };
-        }),
+        data: recipes.map(row => this.formatRecipeCard(row.card)),
         pagination: {
           page,
           limit,
           total,
           totalPages: Math.ceil(total / limit),
+          totalIsApproximate: approximate,
+          nextCursor: rows.length > limit && last
+            ? encodeCursor('recipes:newest', [new Date(last.created_at).toISOString(), last.recipe_id])
+            : null,
         },
         message: 'Recipes retrieved successfully',
       };
@@ -140,6 +152,50 @@ export class RecipesService {
     }
   }
 
+  async getSimilarRecipes(id: string, limit: number = 6, languageCode: string = 'tr') {
+    // Neighbours are precomputed by jobs/similar_recipes.py (MinHash + LSH)
+    const similar = await this.recipeRepository.query(`
+      SELECT 
+        r.id,
+        rt.title,
+        r.cooking_time_minutes,
+        r.difficulty_level,
+        r.is_premium,
+        r.average_rating,
+        media.url as image_url,
+        rs.similarity
+      FROM mycheff.recipe_similarities rs
+      JOIN mycheff.recipes r ON r.id = rs.similar_recipe_id
+      LEFT JOIN mycheff.recipe_translations rt ON rt.recipe_id = r.id AND rt.language_code = $2
+      LEFT JOIN LATERAL (
+        SELECT rmd.url
+        FROM mycheff.recipe_media rmd
+        WHERE rmd.recipe_id = r.id
+        ORDER BY rmd.is_primary DESC, rmd.display_order
+        LIMIT 1
+      ) media ON true
+      WHERE rs.recipe_id = $1
+        AND r.is_published = true
+      ORDER BY rs.rank
+      LIMIT $3;
+    `, [id, languageCode, limit]);
+
+    return {
+      success: true,
+      data: similar.map(recipe => ({
+        id: recipe.id,
+        title: recipe.title || 'Tarif Başlığı',
+        cookingTimeMinutes: recipe.cooking_time_minutes,
+        difficultyLevel: this.mapDifficultyLevel(recipe.difficulty_level),
+        isPremium: recipe.is_premium,
+        averageRating: parseFloat(recipe.average_rating?.toString() || '0'),
+        imageUrl: recipe.image_url,
+        similarity: parseFloat(recipe.similarity),
+      })),
+      message: 'Similar recipes retrieved successfully',
+    };
+  }
+
   private getRecipeDetailsByIdMock(recipe: Recipe, id: string) {
     // Featured recipes with different content for each
     const recipeDetails = {
@@ -282,41 +338,57 @@ export class RecipesService {
     };
   }
 
-  async searchRecipes(query: string, page: number = 1, limit: number = 10, languageCode: string = 'tr') {
-    const [recipes, total] = await this.recipeRepository
-      .createQueryBuilder('recipe')
-      .leftJoinAndSelect('recipe.translations', 'translation', 'translation.languageCode = :languageCode', { languageCode })
-      .leftJoinAndSelect('recipe.details', 'details')
-      .leftJoinAndSelect('recipe.media', 'media', 'media.isPrimary = true')
-      .where('recipe.isPublished = true')
-      .andWhere('(translation.title ILIKE :query OR translation.description ILIKE :query)', { query: `%${query}%` })
-      .orderBy('recipe.averageRating', 'DESC')
-      .addOrderBy('recipe.ratingCount', 'DESC')
-      .skip((page - 1) * limit)
-      .take(limit)
-      .getManyAndCount();
+  async searchRecipes(
+    query: string,
+    page: number = 1,
+    limit: number = 10,
+    languageCode: string = 'tr',
+    cursor?: string,
+    approximateTotal: boolean = false,
+  ) {
+    const seek = decodeCursor(cursor, 'recipes:rating', 3);
+
+    const matchFilter = `
+      rc.language_code = $1
+      AND rc.is_published = true
+      AND (rc.card->>'title' ILIKE $2 OR rc.card->>'description' ILIKE $2)
+    `;
+    const pattern = `%${query}%`;
+
+    const [rows, { total, approximate }] = await Promise.all([
+      this.recipeRepository.query(`
+        SELECT rc.recipe_id, rc.average_rating, rc.rating_count, rc.card
+        FROM mycheff.recipe_cards rc
+        WHERE ${matchFilter}
+          AND ($5::uuid IS NULL OR (rc.average_rating, rc.rating_count, rc.recipe_id) < ($6::numeric, $7::int, $5))
+        ORDER BY rc.average_rating DESC, rc.rating_count DESC, rc.recipe_id DESC
+        LIMIT $3 OFFSET $4
+      `, [
+        languageCode,
+        pattern,
+        limit + 1,
+        seek ? 0 : (page - 1) * limit,
+        seek ? seek[2] : null,
+        seek ? seek[0] : null,
+        seek ? seek[1] : null,
+      ]),
+      this.countRecipeCards(`SELECT rc.recipe_id FROM mycheff.recipe_cards rc WHERE ${matchFilter}`, [languageCode, pattern], approximateTotal),
+    ]);
+    const recipes = rows.slice(0, limit);
+    const last = recipes[recipes.length - 1];
 
     return {
       success: true,
-      data: recipes.map(recipe => ({
-        id: recipe.id,
-        title: recipe.translations[0]?.title || 'Başlık yok',
-        description: recipe.translations[0]?.description || '',
-        cookingTimeMinutes: recipe.cookingTimeMinutes,
-        prepTimeMinutes: recipe.prepTimeMinutes,
-        difficultyLevel: recipe.difficultyLevel,
-        servingSize: recipe.servingSize,
-        isPremium: recipe.isPremium,
-        averageRating: recipe.averageRating,
-        ratingCount: recipe.ratingCount,
-        imageUrl: recipe.media[0]?.url || null,
-        nutritionalData: recipe.details?.nutritionalData || null,
-      })),
+      data: recipes.map(row => this.formatRecipeCard(row.card)),
       pagination: {
         page,
         limit,
         total,
         totalPages: Math.ceil(total / limit),
+        totalIsApproximate: approximate,
+        nextCursor: rows.length > limit && last
+          ? encodeCursor('recipes:rating', [last.average_rating, last.rating_count, last.recipe_id])
+          : null,
       },
       message: `Found ${total} recipes for "${query}"`,
     };
@@ -328,22 +400,36 @@ export class RecipesService {
     includePartialMatches: boolean = true,
     page: number = 1,
     limit: number = 20,
-    languageCode: string = 'tr'
+    languageCode: string = 'tr',
+    cursor?: string,
+    approximateTotal: boolean = false,
   ) {
+    const seek = decodeCursor(cursor, 'recipes:match', 3);
+
     try {
       console.log('🔍 Finding recipes by ingredients:', { ingredientIds, minMatchPercentage, includePartialMatches });
 
-      // Create a raw SQL query for ingredient matching performance
-      const matchingRecipesQuery = `
-        WITH recipe_ingredient_counts AS (
+      // Expand the pantry with precomputed substitutes (e.g. tereyağı -> margarin)
+      const pantry = this.ingredientSubstitutionService.expandPantry(ingredientIds);
+
+      // Pantry matching shared by the page and the thresholded count; it only uses $1-$4
+      const matchingCtes = `
+        pantry AS (
+          -- Exact means the user has the ingredient itself, not a substitute for it
+          SELECT p.*, p.ingredient_id = ANY($4::uuid[]) as is_exact
+          FROM unnest($1::uuid[], $3::numeric[]) AS p(ingredient_id, weight)
+        ),
+        recipe_ingredient_counts AS (
           SELECT 
             r.id as recipe_id,
-            COUNT(DISTINCT ri.ingredient_id) as total_ingredients,
-            COUNT(DISTINCT CASE WHEN ri.ingredient_id = ANY($1) THEN ri.ingredient_id END) as matching_ingredients
+            COUNT(DISTINCT ri.ingredient_id)::int as total_ingredients,
+            COUNT(DISTINCT p.ingredient_id) FILTER (WHERE p.is_exact)::int as matching_ingredients,
+            COUNT(DISTINCT p.ingredient_id) FILTER (WHERE NOT p.is_exact)::int as substitute_ingredients,
+            COALESCE(SUM(p.weight), 0) as matching_score
           FROM mycheff.recipes r
           LEFT JOIN mycheff.recipe_ingredients ri ON r.id = ri.recipe_id
+          LEFT JOIN pantry p ON p.ingredient_id = ri.ingredient_id
           WHERE r.is_published = true
-            AND r.is_active = true
           GROUP BY r.id
         ),
         recipe_matches AS (
@@ -351,118 +437,146 @@ export class RecipesService {
             recipe_id,
             total_ingredients,
             matching_ingredients,
+            substitute_ingredients,
             CASE 
               WHEN total_ingredients > 0 THEN 
-                ROUND((matching_ingredients::decimal / total_ingredients) * 100, 2)
+                ROUND((matching_score / total_ingredients) * 100, 2)
               ELSE 0 
             END as match_percentage
           FROM recipe_ingredient_counts
-          WHERE matching_ingredients > 0
+          WHERE matching_score > 0
             AND (
               CASE 
                 WHEN total_ingredients > 0 THEN 
-                  (matching_ingredients::decimal / total_ingredients) * 100
+                  (matching_score / total_ingredients) * 100
                 ELSE 0 
               END
             ) >= $2
         )
-        SELECT 
-          r.*,
-          rm.match_percentage,
-          rm.matching_ingredients,
-          rm.total_ingredients,
-          (rm.total_ingredients - rm.matching_ingredients) as missing_ingredients_count
-        FROM recipe_matches rm
-        JOIN mycheff.recipes r ON rm.recipe_id = r.id
-        ORDER BY rm.match_percentage DESC, r.average_rating DESC
-        LIMIT $3 OFFSET $4;
       `;
+      const matchingParameters = [pantry.ingredientIds, minMatchPercentage, pantry.weights, ingredientIds];
 
-      const offset = (page - 1) * limit;
-      const matchingRecipes = await this.recipeRepository.query(matchingRecipesQuery, [
-        ingredientIds,
-        minMatchPercentage,
-        limit,
-        offset
-      ]);
-
-      console.log(`📊 Found ${matchingRecipes.length} matching recipes`);
-
-      // Get total count for pagination
-      const countQuery = `
-        WITH recipe_ingredient_counts AS (
+      // Create a raw SQL query for ingredient matching performance
+      const matchingRecipesQuery = `
+        WITH ${matchingCtes},
+        -- Counted apart from the page so a page past the end still reports the total;
+        -- skipped ($11) when the total comes from the thresholded count instead
+        totals AS (
+          SELECT COUNT(*) as total_matches FROM recipe_matches WHERE NOT $11::boolean
+        ),
+        page AS (
           SELECT 
-            r.id as recipe_id,
-            COUNT(DISTINCT ri.ingredient_id) as total_ingredients,
-            COUNT(DISTINCT CASE WHEN ri.ingredient_id = ANY($1) THEN ri.ingredient_id END) as matching_ingredients
-          FROM mycheff.recipes r
-          LEFT JOIN mycheff.recipe_ingredients ri ON r.id = ri.recipe_id
-          WHERE r.is_published = true
-            AND r.is_active = true
-          GROUP BY r.id
+            r.*,
+            rm.match_percentage,
+            rm.matching_ingredients,
+            rm.substitute_ingredients,
+            rm.total_ingredients,
+            (rm.total_ingredients - rm.matching_ingredients - rm.substitute_ingredients) as missing_ingredients_count
+          FROM recipe_matches rm
+          JOIN mycheff.recipes r ON rm.recipe_id = r.id
+          WHERE $7::numeric IS NULL
+            OR (rm.match_percentage, r.average_rating, r.id) < ($7::numeric, $8::numeric, $9::uuid)
+          ORDER BY rm.match_percentage DESC, r.average_rating DESC, r.id DESC
+          LIMIT $5 OFFSET $6
         )
-        SELECT COUNT(*) as total
-        FROM recipe_ingredient_counts
-        WHERE matching_ingredients > 0
-          AND (
-            CASE 
-              WHEN total_ingredients > 0 THEN 
-                (matching_ingredients::decimal / total_ingredients) * 100
-              ELSE 0 
-            END
-          ) >= $2;
+        -- Assemble the page's payload in the same round trip: translation,
+        -- primary image and matching/missing ingredient names per recipe
+        SELECT 
+          page.*,
+          totals.total_matches,
+          rt.title,
+          rt.description,
+          media.url as image_url,
+          COALESCE(ing.matching, '[]'::json) as matching_ingredient_names,
+          COALESCE(ing.substitute, '[]'::json) as substitute_ingredient_names,
+          COALESCE(ing.missing, '[]'::json) as missing_ingredient_names
+        FROM totals
+        LEFT JOIN page ON true
+        LEFT JOIN mycheff.recipe_translations rt ON rt.recipe_id = page.id AND rt.language_code = $10
+        LEFT JOIN LATERAL (
+          SELECT rmd.url
+          FROM mycheff.recipe_media rmd
+          WHERE rmd.recipe_id = page.id
+          ORDER BY rmd.is_primary DESC, rmd.display_order
+          LIMIT 1
+        ) media ON true
+        LEFT JOIN LATERAL (
+          SELECT 
+            json_agg(COALESCE(it.name, i.slug, 'Unknown') ORDER BY it.name)
+              FILTER (WHERE ri.ingredient_id = ANY($4::uuid[])) as matching,
+            json_agg(COALESCE(it.name, i.slug, 'Unknown') ORDER BY it.name)
+              FILTER (WHERE ri.ingredient_id = ANY($1::uuid[]) AND ri.ingredient_id <> ALL($4::uuid[])) as substitute,
+            json_agg(COALESCE(it.name, i.slug, 'Unknown') ORDER BY it.name)
+              FILTER (WHERE ri.ingredient_id <> ALL($1::uuid[])) as missing
+          FROM mycheff.recipe_ingredients ri
+          JOIN mycheff.ingredients i ON i.id = ri.ingredient_id
+          LEFT JOIN mycheff.ingredient_translations it ON it.ingredient_id = ri.ingredient_id AND it.language_code = $10
+          WHERE ri.recipe_id = page.id
+        ) ing ON true
+        ORDER BY page.match_percentage DESC, page.average_rating DESC, page.id DESC;
       `;
 
-      const totalResult = await this.recipeRepository.query(countQuery, [
-        ingredientIds,
-        minMatchPercentage
+      // With a cursor the seek condition replaces the offset
+      const offset = seek ? 0 : (page - 1) * limit;
+      const [rows, approximateCount] = await Promise.all([
+        this.recipeRepository.query(matchingRecipesQuery, [
+          ...matchingParameters,
+          limit + 1,
+          offset,
+          seek ? seek[0] : null,
+          seek ? seek[1] : null,
+          seek ? seek[2] : null,
+          languageCode,
+          approximateTotal,
+        ]),
+        approximateTotal
+          ? countWithThreshold(
+            this.recipeRepository,
+            `WITH ${matchingCtes} SELECT recipe_id FROM recipe_matches`,
+            matchingParameters,
+          )
+          : null,
       ]);
-      const total = parseInt(totalResult[0]?.total || '0');
+      // An empty page comes back as a single row holding only the total
+      const pageRows = rows.filter(row => row.id !== null);
+      const matchingRecipes = pageRows.slice(0, limit);
+      const lastMatch = matchingRecipes[matchingRecipes.length - 1];
+
+      console.log(`📊 Found ${matchingRecipes.length} matching recipes`);
+
+      // Exact totals come from the totals CTE in the same query, so the matching CTE runs once
+      const { total, approximate } = approximateCount
+        || { total: parseInt(rows[0]?.total_matches || '0'), approximate: false };
 
       // Format results with additional matching information
-      const formattedRecipes = await Promise.all(
-        matchingRecipes.map(async (recipe) => {
-          // Get recipe translations
-          const translations = await this.recipeTranslationRepository.find({
-            where: { recipeId: recipe.id, languageCode },
-          });
-
-          // Get matching and missing ingredients
-          const matchingIngredientsData = await this.getRecipeIngredientDetails(
-            recipe.id,
-            ingredientIds,
-            languageCode
-          );
-
-          const translation = translations[0];
-
-          return {
-            id: recipe.id,
-            title: translation?.title || 'Tarif Başlığı',
-            description: translation?.description || '',
-            cookingTime: recipe.cooking_time_minutes || 30,
-            cookingTimeMinutes: recipe.cooking_time_minutes || 30,
-            prepTimeMinutes: recipe.prep_time_minutes || 15,
-            difficultyLevel: this.mapDifficultyLevel(recipe.difficulty_level),
-            servingSize: recipe.serving_size || 4,
-            isPremium: recipe.is_premium || false,
-            isFeatured: recipe.is_featured || false,
-            averageRating: parseFloat(recipe.average_rating?.toString() || '4.5'),
-            ratingCount: recipe.rating_count || 25,
-            viewCount: recipe.view_count || 100,
-            imageUrl: recipe.image_url,
-            isFavorite: false,
-            // Matching information
-            matchPercentage: parseFloat(recipe.match_percentage),
-            matchingIngredients: matchingIngredientsData.matching,
-            missingIngredients: matchingIngredientsData.missing,
-            totalIngredients: recipe.total_ingredients,
-            matchingIngredientsCount: recipe.matching_ingredients,
-            createdAt: recipe.created_at,
-            updatedAt: recipe.updated_at,
-          };
-        })
-      );
+      const formattedRecipes = matchingRecipes.map((recipe) => ({
+        id: recipe.id,
+        title: recipe.title || 'Tarif Başlığı',
+        description: recipe.description || '',
+        cookingTime: recipe.cooking_time_minutes || 30,
+        cookingTimeMinutes: recipe.cooking_time_minutes || 30,
+        prepTimeMinutes: recipe.prep_time_minutes || 15,
+        difficultyLevel: this.mapDifficultyLevel(recipe.difficulty_level),
+        servingSize: recipe.serving_size || 4,
+        isPremium: recipe.is_premium || false,
+        isFeatured: recipe.is_featured || false,
+        averageRating: parseFloat(recipe.average_rating?.toString() || '4.5'),
+        ratingCount: recipe.rating_count || 25,
+        viewCount: recipe.view_count || 100,
+        imageUrl: recipe.image_url,
+        isFavorite: false,
+        // Matching information
+        matchPercentage: parseFloat(recipe.match_percentage),
+        matchingIngredients: recipe.matching_ingredient_names,
+        substituteIngredients: recipe.substitute_ingredient_names,
+        missingIngredients: recipe.missing_ingredient_names,
+        totalIngredients: recipe.total_ingredients,
+        matchingIngredientsCount: recipe.matching_ingredients,
+        substituteIngredientsCount: recipe.substitute_ingredients,
+        missingIngredientsCount: recipe.missing_ingredients_count,
+        createdAt: recipe.created_at,
+        updatedAt: recipe.updated_at,
+      }));
 
       return {
         success: true,
@@ -472,6 +586,10 @@ export class RecipesService {
           limit,
           total,
           totalPages: Math.ceil(total / limit),
+          totalIsApproximate: approximate,
+          nextCursor: pageRows.length > limit && lastMatch
+            ? encodeCursor('recipes:match', [lastMatch.match_percentage, lastMatch.average_rating, lastMatch.id])
+            : null,
         },
         message: `Found ${formattedRecipes.length} recipes matching your ingredients`,
       };
@@ -487,36 +605,24 @@ export class RecipesService {
     }
   }
 
-  private async getRecipeIngredientDetails(
-    recipeId: string,
-    userIngredientIds: string[],
-    languageCode: string = 'tr'
-  ) {
-    // Get all ingredients for this recipe
-    const recipeIngredients = await this.recipeIngredientRepository
-      .createQueryBuilder('ri')
-      .leftJoinAndSelect('ri.ingredient', 'ingredient')
-      .leftJoinAndSelect('ingredient.translations', 'translation', 'translation.languageCode = :languageCode')
-      .where('ri.recipeId = :recipeId', { recipeId })
-      .setParameter('languageCode', languageCode)
-      .getMany();
+  async getBestNextIngredients(ingredientIds: string[], limit: number = 10, languageCode: string = 'tr') {
+    const suggestions = this.ingredientCooccurrenceService.bestNextIngredients(ingredientIds, limit);
 
-    const matching = [];
-    const missing = [];
+    const names = suggestions.length === 0 ? [] : await this.ingredientRepository.query(`
+      SELECT ingredient_id, name
+      FROM mycheff.ingredient_translations
+      WHERE ingredient_id = ANY($1) AND language_code = $2
+    `, [suggestions.map(s => s.ingredientId), languageCode]);
+    const nameById = new Map<string, string>(names.map(row => [row.ingredient_id, row.name]));
 
-    for (const recipeIngredient of recipeIngredients) {
-      const ingredient = recipeIngredient.ingredient;
-      const translation = ingredient.translations?.[0];
-      const ingredientName = translation?.name || ingredient.slug || 'Unknown';
-
-      if (userIngredientIds.includes(ingredient.id)) {
-        matching.push(ingredientName);
-      } else {
-        missing.push(ingredientName);
-      }
-    }
-
-    return { matching, missing };
+    return {
+      success: true,
+      data: suggestions.map(suggestion => ({
+        ...suggestion,
+        name: nameById.get(suggestion.ingredientId) || 'Unknown',
+      })),
+      message: `Found ${suggestions.length} ingredients that unlock new recipes`,
+    };
   }
 
   private mapDifficultyLevel(level: number): string {
@@ -528,61 +634,41 @@ export class RecipesService {
     }
   }
 
-  async getFeaturedRecipes(page: number = 1, limit: number = 10, languageCode: string = 'tr') {
+  async getFeaturedRecipes(
+    page: number = 1,
+    limit: number = 10,
+    languageCode: string = 'tr',
+    approximateTotal: boolean = false,
+  ) {
     try {
       console.log('🔍 Fetching featured recipes with language:', languageCode);
-      
-      const [recipes, total] = await this.recipeRepository
-        .createQueryBuilder('recipe')
-        .leftJoinAndSelect('recipe.translations', 'translation', 'translation.languageCode = :languageCode', { languageCode })
-        .leftJoinAndSelect('recipe.categories', 'categories')
-        .leftJoinAndSelect('categories.translations', 'categoryTranslations', 'categoryTranslations.languageCode = :languageCode')
-        .where('recipe.isFeatured = true')
-        .orderBy('recipe.createdAt', 'DESC')
-        .skip((page - 1) * limit)
-        .take(limit)
-        .getManyAndCount();
-
-      console.log(`📊 Found ${total} featured recipes, returning ${recipes.length} items`);
-
-      const formattedRecipes = recipes.map(recipe => {
-        const translation = recipe.translations?.[0];
-        const category = recipe.categories?.[0];
-        const categoryTranslation = category?.translations?.[0];
-        
-        return {
-          id: recipe.id,
-          title: translation?.title || 'Tarif Başlığı',
-          description: translation?.description || '',
-          cookingTime: recipe.cookingTimeMinutes || 30, // Frontend expects 'cookingTime' not 'cookingTimeMinutes'
-          cookingTimeMinutes: recipe.cookingTimeMinutes || 30, // Keep both for compatibility
-          prepTimeMinutes: recipe.prepTimeMinutes || 15,
-          difficultyLevel: recipe.difficultyLevel || 'Easy',
-          servingSize: recipe.servingSize || 4,
-          isPremium: recipe.isPremium || false,
-          isFeatured: recipe.isFeatured || false,
-          averageRating: parseFloat(recipe.averageRating?.toString() || '4.5'),
-          ratingCount: recipe.ratingCount || 25,
-          viewCount: recipe.viewCount || 100,
-          imageUrl: recipe.imageUrl,
-          categories: [{
-            id: category?.id || '1',
-            name: categoryTranslation?.name || 'Ana Yemek'
-          }],
-          isFavorite: false, // This will be determined by user context later
-          createdAt: recipe.createdAt,
-          updatedAt: recipe.updatedAt,
-        };
-      });
+
+      const [rows, { total, approximate }] = await Promise.all([
+        this.recipeRepository.query(`
+          SELECT rc.card
+          FROM mycheff.recipe_cards rc
+          WHERE rc.language_code = $1 AND rc.is_featured = true
+          ORDER BY rc.created_at DESC, rc.recipe_id DESC
+          LIMIT $2 OFFSET $3
+        `, [languageCode, limit, (page - 1) * limit]),
+        this.countRecipeCards(
+          'SELECT recipe_id FROM mycheff.recipe_cards WHERE language_code = $1 AND is_featured = true',
+          [languageCode],
+          approximateTotal,
+        ),
+      ]);
+
+      console.log(`📊 Found ${total} featured recipes, returning ${rows.length} items`);
 
       return {
         success: true,
-        data: formattedRecipes,
+        data: rows.map(row => this.formatRecipeCard(row.card)),
         pagination: {
           page,
           limit,
           total,
           totalPages: Math.ceil(total / limit),
+          totalIsApproximate: approximate,
         },
         message: 'Featured recipes retrieved successfully',
       };
@@ -603,6 +689,25 @@ export class RecipesService {
     }
   }
 
+  // Cards are prebuilt per language by the recipe card triggers
+  // (mycheff.refresh_recipe_cards); listings only add per-request fields.
+  private formatRecipeCard(card: any) {
+    return {
+      ...card,
+      cookingTime: card.cookingTimeMinutes, // Frontend expects 'cookingTime' not 'cookingTimeMinutes'
+      averageRating: parseFloat(card.averageRating) || 0,
+      isFavorite: false, // This will be determined by user context later
+    };
+  }
+
+  private async countRecipeCards(sql: string, parameters: any[], approximateTotal: boolean) {
+    if (approximateTotal) {
+      return countWithThreshold(this.recipeRepository, sql, parameters);
+    }
+    const [{ total }] = await this.recipeRepository.query(`SELECT COUNT(*)::int AS total FROM (${sql}) AS matches`, parameters);
+    return { total, approximate: false };
+  }
+
   async getSchemaInfo() {
     try {
       const result = await this.recipeRepository.query(`
@@ -782,6 +887,9 @@ export class RecipesService {
       await this.recipeIngredientRepository.save(recipeIngredients);
     }
 
+    await this.ingredientCooccurrenceService.refreshRecipe(savedRecipe.id);
+    await this.recipeFacetService.refreshRecipe(savedRecipe.id);
+
     // Get the full recipe data and return it
     const fullRecipe = await this.findOne(savedRecipe.id);
     return new ApiResponseDto(fullRecipe, 'Recipe created successfully');
@@ -837,6 +945,9 @@ export class RecipesService {
       await this.recipeIngredientRepository.save(recipeIngredients);
     }
 
+    await this.ingredientCooccurrenceService.refreshRecipe(id);
+    await this.recipeFacetService.refreshRecipe(id);
+
     const result = await this.findOne(id);
     return new ApiResponseDto(result, 'Recipe updated successfully');
   }
@@ -848,6 +959,8 @@ export class RecipesService {
     }
 
     await this.recipeRepository.remove(recipe);
+    this.ingredientCooccurrenceService.removeRecipe(id);
+    this.recipeFacetService.removeRecipe(id);
   }
 
   async uploadMedia(recipeId: string, files: MulterFile[], mediaData: RecipeMediaDto[] = []): Promise<RecipeMedia[]> {
@@ -0,0 +1,254 @@
+import { Injectable, OnModuleInit } from '@nestjs/common';
+import { InjectRepository } from '@nestjs/typeorm';
+import { Repository } from 'typeorm';
+import { IngredientTranslation } from '../../entities/ingredient-translation.entity';
+import { foldSearchText } from '../../common/utils/search-text.util';
+
+export type AutocompleteType = 'ingredient' | 'category';
+
+export interface AutocompleteSuggestion {
+  id: string;
+  type: AutocompleteType;
+  name: string;
+  matched: string;
+  popularity: number;
+}
+
+interface CompletionEntry extends AutocompleteSuggestion {
+  key: string;
+  // 0 = name prefix, 1 = alias prefix, 2 = prefix of a later word
+  tier: number;
+}
+
+const REFRESH_CHECK_MS = 30 * 1000;
+const FULL_REBUILD_MS = 60 * 60 * 1000;
+const MAX_SCAN = 5000;
+
+// Sorted-array prefix index over ingredient names, aliases and category names
+// for every language. Lookups are a binary search plus a bounded range scan;
+// translation edits are applied incrementally using an updated_at watermark.
+@Injectable()
+export class AutocompleteService implements OnModuleInit {
+  // languageCode -> entries sorted by key
+  private indexes = new Map<string, CompletionEntry[]>();
+  // `${type}:${id}:${languageCode}` of every indexed translation row
+  private indexedRows = new Set<string>();
+  private watermark: Date | null = null;
+  private checkedAt = 0;
+  private builtAt = 0;
+  private refreshing: Promise<void> | null = null;
+
+  constructor(
+    @InjectRepository(IngredientTranslation)
+    private readonly ingredientTranslationRepository: Repository<IngredientTranslation>,
+  ) {}
+
+  async onModuleInit() {
+    await this.rebuild();
+  }
+
+  complete(query: string, languageCode = 'tr', limit = 10, type?: AutocompleteType): AutocompleteSuggestion[] {
+    this.scheduleRefresh();
+
+    const prefix = foldSearchText(query, languageCode);
+    const entries = this.indexes.get(languageCode);
+    if (!prefix || !entries) return [];
+
+    const best = new Map<string, CompletionEntry>();
+    let scanned = 0;
+    for (let i = this.lowerBound(entries, prefix); i < entries.length && scanned < MAX_SCAN; i++, scanned++) {
+      const entry = entries[i];
+      if (!entry.key.startsWith(prefix)) break;
+      if (type && entry.type !== type) continue;
+
+      const dedupeKey = `${entry.type}:${entry.id}`;
+      const current = best.get(dedupeKey);
+      if (!current || entry.tier < current.tier) {
+        best.set(dedupeKey, entry);
+      }
+    }
+
+    return Array.from(best.values())
+      .sort((a, b) =>
+        a.tier - b.tier ||
+        b.popularity - a.popularity ||
+        a.name.length - b.name.length
+      )
+      .slice(0, limit)
+      .map(({ id, type: entryType, name, matched, popularity }) => ({
+        id,
+        type: entryType,
+        name,
+        matched,
+        popularity,
+      }));
+  }
+
+  async rebuild(): Promise<void> {
+    try {
+      const rows = await this.loadRows(null);
+      const indexes = new Map<string, CompletionEntry[]>();
+      this.indexedRows = new Set();
+
+      for (const row of rows) {
+        const entries = indexes.get(row.language_code) || [];
+        entries.push(...this.entriesForRow(row));
+        indexes.set(row.language_code, entries);
+        this.indexedRows.add(this.rowKey(row));
+      }
+
+      for (const entries of indexes.values()) {
+        entries.sort((a, b) => (a.key < b.key ? -1 : a.key > b.key ? 1 : 0));
+      }
+
+      this.indexes = indexes;
+      this.watermark = this.maxUpdatedAt(rows, null);
+      this.builtAt = Date.now();
+      console.log(`🔤 Autocomplete index built from ${rows.length} translations`);
+    } catch (error) {
+      console.error('❌ Error building autocomplete index:', error.message);
+    } finally {
+      this.checkedAt = Date.now();
+    }
+  }
+
+  // Applies translation rows changed since the watermark; falls back to a full
+  // rebuild when rows were deleted or popularity counts are due a refresh.
+  async refresh(): Promise<void> {
+    if (Date.now() - this.builtAt > FULL_REBUILD_MS) {
+      return this.rebuild();
+    }
+
+    try {
+      const changed = await this.loadRows(this.watermark);
+      for (const row of changed) {
+        this.removeRow(row.type, row.id, row.language_code);
+        this.insertSorted(row.language_code, this.entriesForRow(row));
+        this.indexedRows.add(this.rowKey(row));
+      }
+      this.watermark = this.maxUpdatedAt(changed, this.watermark);
+
+      const [{ total }] = await this.ingredientTranslationRepository.query(`
+        SELECT
+          (SELECT COUNT(*) FROM mycheff.ingredient_translations it
+            JOIN mycheff.ingredients i ON i.id = it.ingredient_id AND i.is_active = true) +
+          (SELECT COUNT(*) FROM mycheff.category_translations ct
+            JOIN mycheff.categories c ON c.id = ct.category_id AND c.is_active = true) AS total
+      `);
+      if (parseInt(total) !== this.indexedRows.size) {
+        await this.rebuild();
+      }
+    } catch (error) {
+      console.error('❌ Error refreshing autocomplete index:', error.message);
+    } finally {
+      this.checkedAt = Date.now();
+    }
+  }
+
+  private scheduleRefresh() {
+    if (this.refreshing || Date.now() - this.checkedAt < REFRESH_CHECK_MS) return;
+
+    this.refreshing = this.refresh().finally(() => {
+      this.refreshing = null;
+    });
+  }
+
+  private async loadRows(since: Date | null) {
+    return await this.ingredientTranslationRepository.query(`
+      SELECT 'ingredient' AS type, it.ingredient_id AS id, it.language_code, it.name, it.aliases, it.updated_at,
+        COALESCE(ri.count, 0) + COALESCE(ui.count, 0) AS popularity
+      FROM mycheff.ingredient_translations it
+      JOIN mycheff.ingredients i ON i.id = it.ingredient_id AND i.is_active = true
+      LEFT JOIN (
+        SELECT ingredient_id, COUNT(*) AS count FROM mycheff.recipe_ingredients GROUP BY ingredient_id
+      ) ri ON ri.ingredient_id = it.ingredient_id
+      LEFT JOIN (
+        SELECT ingredient_id, COUNT(*) AS count FROM mycheff.user_ingredients GROUP BY ingredient_id
+      ) ui ON ui.ingredient_id = it.ingredient_id
+      WHERE $1::timestamptz IS NULL OR it.updated_at >= $1
+
+      UNION ALL
+
+      SELECT 'category' AS type, ct.category_id AS id, ct.language_code, ct.name, NULL AS aliases, ct.updated_at,
+        COALESCE(rc.count, 0) AS popularity
+      FROM mycheff.category_translations ct
+      JOIN mycheff.categories c ON c.id = ct.category_id AND c.is_active = true
+      LEFT JOIN (
+        SELECT category_id, COUNT(*) AS count FROM mycheff.recipe_categories GROUP BY category_id
+      ) rc ON rc.category_id = ct.category_id
+      WHERE $1::timestamptz IS NULL OR ct.updated_at >= $1
+    `, [since]);
+  }
+
+  private entriesForRow(row: any): CompletionEntry[] {
+    const entries: CompletionEntry[] = [];
+    const terms: Array<[string, number]> = [[row.name, 0]];
+    for (const alias of row.aliases || []) {
+      terms.push([alias, 1]);
+    }
+
+    for (const [term, tier] of terms) {
+      const folded = foldSearchText(term, row.language_code);
+      if (!folded) continue;
+
+      const base = {
+        id: row.id,
+        type: row.type as AutocompleteType,
+        name: row.name,
+        matched: term,
+        popularity: parseInt(row.popularity) || 0,
+      };
+      entries.push({ ...base, key: folded, tier });
+
+      // Index every later word so "biber" also completes "kırmızı biber"
+      for (let i = folded.indexOf(' '); i !== -1; i = folded.indexOf(' ', i + 1)) {
+        entries.push({ ...base, key: folded.slice(i + 1), tier: 2 });
+      }
+    }
+
+    return entries;
+  }
+
+  private insertSorted(languageCode: string, newEntries: CompletionEntry[]) {
+    const entries = this.indexes.get(languageCode) || [];
+    for (const entry of newEntries) {
+      entries.splice(this.lowerBound(entries, entry.key), 0, entry);
+    }
+    this.indexes.set(languageCode, entries);
+  }
+
+  private removeRow(type: AutocompleteType, id: string, languageCode: string) {
+    const entries = this.indexes.get(languageCode);
+    if (!entries) return;
+
+    this.indexes.set(languageCode, entries.filter(entry => entry.type !== type || entry.id !== id));
+    this.indexedRows.delete(`${type}:${id}:${languageCode}`);
+  }
+
+  private lowerBound(entries: CompletionEntry[], key: string): number {
+    let low = 0;
+    let high = entries.length;
+    while (low < high) {
+      const mid = (low + high) >>> 1;
+      if (entries[mid].key < key) {
+        low = mid + 1;
+      } else {
+        high = mid;
+      }
+    }
+    return low;
+  }
+
+  private rowKey(row: any): string {
+    return `${row.type}:${row.id}:${row.language_code}`;
+  }
+
+  private maxUpdatedAt(rows: any[], current: Date | null): Date | null {
+    let max = current;
+    for (const row of rows) {
+      const updatedAt = row.updated_at ? new Date(row.updated_at) : null;
+      if (updatedAt && (!max || updatedAt > max)) max = updatedAt;
+    }
+    return max;
+  }
+}
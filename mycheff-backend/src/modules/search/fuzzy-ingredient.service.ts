@@ -0,0 +1,199 @@
+import { Injectable, OnModuleInit } from '@nestjs/common';
+import { InjectRepository } from '@nestjs/typeorm';
+import { Repository } from 'typeorm';
+import { IngredientTranslation } from '../../entities/ingredient-translation.entity';
+import { foldSearchText } from '../../common/utils/search-text.util';
+
+export interface FuzzyIngredientMatch {
+  ingredientId: string;
+  name: string;
+  matched: string;
+  distance: number;
+  popularity: number;
+}
+
+interface FuzzyTerm {
+  key: string;
+  ingredientId: string;
+  name: string;
+  matched: string;
+  popularity: number;
+}
+
+interface LanguageIndex {
+  terms: FuzzyTerm[];
+  // deletion variant of a term prefix -> indices into terms
+  deletes: Map<string, number[]>;
+}
+
+const RELOAD_INTERVAL_MS = 30 * 60 * 1000;
+const MAX_EDIT_DISTANCE = 2;
+// Only the first PREFIX_LENGTH characters feed the deletion index, which keeps
+// it small; candidates are then verified against the full term.
+const PREFIX_LENGTH = 7;
+
+// SymSpell-style deletion index over ingredient names and aliases per language.
+// A lookup generates the query's deletions, intersects them with the index and
+// verifies candidates with a bounded edit distance, so misspellings such as
+// "domatez" still find "domates" without scanning the vocabulary.
+@Injectable()
+export class FuzzyIngredientService implements OnModuleInit {
+  private indexes = new Map<string, LanguageIndex>();
+  private loadedAt = 0;
+  private loading: Promise<void> | null = null;
+
+  constructor(
+    @InjectRepository(IngredientTranslation)
+    private readonly ingredientTranslationRepository: Repository<IngredientTranslation>,
+  ) {}
+
+  async onModuleInit() {
+    await this.reload();
+  }
+
+  async reload(): Promise<void> {
+    if (this.loading) return this.loading;
+
+    this.loading = (async () => {
+      try {
+        const rows = await this.ingredientTranslationRepository.query(`
+          SELECT it.ingredient_id, it.language_code, it.name, it.aliases, COALESCE(ri.count, 0) AS popularity
+          FROM mycheff.ingredient_translations it
+          JOIN mycheff.ingredients i ON i.id = it.ingredient_id AND i.is_active = true
+          LEFT JOIN (
+            SELECT ingredient_id, COUNT(*) AS count FROM mycheff.recipe_ingredients GROUP BY ingredient_id
+          ) ri ON ri.ingredient_id = it.ingredient_id
+        `);
+
+        const indexes = new Map<string, LanguageIndex>();
+        let termCount = 0;
+        for (const row of rows) {
+          const index = indexes.get(row.language_code) || { terms: [], deletes: new Map() };
+          indexes.set(row.language_code, index);
+
+          const seen = new Set<string>();
+          for (const term of [row.name, ...(row.aliases || [])]) {
+            const key = foldSearchText(term, row.language_code);
+            if (!key || seen.has(key)) continue;
+            seen.add(key);
+
+            this.addTerm(index, {
+              key,
+              ingredientId: row.ingredient_id,
+              name: row.name,
+              matched: term,
+              popularity: parseInt(row.popularity) || 0,
+            });
+            termCount++;
+          }
+        }
+
+        this.indexes = indexes;
+        console.log(`🔎 Built fuzzy ingredient index with ${termCount} terms`);
+      } catch (error) {
+        console.error('❌ Error building fuzzy ingredient index:', error.message);
+      } finally {
+        this.loadedAt = Date.now();
+        this.loading = null;
+      }
+    })();
+
+    return this.loading;
+  }
+
+  lookup(query: string, languageCode = 'tr', limit = 10, maxDistance = MAX_EDIT_DISTANCE): FuzzyIngredientMatch[] {
+    if (Date.now() - this.loadedAt > RELOAD_INTERVAL_MS) {
+      void this.reload();
+    }
+
+    const key = foldSearchText(query, languageCode);
+    const index = this.indexes.get(languageCode);
+    if (!key || !index) return [];
+
+    // Short queries tolerate fewer typos, otherwise everything matches
+    const allowed = Math.min(maxDistance, MAX_EDIT_DISTANCE, Math.floor(key.length / 3));
+
+    const best = new Map<string, FuzzyIngredientMatch>();
+    const checked = new Set<number>();
+    for (const variant of this.deletions(key.slice(0, PREFIX_LENGTH), allowed)) {
+      for (const termIndex of index.deletes.get(variant) || []) {
+        if (checked.has(termIndex)) continue;
+        checked.add(termIndex);
+
+        const term = index.terms[termIndex];
+        const distance = this.editDistance(key, term.key, allowed);
+        if (distance > allowed) continue;
+
+        const current = best.get(term.ingredientId);
+        if (!current || distance < current.distance) {
+          best.set(term.ingredientId, {
+            ingredientId: term.ingredientId,
+            name: term.name,
+            matched: term.matched,
+            distance,
+            popularity: term.popularity,
+          });
+        }
+      }
+    }
+
+    return Array.from(best.values())
+      .sort((a, b) => a.distance - b.distance || b.popularity - a.popularity)
+      .slice(0, limit);
+  }
+
+  private addTerm(index: LanguageIndex, term: FuzzyTerm) {
+    const termIndex = index.terms.push(term) - 1;
+    for (const variant of this.deletions(term.key.slice(0, PREFIX_LENGTH), MAX_EDIT_DISTANCE)) {
+      const list = index.deletes.get(variant) || [];
+      list.push(termIndex);
+      index.deletes.set(variant, list);
+    }
+  }
+
+  // Every string reachable from word by deleting up to maxDeletes characters
+  private deletions(word: string, maxDeletes: number): Set<string> {
+    const result = new Set<string>([word]);
+    let frontier = [word];
+    for (let depth = 0; depth < maxDeletes; depth++) {
+      const next: string[] = [];
+      for (const current of frontier) {
+        for (let i = 0; i < current.length; i++) {
+          const variant = current.slice(0, i) + current.slice(i + 1);
+          if (!result.has(variant)) {
+            result.add(variant);
+            next.push(variant);
+          }
+        }
+      }
+      frontier = next;
+    }
+    return result;
+  }
+
+  // Optimal string alignment distance; gives up as soon as every cell in a row
+  // exceeds the bound and returns bound + 1.
+  private editDistance(a: string, b: string, bound: number): number {
+    if (Math.abs(a.length - b.length) > bound) return bound + 1;
+
+    let previousPrevious: number[] = [];
+    let previous = Array.from({ length: b.length + 1 }, (_, j) => j);
+    for (let i = 1; i <= a.length; i++) {
+      const current = [i];
+      let rowMin = i;
+      for (let j = 1; j <= b.length; j++) {
+        const cost = a[i - 1] === b[j - 1] ? 0 : 1;
+        let value = Math.min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost);
+        if (i > 1 && j > 1 && a[i - 1] === b[j - 2] && a[i - 2] === b[j - 1]) {
+          value = Math.min(value, previousPrevious[j - 2] + 1);
+        }
+        current.push(value);
+        if (value < rowMin) rowMin = value;
+      }
+      if (rowMin > bound) return bound + 1;
+      previousPrevious = previous;
+      previous = current;
+    }
+    return previous[b.length];
+  }
+}
@@ -0,0 +1,115 @@
+import { Injectable } from '@nestjs/common';
+import { InjectRepository } from '@nestjs/typeorm';
+import { Repository } from 'typeorm';
+import { Recipe } from '../../entities/recipe.entity';
+
+interface CacheEntry {
+  languageCode: string;
+  version: number;
+  value: any;
+}
+
+const MAX_ENTRIES = 1000;
+
+// LRU cache for search results. Every key carries the language's catalog
+// version from mycheff.search_catalog_versions, which triggers bump on any
+// catalog write, so a hit is never stale and no TTL is needed.
+@Injectable()
+export class SearchCacheService {
+  // Map iteration order doubles as recency order (oldest first)
+  private entries = new Map<string, CacheEntry>();
+  private latestVersions = new Map<string, number>();
+  private hits = 0;
+  private misses = 0;
+  private evictions = 0;
+
+  constructor(
+    @InjectRepository(Recipe)
+    private readonly recipeRepository: Repository<Recipe>,
+  ) {}
+
+  async wrap<T>(scope: string, languageCode: string, params: object, load: () => Promise<T>): Promise<T> {
+    const version = await this.getVersion(languageCode);
+    if (version === null) {
+      return load();
+    }
+
+    const key = `${scope}:${languageCode}:${version}:${this.normalize(params)}`;
+    const cached = this.entries.get(key);
+    if (cached) {
+      this.hits++;
+      this.entries.delete(key);
+      this.entries.set(key, cached);
+      return cached.value;
+    }
+
+    this.misses++;
+    const value = await load();
+    this.entries.set(key, { languageCode, version, value });
+
+    while (this.entries.size > MAX_ENTRIES) {
+      const oldest = this.entries.keys().next().value as string;
+      this.entries.delete(oldest);
+      this.evictions++;
+    }
+
+    return value;
+  }
+
+  getStats() {
+    const lookups = this.hits + this.misses;
+    return {
+      size: this.entries.size,
+      maxEntries: MAX_ENTRIES,
+      hits: this.hits,
+      misses: this.misses,
+      evictions: this.evictions,
+      hitRate: lookups > 0 ? Math.round((this.hits / lookups) * 10000) / 100 : 0,
+    };
+  }
+
+  private async getVersion(languageCode: string): Promise<number | null> {
+    try {
+      const rows = await this.recipeRepository.query(`
+        SELECT version FROM mycheff.search_catalog_versions WHERE language_code = $1
+      `, [languageCode]);
+      // Without a row nothing would ever bump the version, so skip the cache
+      if (rows.length === 0) {
+        return null;
+      }
+      const version = parseInt(rows[0].version);
+
+      // A newer version makes every older entry for the language unreachable
+      if (version > (this.latestVersions.get(languageCode) ?? version)) {
+        for (const [key, entry] of this.entries) {
+          if (entry.languageCode === languageCode && entry.version < version) {
+            this.entries.delete(key);
+          }
+        }
+      }
+      this.latestVersions.set(languageCode, version);
+
+      return version;
+    } catch (error) {
+      console.error('❌ Error reading search catalog version:', error.message);
+      return null;
+    }
+  }
+
+  // Stable key: sorted object keys and arrays, empty values dropped. Text is kept
+  // verbatim because alias matching is case-sensitive.
+  private normalize(value: any): string {
+    if (Array.isArray(value)) {
+      return `[${value.map(item => this.normalize(item)).sort().join(',')}]`;
+    }
+    if (value && typeof value === 'object') {
+      const parts = Object.keys(value)
+        .filter(key => value[key] !== undefined && value[key] !== null && value[key] !== '')
+        .filter(key => !Array.isArray(value[key]) || value[key].length > 0)
+        .sort()
+        .map(key => `${key}=${this.normalize(value[key])}`);
+      return `{${parts.join('&')}}`;
+    }
+    return typeof value === 'string' ? JSON.stringify(value) : String(value);
+  }
+}
@@ -1,13 +1,22 @@
 import { Controller, Get, Query, UseGuards } from '@nestjs/common';
 import { ApiTags, ApiOperation, ApiQuery } from '@nestjs/swagger';
 import { JwtAuthGuard } from '../../common/guards/jwt-auth.guard';
+import { AdminGuard } from '../auth/guards/admin.guard';
 import { SearchService, SearchParams } from './search.service';
+import { AutocompleteService, AutocompleteType } from './autocomplete.service';
+import { SearchCacheService } from './search-cache.service';
+import { RecipeFacetService, COOKING_TIME_BUCKETS } from '../recipes/services/recipe-facets.service';
 
 @ApiTags('Search')
 @Controller('search')
 @UseGuards(JwtAuthGuard)
 export class SearchController {
-  constructor(private readonly searchService: SearchService) {}
+  constructor(
+    private readonly searchService: SearchService,
+    private readonly autocompleteService: AutocompleteService,
+    private readonly searchCache: SearchCacheService,
+    private readonly recipeFacetService: RecipeFacetService,
+  ) {}
 
   @Get('recipes')
   @ApiOperation({ summary: 'Search recipes with filters' })
@@ -20,6 +29,8 @@ export class SearchController {
   @ApiQuery({ name: 'page', required: false, type: Number })
   @ApiQuery({ name: 'limit', required: false, type: Number })
   @ApiQuery({ name: 'sortBy', required: false, enum: ['relevance', 'rating', 'newest', 'cookingTime'] })
+  @ApiQuery({ name: 'cursor', required: false, description: 'nextCursor from the previous page' })
+  @ApiQuery({ name: 'approximateTotal', required: false, type: Boolean })
   async searchRecipes(
     @Query('query') query?: string,
     @Query('categoryIds') categoryIds?: string | string[],
@@ -30,6 +41,8 @@ export class SearchController {
     @Query('page') page?: number,
     @Query('limit') limit?: number,
     @Query('sortBy') sortBy?: 'relevance' | 'rating' | 'newest' | 'cookingTime',
+    @Query('cursor') cursor?: string,
+    @Query('approximateTotal') approximateTotal?: string,
   ) {
     const params: SearchParams = {
       query,
@@ -43,6 +56,8 @@ export class SearchController {
       page,
       limit,
       sortBy,
+      cursor,
+      approximateTotal: approximateTotal === 'true',
     };
 
     const result = await this.searchService.searchRecipes(params);
@@ -53,6 +68,33 @@ export class SearchController {
     };
   }
 
+  @Get('facets')
+  @ApiOperation({ summary: 'Recipe counts per category, difficulty, cooking time bucket and premium flag' })
+  @ApiQuery({ name: 'categoryIds', required: false, type: [String] })
+  @ApiQuery({ name: 'difficultyLevels', required: false, type: [Number] })
+  @ApiQuery({ name: 'cookingTimeBuckets', required: false, enum: COOKING_TIME_BUCKETS.map(([bucket]) => bucket), isArray: true })
+  @ApiQuery({ name: 'isPremium', required: false, type: Boolean })
+  getFacets(
+    @Query('categoryIds') categoryIds?: string | string[],
+    @Query('difficultyLevels') difficultyLevels?: string | string[],
+    @Query('cookingTimeBuckets') cookingTimeBuckets?: string | string[],
+    @Query('isPremium') isPremium?: string,
+  ) {
+    const toArray = (value?: string | string[]) => Array.isArray(value) ? value : value ? [value] : undefined;
+
+    const counts = this.recipeFacetService.getFacetCounts({
+      categoryIds: toArray(categoryIds),
+      difficultyLevels: toArray(difficultyLevels)?.map(Number),
+      cookingTimeBuckets: toArray(cookingTimeBuckets),
+      isPremium: isPremium === undefined ? undefined : isPremium === 'true',
+    });
+
+    return {
+      success: true,
+      data: counts,
+    };
+  }
+
   @Get('ingredients')
   @ApiOperation({ summary: 'Search ingredients' })
   async searchIngredients(
@@ -83,6 +125,26 @@ export class SearchController {
     };
   }
 
+  @Get('autocomplete')
+  @ApiOperation({ summary: 'Prefix autocomplete for ingredients and categories' })
+  @ApiQuery({ name: 'query', required: true })
+  @ApiQuery({ name: 'languageCode', required: false, enum: ['tr', 'en', 'es', 'fr', 'de', 'ar'] })
+  @ApiQuery({ name: 'limit', required: false, type: Number })
+  @ApiQuery({ name: 'type', required: false, enum: ['ingredient', 'category'] })
+  autocomplete(
+    @Query('query') query: string,
+    @Query('languageCode') languageCode = 'tr',
+    @Query('limit') limit = 10,
+    @Query('type') type?: AutocompleteType,
+  ) {
+    const suggestions = this.autocompleteService.complete(query, languageCode, Number(limit), type);
+
+    return {
+      success: true,
+      data: suggestions,
+    };
+  }
+
   @Get('suggestions')
   @ApiOperation({ summary: 'Get search suggestions' })
   async getSearchSuggestions(
@@ -96,4 +158,14 @@ export class SearchController {
       data: suggestions,
     };
   }
+
+  @Get('cache-stats')
+  @UseGuards(AdminGuard)
+  @ApiOperation({ summary: 'Search result cache hit/miss counters (Admin only)' })
+  getCacheStats() {
+    return {
+      success: true,
+      data: this.searchCache.getStats(),
+    };
+  }
 } 
\ No newline at end of file
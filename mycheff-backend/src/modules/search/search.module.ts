@@ -6,8 +6,12 @@ import { Ingredient } from '../../entities/ingredient.entity';
 import { IngredientTranslation } from '../../entities/ingredient-translation.entity';
 import { Category } from '../../entities/category.entity';
 import { CategoryTranslation } from '../../entities/category-translation.entity';
+import { RecipesModule } from '../recipes/recipes.module';
 import { SearchController } from './search.controller';
 import { SearchService } from './search.service';
+import { AutocompleteService } from './autocomplete.service';
+import { FuzzyIngredientService } from './fuzzy-ingredient.service';
+import { SearchCacheService } from './search-cache.service';
 
 @Module({
   imports: [
@@ -19,9 +23,10 @@ import { SearchService } from './search.service';
       Category,
       CategoryTranslation,
     ]),
+    RecipesModule,
   ],
   controllers: [SearchController],
-  providers: [SearchService],
-  exports: [SearchService],
+  providers: [SearchService, AutocompleteService, FuzzyIngredientService, SearchCacheService],
+  exports: [SearchService, AutocompleteService, FuzzyIngredientService],
 })
 export class SearchModule {} 
\ No newline at end of file
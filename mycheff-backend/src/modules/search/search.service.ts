@@ -1,14 +1,16 @@
 import { Injectable } from '@nestjs/common';
 import { InjectRepository } from '@nestjs/typeorm';
 import { Repository } from 'typeorm';
-// import { CACHE_MANAGER } from '@nestjs/cache-manager';
-// import { Cache } from 'cache-manager';
 import { Recipe } from '../../entities/recipe.entity';
 import { RecipeTranslation } from '../../entities/recipe-translation.entity';
 import { Ingredient } from '../../entities/ingredient.entity';
 import { IngredientTranslation } from '../../entities/ingredient-translation.entity';
 import { Category } from '../../entities/category.entity';
 import { CategoryTranslation } from '../../entities/category-translation.entity';
+import { FuzzyIngredientService } from './fuzzy-ingredient.service';
+import { SearchCacheService } from './search-cache.service';
+import { encodeCursor, decodeCursor, CursorValue } from '../../common/utils/cursor.util';
+import { countQueryBuilder } from '../../common/utils/count.util';
 
 export interface SearchFilters {
   categoryIds?: string[];
@@ -26,8 +28,43 @@ export interface SearchParams {
   page?: number;
   limit?: number;
   sortBy?: 'relevance' | 'rating' | 'newest' | 'cookingTime';
+  cursor?: string;
+  // Exact totals up to a threshold, planner estimate beyond it
+  approximateTotal?: boolean;
 }
 
+interface SearchSort {
+  order: Array<[string, 'ASC' | 'DESC']>;
+  // Row comparison against the cursor values :c0, :c1, ...
+  seek: string;
+  keys: (recipe: Recipe) => CursorValue[];
+}
+
+// Every ordering ends on recipe.id so the keyset cursor is unambiguous. createdAt
+// is re-read from the cursor row because JS dates drop Postgres microseconds.
+const SEARCH_SORTS: Record<string, SearchSort> = {
+  relevance: {
+    order: [['recipe.isFeatured', 'DESC'], ['recipe.averageRating', 'DESC'], ['recipe.id', 'DESC']],
+    seek: '(recipe.isFeatured, recipe.averageRating, recipe.id) < (:c0, :c1, :c2)',
+    keys: recipe => [recipe.isFeatured, recipe.averageRating, recipe.id],
+  },
+  rating: {
+    order: [['recipe.averageRating', 'DESC'], ['recipe.ratingCount', 'DESC'], ['recipe.id', 'DESC']],
+    seek: '(recipe.averageRating, recipe.ratingCount, recipe.id) < (:c0, :c1, :c2)',
+    keys: recipe => [recipe.averageRating, recipe.ratingCount, recipe.id],
+  },
+  newest: {
+    order: [['recipe.createdAt', 'DESC'], ['recipe.id', 'DESC']],
+    seek: '(recipe.createdAt, recipe.id) < (COALESCE((SELECT created_at FROM mycheff.recipes WHERE id = :c1), :c0), :c1)',
+    keys: recipe => [recipe.createdAt.toISOString(), recipe.id],
+  },
+  cookingTime: {
+    order: [['recipe.cookingTimeMinutes', 'ASC'], ['recipe.id', 'ASC']],
+    seek: '(recipe.cookingTimeMinutes, recipe.id) > (:c0, :c1)',
+    keys: recipe => [recipe.cookingTimeMinutes, recipe.id],
+  },
+};
+
 @Injectable()
 export class SearchService {
   constructor(
@@ -48,9 +85,10 @@ export class SearchService {
     
     @InjectRepository(CategoryTranslation)
     private categoryTranslationRepository: Repository<CategoryTranslation>,
-    
-    // @Inject(CACHE_MANAGER)
-    // private cacheManager: Cache,
+
+    private fuzzyIngredientService: FuzzyIngredientService,
+
+    private searchCache: SearchCacheService,
   ) {}
 
   async searchRecipes(params: SearchParams) {
@@ -60,141 +98,154 @@ export class SearchService {
       languageCode = 'tr',
       page = 1,
       limit = 20,
-      sortBy = 'relevance'
+      sortBy = 'relevance',
+      cursor,
+      approximateTotal = false,
     } = params;
 
-    // const cacheKey = `search:${JSON.stringify(params)}`;
-    // const cached = await this.cacheManager.get(cacheKey);
-    // if (cached) return cached;
-
-    const queryBuilder = this.recipeRepository
-      .createQueryBuilder('recipe')
-      .leftJoinAndSelect('recipe.translations', 'translation', 'translation.languageCode = :lang', { lang: languageCode })
-      .leftJoinAndSelect('recipe.media', 'media', 'media.sortOrder = 0') // Primary media
-      .leftJoinAndSelect('recipe.categories', 'recipeCategories')
-      .leftJoinAndSelect('recipeCategories.category', 'category')
-      .leftJoinAndSelect('category.translations', 'categoryTranslation', 'categoryTranslation.languageCode = :lang')
-      .where('recipe.isPublished = true');
-
-    // Text search
-    if (query) {
-      queryBuilder.andWhere(`
-        (translation.title ILIKE :query 
-         OR translation.description ILIKE :query 
-         OR translation.instructions ILIKE :query)
-      `, { query: `%${query}%` });
-    }
-
-    // Category filter
-    if (filters.categoryIds?.length) {
-      queryBuilder.andWhere('category.id IN (:...categoryIds)', { 
-        categoryIds: filters.categoryIds 
-      });
-    }
-
-    // Cooking time filter
-    if (filters.maxCookingTime) {
-      queryBuilder.andWhere('recipe.cookingTimeMinutes <= :maxTime', { 
-        maxTime: filters.maxCookingTime 
-      });
-    }
-
-    // Difficulty filter
-    if (filters.difficultyLevel) {
-      queryBuilder.andWhere('recipe.difficultyLevel = :difficulty', { 
-        difficulty: filters.difficultyLevel 
-      });
-    }
-
-    // Premium filter
-    if (filters.isPremium !== undefined) {
-      queryBuilder.andWhere('recipe.isPremium = :isPremium', { 
-        isPremium: filters.isPremium 
-      });
-    }
-
-    // Sorting
-    switch (sortBy) {
-      case 'rating':
-        queryBuilder.orderBy('recipe.averageRating', 'DESC');
-        break;
-      case 'newest':
-        queryBuilder.orderBy('recipe.createdAt', 'DESC');
-        break;
-      case 'cookingTime':
-        queryBuilder.orderBy('recipe.cookingTimeMinutes', 'ASC');
-        break;
-      default:
-        queryBuilder.orderBy('recipe.isFeatured', 'DESC');
-        queryBuilder.addOrderBy('recipe.averageRating', 'DESC');
-    }
-
-    const [recipes, total] = await queryBuilder
-      .skip((page - 1) * limit)
-      .take(limit)
-      .getManyAndCount();
-
-    const result = {
-      recipes,
-      pagination: {
-        page,
-        limit,
-        total,
-        totalPages: Math.ceil(total / limit),
-      },
-    };
-
-    // await this.cacheManager.set(cacheKey, result, 5 * 60 * 1000); // 5 min cache
-    return result;
+    const cacheParams = { query, filters, page, limit, sortBy, cursor, approximateTotal };
+    return this.searchCache.wrap('recipes', languageCode, cacheParams, async () => {
+      const queryBuilder = this.recipeRepository
+        .createQueryBuilder('recipe')
+        .leftJoinAndSelect('recipe.translations', 'translation', 'translation.languageCode = :lang', { lang: languageCode })
+        .leftJoinAndSelect('recipe.media', 'media', 'media.sortOrder = 0') // Primary media
+        .leftJoinAndSelect('recipe.categories', 'recipeCategories')
+        .leftJoinAndSelect('recipeCategories.category', 'category')
+        .leftJoinAndSelect('category.translations', 'categoryTranslation', 'categoryTranslation.languageCode = :lang')
+        .where('recipe.isPublished = true');
+
+      // Text search
+      if (query) {
+        queryBuilder.andWhere(`
+          (translation.title ILIKE :query 
+           OR translation.description ILIKE :query 
+           OR translation.instructions ILIKE :query)
+        `, { query: `%${query}%` });
+      }
+
+      // Category filter
+      if (filters.categoryIds?.length) {
+        queryBuilder.andWhere('category.id IN (:...categoryIds)', { 
+          categoryIds: filters.categoryIds 
+        });
+      }
+
+      // Cooking time filter
+      if (filters.maxCookingTime) {
+        queryBuilder.andWhere('recipe.cookingTimeMinutes <= :maxTime', { 
+          maxTime: filters.maxCookingTime 
+        });
+      }
+
+      // Difficulty filter
+      if (filters.difficultyLevel) {
+        queryBuilder.andWhere('recipe.difficultyLevel = :difficulty', { 
+          difficulty: filters.difficultyLevel 
+        });
+      }
+
+      // Premium filter
+      if (filters.isPremium !== undefined) {
+        queryBuilder.andWhere('recipe.isPremium = :isPremium', { 
+          isPremium: filters.isPremium 
+        });
+      }
+
+      // Sorting
+      const sort = SEARCH_SORTS[sortBy] || SEARCH_SORTS.relevance;
+      for (const [column, direction] of sort.order) {
+        queryBuilder.addOrderBy(column, direction);
+      }
+
+      const countQuery = queryBuilder.clone();
+      const pageSize = Number(limit);
+
+      // Keyset pagination: seek past the last row instead of skipping pages
+      const seekValues = decodeCursor(cursor, `search:${sortBy}`, sort.order.length);
+      if (seekValues) {
+        queryBuilder.andWhere(sort.seek, Object.fromEntries(seekValues.map((value, i) => [`c${i}`, value])));
+      } else {
+        queryBuilder.skip((page - 1) * pageSize);
+      }
+
+      const [rows, { total, approximate }] = await Promise.all([
+        queryBuilder.take(pageSize + 1).getMany(),
+        countQueryBuilder(countQuery, approximateTotal),
+      ]);
+
+      const recipes = rows.slice(0, pageSize);
+      const last = recipes[recipes.length - 1];
+
+      const result = {
+        recipes,
+        pagination: {
+          page,
+          limit,
+          total,
+          totalPages: Math.ceil(total / limit),
+          totalIsApproximate: approximate,
+          nextCursor: rows.length > pageSize && last ? encodeCursor(`search:${sortBy}`, sort.keys(last)) : null,
+        },
+      };
+
+      return result;
+    });
   }
 
   async searchIngredients(query: string, languageCode = 'tr', limit = 10) {
-    // const cacheKey = `ingredient_search:${query}:${languageCode}:${limit}`;
-    // const cached = await this.cacheManager.get(cacheKey);
-    // if (cached) return cached;
-
-    const ingredients = await this.ingredientRepository
-      .createQueryBuilder('ingredient')
-      .leftJoinAndSelect('ingredient.translations', 'translation', 'translation.languageCode = :lang', { lang: languageCode })
-      .where('translation.name ILIKE :query', { query: `%${query}%` })
-      .orWhere('translation.aliases @> :aliases', { aliases: JSON.stringify([query]) })
-      .orderBy('LENGTH(translation.name)', 'ASC')
-      .limit(limit)
-      .getMany();
-
-    // await this.cacheManager.set(cacheKey, ingredients, 10 * 60 * 1000);
-    return ingredients;
+    return this.searchCache.wrap('ingredients', languageCode, { query, limit }, async () => {
+      const ingredients = await this.ingredientRepository
+        .createQueryBuilder('ingredient')
+        .leftJoinAndSelect('ingredient.translations', 'translation', 'translation.languageCode = :lang', { lang: languageCode })
+        .where('translation.name ILIKE :query', { query: `%${query}%` })
+        .orWhere('translation.aliases @> :aliases', { aliases: JSON.stringify([query]) })
+        .orderBy('LENGTH(translation.name)', 'ASC')
+        .limit(limit)
+        .getMany();
+
+      // Nothing matched literally: fall back to typo-tolerant lookup
+      if (ingredients.length === 0 && query) {
+        const matches = this.fuzzyIngredientService.lookup(query, languageCode, limit);
+        if (matches.length > 0) {
+          const ids = matches.map(match => match.ingredientId);
+          const found = await this.ingredientRepository
+            .createQueryBuilder('ingredient')
+            .leftJoinAndSelect('ingredient.translations', 'translation', 'translation.languageCode = :lang', { lang: languageCode })
+            .whereInIds(ids)
+            .getMany();
+
+          return found.sort((a, b) => ids.indexOf(a.id) - ids.indexOf(b.id));
+        }
+      }
+
+      return ingredients;
+    });
   }
 
   async searchCategories(query: string, languageCode = 'tr', limit = 10) {
-    // const cacheKey = `category_search:${query}:${languageCode}:${limit}`;
-    // const cached = await this.cacheManager.get(cacheKey);
-    // if (cached) return cached;
-
-    const categories = await this.categoryRepository
-      .createQueryBuilder('category')
-      .leftJoinAndSelect('category.translations', 'translation', 'translation.languageCode = :lang', { lang: languageCode })
-      .where('translation.name ILIKE :query', { query: `%${query}%` })
-      .andWhere('category.isActive = true')
-      .orderBy('category.sortOrder', 'ASC')
-      .limit(limit)
-      .getMany();
-
-    // await this.cacheManager.set(cacheKey, categories, 10 * 60 * 1000);
-    return categories;
+    return this.searchCache.wrap('categories', languageCode, { query, limit }, async () => {
+      const categories = await this.categoryRepository
+        .createQueryBuilder('category')
+        .leftJoinAndSelect('category.translations', 'translation', 'translation.languageCode = :lang', { lang: languageCode })
+        .where('translation.name ILIKE :query', { query: `%${query}%` })
+        .andWhere('category.isActive = true')
+        .orderBy('category.sortOrder', 'ASC')
+        .limit(limit)
+        .getMany();
+
+      return categories;
+    });
   }
 
-  async getSearchSuggestions(query: string, languageCode = 'tr') {
-    const [recipes, ingredients, categories] = await Promise.all([
-      this.searchRecipes({ query, languageCode, limit: 3 }),
-      this.searchIngredients(query, languageCode, 3),
-      this.searchCategories(query, languageCode, 3),
-    ]);
-
-    return {
-      recipes: recipes.recipes,
-      ingredients,
-      categories,
-    };
+  // One round trip: mycheff.search_suggestions() builds all three groups as JSON
+  async getSearchSuggestions(query: string, languageCode = 'tr', limits = { recipes: 3, ingredients: 3, categories: 3 }) {
+    return this.searchCache.wrap('suggestions', languageCode, { query, limits }, async () => {
+      const [row] = await this.recipeRepository.query(
+        'SELECT mycheff.search_suggestions($1, $2, $3, $4, $5) AS suggestions',
+        [query || '', languageCode, limits.recipes, limits.ingredients, limits.categories],
+      );
+
+      return row?.suggestions || { recipes: [], ingredients: [], categories: [] };
+    });
   }
 } 
\ No newline at end of file
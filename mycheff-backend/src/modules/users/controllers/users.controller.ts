@@ -148,6 +148,8 @@ export class UsersController {
   @ApiQuery({ name: 'page', description: 'Page number', required: false, example: 1 })
   @ApiQuery({ name: 'limit', description: 'Items per page', required: false, example: 20 })
   @ApiQuery({ name: 'lang', description: 'Language code', required: false, example: 'tr' })
+  @ApiQuery({ name: 'cursor', description: 'nextCursor from the previous page', required: false })
+  @ApiQuery({ name: 'approximateTotal', description: 'Estimate totals above 1000 rows', required: false })
   @ApiResponse({
     status: 200,
     description: 'User favorites retrieved successfully',
@@ -157,8 +159,16 @@ export class UsersController {
     @Query('page') page: number = 1,
     @Query('limit') limit: number = 20,
     @Query('lang') languageCode?: string,
+    @Query('cursor') cursor?: string,
+    @Query('approximateTotal') approximateTotal?: string,
   ): Promise<PaginatedResponseDto<any>> {
-    return this.usersService.getUserFavorites(req.user.id, { page, limit, languageCode });
+    return this.usersService.getUserFavorites(req.user.id, {
+      page,
+      limit,
+      languageCode,
+      cursor,
+      approximateTotal: approximateTotal === 'true',
+    });
   }
 
   @Post('favorites')
@@ -208,9 +218,17 @@ export class UsersController {
     @Request() req: any,
     @Query('page') page: number = 1,
     @Query('limit') limit: number = 20,
-    @Query('lang') languageCode?: string
+    @Query('lang') languageCode?: string,
+    @Query('cursor') cursor?: string,
+    @Query('approximateTotal') approximateTotal?: string
   ) {
-    return this.usersService.getUserFavorites(req.user.id, { page, limit, languageCode });
+    return this.usersService.getUserFavorites(req.user.id, {
+      page,
+      limit,
+      languageCode,
+      cursor,
+      approximateTotal: approximateTotal === 'true',
+    });
   }
 
   @Post('me/favorites/:recipeId')
@@ -9,6 +9,8 @@ import { Ingredient } from '../../../entities/ingredient.entity';
 import { Recipe } from '../../../entities/recipe.entity';
 import { UpdateUserDto, ChangePasswordDto, UserResponseDto } from '../dto/user.dto';
 import { PaginatedResponseDto } from '../../../common/dto/api-response.dto';
+import { encodeCursor, decodeCursor } from '../../../common/utils/cursor.util';
+import { countQueryBuilder } from '../../../common/utils/count.util';
 
 @Injectable()
 export class UsersService {
@@ -166,19 +168,39 @@ export class UsersService {
     paginationDto: any,
     languageCode: string = 'tr'
   ): Promise<PaginatedResponseDto<any>> {
-    const { page = 1, limit = 20 } = paginationDto;
-    const skip = (page - 1) * limit;
+    const { page = 1, limit = 20, cursor, approximateTotal = false } = paginationDto;
+    const pageSize = Number(limit);
+    const seek = decodeCursor(cursor, 'favorites', 2);
 
-    const [favorites, total] = await this.userFavoriteRepository
+    const queryBuilder = this.userFavoriteRepository
       .createQueryBuilder('favorite')
       .leftJoinAndSelect('favorite.recipe', 'recipe')
       .leftJoinAndSelect('recipe.translations', 'translation', 'translation.languageCode = :languageCode', { languageCode })
       .leftJoinAndSelect('recipe.categories', 'category')
       .where('favorite.userId = :userId', { userId })
       .orderBy('favorite.createdAt', 'DESC')
-      .skip(skip)
-      .take(limit)
-      .getManyAndCount();
+      .addOrderBy('favorite.recipeId', 'DESC');
+
+    const countQuery = queryBuilder.clone();
+    if (seek) {
+      // created_at is re-read from the cursor row; JS dates drop microseconds
+      queryBuilder.andWhere(
+        `(favorite.createdAt, favorite.recipeId) < (COALESCE(
+          (SELECT created_at FROM mycheff.favorite_recipes WHERE user_id = :userId AND recipe_id = :cursorRecipeId),
+          :cursorCreatedAt
+        ), :cursorRecipeId)`,
+        { cursorCreatedAt: seek[0], cursorRecipeId: seek[1] },
+      );
+    } else {
+      queryBuilder.skip((page - 1) * pageSize);
+    }
+
+    const [rows, { total, approximate }] = await Promise.all([
+      queryBuilder.take(pageSize + 1).getMany(),
+      countQueryBuilder(countQuery, approximateTotal, 'favorite.recipeId'),
+    ]);
+    const favorites = rows.slice(0, pageSize);
+    const last = favorites[favorites.length - 1];
 
     const formattedFavorites = favorites.map(favorite => ({
       ...favorite.recipe,
@@ -196,8 +218,12 @@ export class UsersService {
         limit,
         total,
         totalPages,
-        hasNext: page < totalPages,
-        hasPrev: page > 1,
+        hasNext: rows.length > pageSize,
+        hasPrev: page > 1 || !!seek,
+        totalIsApproximate: approximate,
+        nextCursor: rows.length > pageSize && last
+          ? encodeCursor('favorites', [last.createdAt.toISOString(), last.recipeId])
+          : null,
       },
     );
   }
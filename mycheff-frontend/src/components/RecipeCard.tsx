@@ -14,6 +14,12 @@ interface Recipe {
   title: string;
   description?: string;
   imageUrl?: string;
+  imagePlaceholder?: {
+    width: number;
+    height: number;
+    color: string;
+    lqip: string; // Tiny WebP data URI
+  } | null;
   cookingTimeMinutes?: number;
   difficultyLevel?: number;
   isFavorite?: boolean;
@@ -67,6 +73,7 @@ const RecipeCard = React.memo<RecipeCardProps>(({
   }, [isSelectionMode, recipe.isFavorite]);
 
   const imageSource = recipe.imageUrl || DEFAULT_IMAGE;
+  const placeholder = recipe.imageUrl ? recipe.imagePlaceholder : null;
   const categoryName = recipe.categories?.[0]?.name || 'Delicious recipe';
 
   return (
@@ -81,12 +88,23 @@ const RecipeCard = React.memo<RecipeCardProps>(({
       {/* Recipe Image Container */}
       <View style={[
         styles.imageContainer, 
+        placeholder && { backgroundColor: placeholder.color },
         isSelected && styles.selectedImageContainer
       ]}>
+        {/* Blurred preview shown until the full image has loaded over it */}
+        {placeholder && (
+          <Image
+            source={{ uri: placeholder.lqip }}
+            style={styles.image}
+            resizeMode="cover"
+            blurRadius={8}
+          />
+        )}
         <Image
           source={{ uri: imageSource }}
           style={styles.image}
           resizeMode="cover"
+          fadeDuration={placeholder ? 200 : 0}
         />
         
         {/* Selection Overlay */}
@@ -154,6 +172,7 @@ const styles = StyleSheet.create({
     borderColor: COLORS.primary,
   },
   image: {
+    ...StyleSheet.absoluteFillObject,
     width: '100%',
     height: '100%',
   },
@@ -137,8 +137,11 @@ export const recipeAPI = {
     matchPercentage: number; 
     missingIngredients: string[];
     matchingIngredients: string[];
+    substituteIngredients: string[];
     totalIngredients: number;
     matchingIngredientsCount: number;
+    substituteIngredientsCount: number;
+    missingIngredientsCount: number;
   }>> => {
     const { page = 1, limit = 20, ...matchParams } = params;
 
@@ -146,8 +149,11 @@ export const recipeAPI = {
       matchPercentage: number; 
       missingIngredients: string[];
       matchingIngredients: string[];
+      substituteIngredients: string[];
       totalIngredients: number;
       matchingIngredientsCount: number;
+      substituteIngredientsCount: number;
+      missingIngredientsCount: number;
     }>>('/recipes/by-ingredients', {
       ...matchParams,
       page,